@@ -1,5 +1,5 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 
 import asyncio, os
 from datetime import datetime, timedelta
@@ -7,37 +7,34 @@ from aiohttp import ClientSession
 from random import randint, choice
 from discord.ext import commands
 from datetime import date
-from PIL import Image
 from io import BytesIO
 from toml import load
-from logging import info
+from logging import info, warning
 from hashlib import sha256
 from inspect import signature, Parameter
 from functools import partial
 from yaml import full_load
 from typing import Coroutine, cast
+from pymongo.errors import PyMongoError
 
 from .static.enums import Category
 from .utils.interactions import Modal
-from .static.constants import TIPS, LOOTBOXES, DB
-
-cache = {}
-
-
-def _cached(func, cache):
-    """Cache specifically designed for the find_dominant_color function"""
-
-    async def inner(self, args):
-        if args in cache:
-            return cache[args]
-        res = await func(self, args)
-        cache[args] = res
-        return res
-
-    return inner
-
-
-cached = partial(_cached, cache=cache)
+from .utils.colors import DominantColorCache, dominant_color
+from .utils.leaderboard import create_indexes as create_leaderboard_indexes
+from .utils.reminders import create_indexes as create_reminder_indexes
+from .utils.render import RenderExecutor, RenderQueueFull
+from .static.constants import (
+    TIPS,
+    LOOTBOXES,
+    DB,
+    COMMAND_USAGE_FLUSH_INTERVAL,
+    COOLDOWN_SWEEP_INTERVAL,
+    RENDER_WORKERS,
+    RENDER_MAX_PENDING,
+    DOMINANT_COLOR_CACHE_SIZE,
+    DOMINANT_COLOR_CACHE_PATH,
+    DOMINANT_COLOR_SAVE_INTERVAL,
+)
 
 
 async def get_prefix(bot: "BaseBot", message: discord.Message):
@@ -78,6 +75,10 @@ class BaseBot(commands.AutoShardedBot):
         self.__cached_formatted_commands: list[commands.Command] = []
         self.cached_skus: list[discord.SKU] = []
         self.cached_entitlements: list[discord.Entitlement] = []
+        self.renderer = RenderExecutor(RENDER_WORKERS, RENDER_MAX_PENDING)
+        self.dominant_colors = DominantColorCache(
+            DOMINANT_COLOR_CACHE_SIZE, DOMINANT_COLOR_CACHE_PATH
+        )
 
         # Load ../api/Rocket.toml to get port under [debug]
         with open("api/Rocket.toml") as f:
@@ -116,6 +117,17 @@ class BaseBot(commands.AutoShardedBot):
             await self.clone_top_level_cog(self.get_cog(cog))
         await self.tree.sync()
 
+        if not self.flush_command_usage.is_running():
+            self.flush_command_usage.start()
+        if not self.sweep_cooldowns.is_running():
+            self.sweep_cooldowns.start()
+        self.dominant_colors.load()
+        if not self.save_dominant_colors.is_running():
+            self.save_dominant_colors.start()
+        await self.renderer.start()
+        await create_leaderboard_indexes()
+        await create_reminder_indexes()
+
         self.cached_skus = await self.fetch_skus()
         self.cached_entitlements = [
             entitlement async for entitlement in self.entitlements(limit=None)
@@ -215,9 +227,39 @@ class BaseBot(commands.AutoShardedBot):
                         f'Cloned command "{cmd.qualified_name}" to the top level as user installable'
                     )
 
+    async def _flush_command_usage(self) -> None:
+        from .utils.checks import CommandUsageCache
+
+        try:
+            await CommandUsageCache.flush()
+        except PyMongoError as e:
+            # The counts are kept and written by the next flush
+            warning(f"Could not write command usage: {e}")
+
+    @tasks.loop(seconds=COMMAND_USAGE_FLUSH_INTERVAL)
+    async def flush_command_usage(self):
+        await self._flush_command_usage()
+
+    @tasks.loop(seconds=COOLDOWN_SWEEP_INTERVAL)
+    async def sweep_cooldowns(self):
+        from .utils.checks import cooldowns
+
+        cooldowns.sweep()
+
+    @tasks.loop(seconds=DOMINANT_COLOR_SAVE_INTERVAL)
+    async def save_dominant_colors(self):
+        self.dominant_colors.save()
+
     async def close(self):
+        self.flush_command_usage.cancel()
+        self.sweep_cooldowns.cancel()
+        self.save_dominant_colors.cancel()
+        self.dominant_colors.save()
+        # Write whatever usage was counted since the last flush before shutting down
+        await self._flush_command_usage()
         await super().close()
         await self.session.close()
+        self.renderer.shutdown()
 
     def __format_command(
         self,
@@ -291,33 +333,21 @@ class BaseBot(commands.AutoShardedBot):
                 return
             return BytesIO(await res.read())
 
-    @cached  # cpu intensive and slow but the result does not change, so it is cached
     async def find_dominant_color(self, url: str) -> int:
-        """Finds the dominant color of an image and returns it as an rgb tuple"""
-        # Resizing parameters
-        width, height = 150, 150
+        """Finds the dominant color of an image and returns it as an integer"""
+        return await self.dominant_colors.get_or_compute(
+            url, partial(self._compute_dominant_color, url)
+        )
+
+    async def _compute_dominant_color(self, url: str) -> int | None:
         obj = await self._get_bytes(url)
         if not obj:
-            return 0x3E4A78
-        image = Image.open(obj)
-        # Handle if image is a GIF
-        if hasattr(image, "is_animated"):
-            # Set image variable to first frame of GIF
-            image = image.convert("RGB")
-        # Resize image
-        image = image.resize((width, height), resample=0)
-        # Get colors from image object
-        pixels = image.getcolors(width * height)
-        # Sort them by count number(first element of tuple)
-        sorted_pixels = sorted(pixels, key=lambda t: t[0])
-        # Get the most frequent color
-        dominant_color = sorted_pixels[-1][1]
-        # Return integer representation of color
-        return (
-            dominant_color[0] << 16 | dominant_color[1] << 8 | dominant_color[2]
-            if isinstance(dominant_color, tuple)
-            else 0x3E4A78
-        )
+            return None
+        try:
+            # cpu intensive and slow, so it runs in a render worker
+            return await self.renderer.run(dominant_color, obj.getvalue())
+        except RenderQueueFull:
+            return None
 
     async def find_user(
         self, ctx: commands.Context, user: str
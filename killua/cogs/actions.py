@@ -1,16 +1,27 @@
 import discord
 from discord.ext import commands
 import asyncio, os, random
+from functools import partial
 from pathlib import Path
 from logging import info, warning
 from typing import cast, TypedDict
 
 from killua.bot import BaseBot
+from killua.utils.asset_pool import AssetPool
 from killua.utils.checks import check
 from killua.utils.classes import User
 from killua.static.enums import Category, PrintColors
 from killua.utils.interactions import View
-from killua.static.constants import ACTIONS, KILLUA_BADGES, LIMITED_HUGS_ENDPOINT
+from killua.static.constants import (
+    ACTIONS,
+    KILLUA_BADGES,
+    LIMITED_HUGS_ENDPOINT,
+    ACTION_POOL_SIZE,
+    ACTION_POOL_LOW_WATER,
+    ACTION_POOL_BACKOFF,
+    ACTION_POOL_MAX_BACKOFF,
+    ACTION_COLOR_RENDERS,
+)
 
 # nekos.best requires APP_NAME (CONTACT_INFO); library defaults are blocked
 NEKOS_BEST_HEADERS = {"User-Agent": "Killua (https://killua.dev)"}
@@ -89,6 +100,12 @@ class Actions(commands.GroupCog, group_name="action"):
         self.client = client
         self.session = self.client.session
         self.limited_hugs = False
+        # Images of every endpoint fetched ahead of time
+        self.pools: dict[str, AssetPool[AnimeAsset | ArtistAsset]] = {}
+        # Finding the dominant colors of fetched images
+        self._coloring: set[asyncio.Task] = set()
+        # Shared by every endpoint so the render workers are left to commands
+        self._coloring_slots = asyncio.Semaphore(ACTION_COLOR_RENDERS)
 
     async def cog_load(self):
         # Get number of files in assets/hugs
@@ -124,40 +141,92 @@ class Actions(commands.GroupCog, group_name="action"):
             f"{PrintColors.OKGREEN}{number_of_hug_imgs} hugs loaded.{PrintColors.ENDC}"
         )
 
-    async def request_action(self, endpoint: str) -> AnimeAsset | ArtistAsset:
+    async def cog_unload(self):
+        for pool in self.pools.values():
+            pool.close()
+        for task in self._coloring:
+            task.cancel()
+
+    def _parse_asset(self, raw_asset: dict) -> AnimeAsset | ArtistAsset:
+        if "anime_name" in raw_asset:
+            return AnimeAsset(url=raw_asset["url"], anime_name=raw_asset["anime_name"])
+        else:
+            return ArtistAsset(
+                # No asset is currently returned in this format but the API has
+                # endpoints that return this format so it's here for future use
+                url=raw_asset["url"],
+                artist=Artist.from_api(raw_asset),
+                featured=False,
+            )
+
+    async def fetch_actions(
+        self, endpoint: str, amount: int = 1
+    ) -> list[AnimeAsset | ArtistAsset]:
         """
-        Fetch an image from the API for the action commands
+        Fetch `amount` images from the API for the action commands. Their dominant
+        colors are found in the background, so the embeds using them usually don't
+        have to wait for that and an image that can't be read doesn't lose the others
 
         Raises:
             APIException: If the API returns an error
         """
 
         r = await self.session.get(
-            f"https://nekos.best/api/v2/{endpoint}", headers=NEKOS_BEST_HEADERS
+            f"https://nekos.best/api/v2/{endpoint}",
+            params={"amount": amount},
+            headers=NEKOS_BEST_HEADERS,
         )
         if r.status == 200:
             res = await r.json()
 
             if "message" in res:
                 raise APIException(res["message"])
-
-            raw_asset = res["results"][0]
-            if "anime_name" in raw_asset:
-                return AnimeAsset(
-                    url=raw_asset["url"], anime_name=raw_asset["anime_name"]
-                )
-            else:
-                return ArtistAsset(
-                    # No asset is currently returned in this format but the API has
-                    # endpoints that return this format so it's here for future use
-                    url=raw_asset["url"],
-                    artist=Artist.from_api(raw_asset),
-                    featured=False,
-                )
+            if not res["results"]:
+                raise APIException(f"No images returned for {endpoint}")
+
+            assets = [self._parse_asset(raw_asset) for raw_asset in res["results"]]
+            task = asyncio.create_task(self._find_colors(assets))
+            self._coloring.add(task)
+            task.add_done_callback(self._coloring.discard)
+            return assets
         else:
             json = await r.json()
             raise APIException(json["message"] if "message" in json else await r.text())
 
+    async def _find_colors(self, assets: list[AnimeAsset | ArtistAsset]) -> None:
+        """
+        Caches the colors by url for find_dominant_color, which waits for the color
+        of an image that is used before it was found instead of finding it again.
+        Only a few are found at once, otherwise a batch would fill the render queue
+        and commands rendering something would be turned away
+        """
+        for asset in assets:
+            async with self._coloring_slots:
+                try:
+                    await self.client.find_dominant_color(asset["url"])
+                except Exception:
+                    # An image that can't be read falls back to the default color when used
+                    pass
+
+    async def request_action(self, endpoint: str) -> AnimeAsset | ArtistAsset:
+        """
+        Get an image for the action commands, from the images fetched ahead of time
+        for that endpoint if there are any left
+
+        Raises:
+            APIException: If the API returns an error
+        """
+        if endpoint not in self.pools:
+            self.pools[endpoint] = AssetPool(
+                endpoint,
+                partial(self.fetch_actions, endpoint),
+                size=ACTION_POOL_SIZE,
+                low_water=ACTION_POOL_LOW_WATER,
+                backoff=ACTION_POOL_BACKOFF,
+                max_backoff=ACTION_POOL_MAX_BACKOFF,
+            )
+        return await self.pools[endpoint].take()
+
     def add_credit(
         self, embed: discord.Embed, asset: ArtistAsset | AnimeAsset
     ) -> discord.Embed:
@@ -3,22 +3,23 @@ from discord.ext import commands
 
 from os import environ
 from random import choices
-from json import loads, dumps
 from asyncio import create_task
 from datetime import datetime, timedelta
-from zmq import ROUTER, Poller, POLLIN
+from zmq import ROUTER
 from zmq.asyncio import Context
 from io import BytesIO
 from PIL import Image, ImageDraw, ImageChops
-from typing import cast
+from typing import Any, cast
 import logging
-from logging import error
 from copy import deepcopy
 
 from killua.bot import BaseBot
 from killua.metrics import VOTES, COMMAND_USAGE
 from killua.static.enums import Booster
 from killua.utils.classes import User, Guild
+from killua.utils.ipc import IPCDispatcher
+from killua.utils.render import RenderQueueFull
+from killua.utils.leaderboard import leaderboards
 from killua.cogs.tags import Tag, Tags
 from killua.utils.topgg import (
     post_announcement,
@@ -41,6 +42,9 @@ from killua.static.constants import (
     LINK_ICONS,
     GUILD,
     UPDATE_AFTER,
+    IPC_MAX_CONCURRENT_REQUESTS,
+    IPC_DEFAULT_TIMEOUT,
+    IPC_ROUTE_TIMEOUTS,
 )
 
 class NewsMessage:
@@ -272,39 +276,26 @@ class IPCRoutes(commands.Cog):
             # to receive requests directly
             socket.bind(address)
 
-        poller = Poller()
-        poller.register(socket, POLLIN)
-
-        while True:
-            message = await socket.recv_multipart()  # Receive the actual message
-            message_data = message[-1].decode()
-            # Strip the first byte (first_bit) before parsing JSON
-            if message_data and message_data[0] == "\x00":
-                message_data = message_data[1:]
-            if message_data and message_data[0] == "\x01":
-                # Must be run in Docker for this, notify the server about this.
-                res = {"error": "For this endpoint to work, the bot must be run in Docker"}
-            else:
-                decoded = loads(message_data)
-                metadata = message[
-                    :-1
-                ]  # The first parts are metadata, the last part is the actual data
-                try:
-                    print(f"IPC Route called: {decoded['route']}")
-                    res = await getattr(self, decoded["route"].replace("/", "_"))(
-                        decoded["data"]
-                    )
-                except Exception as e:
-                    error(f"Error in IPC route {decoded['route']}: {e}")
-                    await socket.send_multipart(
-                        [*metadata, dumps({"error": str(e)}).encode()]
-                    )
-                    continue
+        dispatcher = IPCDispatcher(
+            socket,
+            self._call_route,
+            max_concurrency=IPC_MAX_CONCURRENT_REQUESTS,
+            default_timeout=IPC_DEFAULT_TIMEOUT,
+            route_timeouts=IPC_ROUTE_TIMEOUTS,
+            is_route=self._has_route,
+        )
+        await dispatcher.serve()
 
-                if res is None:
-                    await socket.send_multipart([*metadata, b'{"status":"ok"}'])
-                else:
-                    await socket.send_multipart([*metadata, dumps(res).encode()])
+    def _has_route(self, route: str) -> bool:
+        """Whether there is a method handling the given route"""
+        return isinstance(route, str) and callable(
+            getattr(self, route.replace("/", "_"), None)
+        )
+
+    async def _call_route(self, route: str, data: Any) -> Any:
+        """Calls the method handling the given route"""
+        print(f"IPC Route called: {route}")
+        return await getattr(self, route.replace("/", "_"))(data)
 
     async def download(self, url: str) -> Image.Image:
         """Downloads an image from the given url and returns it as a PIL Image"""
@@ -318,7 +309,8 @@ class IPCRoutes(commands.Cog):
 
         return image
 
-    def make_grey(self, img_colored: Image.Image) -> Image.Image:
+    @staticmethod
+    def make_grey(img_colored: Image.Image) -> Image.Image:
         """Converts the given image to grayscale. Respects if the image is transparent"""
         img_colored.load()
         alpha = img_colored.split()[-1]
@@ -326,12 +318,14 @@ class IPCRoutes(commands.Cog):
         img_grey.putalpha(alpha)
         return img_grey
 
-    async def get_background(self) -> ImageDraw.Image:
+    @staticmethod
+    def get_background() -> ImageDraw.Image:
         """Creates a transparent image to paste the user images on to"""
         background = Image.new("RGBA", (1100, 100), (0, 0, 0, 0))
         return background
 
-    def crop_to_circle(self, im: Image.Image) -> Image.Image:
+    @staticmethod
+    def crop_to_circle(im: Image.Image) -> Image.Image:
         """Crops the given image to a circle"""
         bigsize = (im.size[0] * 3, im.size[1] * 3)
         mask = Image.new("L", bigsize, 0)
@@ -341,21 +335,18 @@ class IPCRoutes(commands.Cog):
         im.putalpha(mask)
         return im.copy()
 
-    async def streak_image(
-        self, data: list[discord.User | str], reward: str = None
-    ) -> BytesIO:
-        """Creates an image of the streak path and returns it as a BytesIO"""
-        if len(data) != 11:
-            raise TypeError("Invalid Length")
-
+    @staticmethod
+    def _render_streak(
+        images: list[Image.Image | None],
+        user_index: int,
+        reward_image: Image.Image | None,
+    ) -> bytes:
+        """Draws the streak path from the downloaded images. Runs in a render worker"""
         offset = 0  # Start with a 0 offset
-        user_index = next(
-            (i for i, x in enumerate(data) if isinstance(x, discord.User)), None
-        )  # Find at what position the user image is
-        background = await self.get_background()
+        background = IPCRoutes.get_background()
         drawn = ImageDraw.Draw(background)
-        for position, item in enumerate(data):
-            if item == "-":
+        for position, image in enumerate(images):
+            if image is None:
                 # This code would be making the line before the user a straight line given that path is completed.
                 # However I did not like how this looked so I chose to keep it like the path after the user image.
                 # if position < user_index:
@@ -366,20 +357,15 @@ class IPCRoutes(commands.Cog):
                 )  # Draw normal path line
 
             else:
-                image = await self.download(
-                    (item.avatar.url if item.avatar else DEFAULT_AVATAR)
-                    if isinstance(item, discord.User)
-                    else item
-                )  # Download the image
                 size = (100, 100)
                 image = image.resize(size)
 
                 if position == user_index:
-                    image = self.crop_to_circle(
+                    image = IPCRoutes.crop_to_circle(
                         image
                     )  # If the image is the user avatar, make it a circle
                 elif position < user_index:
-                    image = self.make_grey(
+                    image = IPCRoutes.make_grey(
                         image
                     )  # Convert to grayscale if it was already "claimed"
 
@@ -388,20 +374,47 @@ class IPCRoutes(commands.Cog):
                 )  # Paste the image to the background
 
                 if (
-                    reward and position == user_index
+                    reward_image and position == user_index
                 ):  # If the user lands on a reward, paste the reward image to the bottom left of the user image
-                    reward_image = await self.download(reward)
                     reward_image = reward_image.resize((50, 50))
                     background.paste(reward_image, (offset - 5, 60), mask=reward_image)
 
             offset += 100  # Increase the offset by 100 for the next image
 
-        # Turn image into BytesIO
+        # Turn image into bytes
         buffer = BytesIO()
         background.save(buffer, format="PNG")
-        buffer.seek(0)
+        return buffer.getvalue()
 
-        return buffer
+    async def streak_image(
+        self, data: list[discord.User | str], reward: str = None
+    ) -> BytesIO:
+        """Creates an image of the streak path and returns it as a BytesIO"""
+        if len(data) != 11:
+            raise TypeError("Invalid Length")
+
+        user_index = next(
+            (i for i, x in enumerate(data) if isinstance(x, discord.User)), None
+        )  # Find at what position the user image is
+        images = [
+            (
+                None
+                if item == "-"
+                else await self.download(
+                    (item.avatar.url if item.avatar else DEFAULT_AVATAR)
+                    if isinstance(item, discord.User)
+                    else item
+                )
+            )  # Download the image
+            for item in data
+        ]
+        reward_image = await self.download(reward) if reward else None
+
+        return BytesIO(
+            await self.client.renderer.run(
+                IPCRoutes._render_streak, images, user_index, reward_image
+            )
+        )
 
     def _get_reward(self, streak: int, weekend: bool = False) -> int:
         """A pretty simple algorithm that adjusts the reward for voting"""
@@ -525,11 +538,14 @@ class IPCRoutes(commands.Cog):
             for item in path
         ]
 
-        image = await self.streak_image(
-            path,
-            reward_image + f"?token={token}&expiry={expiry}" if reward_image else None,
-        )
-        file = discord.File(image, filename="streak.png")
+        try:
+            image = await self.streak_image(
+                path,
+                reward_image + f"?token={token}&expiry={expiry}" if reward_image else None,
+            )
+        except RenderQueueFull:
+            # Rather send the reward without the image than not at all
+            image = None
 
         embed = discord.Embed.from_dict(
             {
@@ -553,7 +569,8 @@ class IPCRoutes(commands.Cog):
                 "color": 0x3E4A78,
             }
         )
-        embed.set_image(url="attachment://streak.png")
+        if image:
+            embed.set_image(url="attachment://streak.png")
 
         if isinstance(reward, Booster):
             await user.add_booster(reward.value)
@@ -563,25 +580,27 @@ class IPCRoutes(commands.Cog):
             await user.add_jenny(reward)
 
         try:
-            await usr.send(embed=embed, file=file)
+            if image:
+                await usr.send(
+                    embed=embed, file=discord.File(image, filename="streak.png")
+                )
+            else:
+                await usr.send(embed=embed)
         except discord.HTTPException:
             pass
 
     async def top(self, _) -> list[dict]:
         """Returns a list of the top 50 users by the amount of jenny they have"""
-        members = await DB.teams.find(
-            {"id": {"$in": [x.id for x in self.client.users]}}
-        )
-        top = sorted(members, key=lambda x: x["points"], reverse=True)[:50]
+        top = await leaderboards["jenny"].among([x.id for x in self.client.users], 50)
         res = []
-        for t in top:
-            u = self.client.get_user(t["id"])
+        for user_id, points in top:
+            u = self.client.get_user(user_id)
             res.append(
                 {
                     "name": u.display_name,
                     "tag": u.discriminator,
                     "avatar": str(u.avatar.url),
-                    "jenny": t["points"],
+                    "jenny": points,
                 }
             )
         return res
@@ -762,8 +781,8 @@ class IPCRoutes(commands.Cog):
             "daily_cooldown": user_data.daily_cooldown,
             "met_user": user_data.met_user,
             "effects": user_data.effects,
-            "rs_cards": user_data.rs_cards,
-            "fs_cards": user_data.fs_cards,
+            "rs_cards": user_data.rs_cards.to_list(),
+            "fs_cards": user_data.fs_cards.to_list(),
             "badges": user_data.badges,
             "rps_stats": user_data.rps_stats,
             "counting_highscore": user_data.counting_highscore,
@@ -9,10 +9,11 @@ from typing import Literal, Any, cast
 from killua.bot import BaseBot
 from killua.utils.checks import check
 from killua.utils.paginator import Paginator
-from killua.utils.classes import User, CardNotFound, CheckFailure, Book, NoMatches, Card
+from killua.utils.classes import User, CardNotFound, CheckFailure, Book, NoMatches, Card, LootBox
 from killua.static.enums import Category, SellOptions
 from killua.utils.interactions import ConfirmButton
 from killua.static.cards import IndividualCard
+from killua.utils.locks import LockTimeout
 from killua.static.constants import (
     ALLOWED_AMOUNT_MULTIPLE,
     FREE_SLOTS,
@@ -31,7 +32,6 @@ class Cards(commands.GroupCog, group_name="cards"):
 
     def __init__(self, client: BaseBot):
         self.client = client
-        self.cardname_cache: dict[int, tuple[str, str]] = {}
         self._init_menus()
 
     def _init_menus(self) -> None:
@@ -53,24 +53,15 @@ class Cards(commands.GroupCog, group_name="cards"):
     @commands.Cog.listener()
     async def on_cards_loaded(self) -> None:
         self.reward_cache = {
-            "item": Card.find(
-                lambda c: c["type"] == "normal" and c["rank"] in ["A", "B", "C"]
-            ),
-            "spell": Card.find(
-                lambda c: c["type"] == "spell" and c["rank"] in ["B", "C"]
-            ),
+            "item": Card.find(types=["normal"], ranks=["A", "B", "C"]),
+            "spell": Card.find(types=["spell"], ranks=["B", "C"]),
             "monster": {
-                "E": Card.find(
-                    lambda c: c["type"] == "monster" and c["rank"] in ["E", "G", "H"]
-                ),
-                "D": Card.find(
-                    lambda c: c["type"] == "monster" and c["rank"] in ["D", "E", "F"]
-                ),
-                "C": Card.find(
-                    lambda c: c["type"] == "monster" and c["rank"] in ["C", "D", "E"]
-                ),
+                "E": Card.find(types=["monster"], ranks=["E", "G", "H"]),
+                "D": Card.find(types=["monster"], ranks=["D", "E", "F"]),
+                "C": Card.find(types=["monster"], ranks=["C", "D", "E"]),
             },
         }
+        LootBox.samplers()  # So the first box opened does not have to build them
 
     async def all_cards_autocomplete(
         self,
@@ -78,38 +69,7 @@ class Cards(commands.GroupCog, group_name="cards"):
         current: str,
     ) -> list[discord.app_commands.Choice[str]]:
         """Autocomplete for all cards"""
-        if not self.cardname_cache:
-            for card in Card.raw:
-                self.cardname_cache[card["id"]] = card["name"], card["type"]
-
-        name_cards = [
-            (x[0], self.cardname_cache[x[0]][0])
-            for x in (await User.new(interaction.user.id)).all_cards
-            if not Card.is_book_completion_card(x[0])
-            and self.cardname_cache[x[0]][0].lower().startswith(current.lower())
-        ]
-        id_cards = [
-            (x[0], self.cardname_cache[x[0]][0])
-            for x in (await User.new(interaction.user.id)).all_cards
-            if not Card.is_book_completion_card(x[0]) and str(x[0]).startswith(current)
-        ]
-        name_cards = list(dict.fromkeys(name_cards))
-        id_cards = list(
-            dict.fromkeys(id_cards)
-        )  # removing all duplicates from the list
-
-        if current == "":  # No ids AND names if the user hasn't typed anything yet
-            return [
-                discord.app_commands.Choice(name=x[1], value=str(x[0]))
-                for x in name_cards
-            ][0:25]
-        return [
-            *[discord.app_commands.Choice(name=n, value=str(i)) for i, n in name_cards],
-            *[
-                discord.app_commands.Choice(name=str(i), value=str(i))
-                for i, _ in id_cards
-            ],
-        ][0:25]
+        return await Card.owned_choices(interaction.user.id, current)
 
     def _get_single_reward(self, score: int) -> tuple[int, int]:
         if score == 1:
@@ -419,49 +379,8 @@ class Cards(commands.GroupCog, group_name="cards"):
         current: str,
     ) -> list[discord.app_commands.Choice[str]]:
         """Autocomplete for the swap command"""
-
-        if not self.cardname_cache:
-            for card in Card.raw:
-                self.cardname_cache[card["id"]] = card["name"], card["type"]
-
         user = await User.new(interaction.user.id)
-        name_cards = [
-            (x[0], self.cardname_cache[x[0]][0])
-            for x in user.all_cards
-            if not Card.is_book_completion_card(x[0])
-            and self.cardname_cache[x[0]][0].lower().startswith(current.lower())
-        ]
-        id_cards = [
-            (x[0], self.cardname_cache[x[0]][0])
-            for x in user.all_cards
-            if not Card.is_book_completion_card(x[0]) and str(x[0]).startswith(current)
-        ]
-
-        name_duplicates = []
-        id_duplicates = []
-        for id, name in name_cards:
-            if user.can_swap(id) and (id, name) not in name_duplicates:
-                name_duplicates.append((id, name))
-
-        for id, name in id_cards:
-            if user.can_swap(id) and (id, name) not in id_duplicates:
-                id_duplicates.append((id, name))
-
-        if current == "":  # No ids AND names if the user hasn't typed anything yet
-            return [
-                discord.app_commands.Choice(name=x[1], value=str(x[0]))
-                for x in name_duplicates
-            ]
-        return [
-            *[
-                discord.app_commands.Choice(name=n, value=str(i))
-                for i, n in name_duplicates
-            ],
-            *[
-                discord.app_commands.Choice(name=str(i), value=str(i))
-                for i, _ in id_duplicates
-            ],
-        ]
+        return await Card.owned_choices(user.id, current, user.can_swap)
 
     @check(20)
     @commands.hybrid_command(
@@ -542,9 +461,10 @@ class Cards(commands.GroupCog, group_name="cards"):
                     "color": 0x3E4A78,
                 }
             )
-            await user.remove_effect("hunting")
-            await user.add_multi(*formatted_rewards)
-            await user.add_jenny(jenny_to_add)
+            async with User.batch():
+                await user.remove_effect("hunting")
+                await user.add_multi(*formatted_rewards)
+                await user.add_jenny(jenny_to_add)
             return await ctx.send(embed=embed)
 
         elif option == "end" and not has_effect:
@@ -852,58 +772,31 @@ class Cards(commands.GroupCog, group_name="cards"):
             )
         kwargs = {k: v for d in l for k, v in d.items()}
         try:
+            # Spells lock the users whose cards they check and change themselves
             await cast(
                 IndividualCard, card_class(name_or_id=str(card.id), ctx=ctx)
             ).exec(**kwargs)
             # It should be able to infer the type but for some reason it is not able to do so
         except CheckFailure as e:
             await ctx.send(e.message, allowed_mentions=discord.AllowedMentions.none())
+        except LockTimeout:
+            await ctx.send(
+                "Someone this spell affects is busy with another command, try again in a moment"
+            )
 
     async def use_cards_autocomplete(
         self,
         interaction: discord.Interaction,
         current: str,
     ) -> list[discord.app_commands.Choice[str]]:
-        if not self.cardname_cache:
-            for card in Card.raw:
-                self.cardname_cache[card["id"]] = card["name"], card["type"]
-
-        name_cards = [
-            (x[0], self.cardname_cache[x[0]][0])
-            for x in (await User.new(interaction.user.id)).all_cards
-            if not Card.is_book_completion_card(x[0])
-            and self.cardname_cache[x[0]][0].lower().startswith(current.lower())
-            and self.cardname_cache[x[0]][1] == "spell"
-        ]
-        id_cards = [
-            (x[0], self.cardname_cache[x[0]][0])
-            for x in (await User.new(interaction.user.id)).all_cards
-            if not Card.is_book_completion_card(x[0])
-            and str(x[0]).startswith(current)
-            and self.cardname_cache[x[0]][1] == "spell"
-        ]
-        name_cards = list(dict.fromkeys(name_cards))
-        id_cards = list(
-            dict.fromkeys(id_cards)
-        )  # removing all duplicates from the list
-
-        if current == "":  # No ids AND names if the user hasn't typed anything yet
-            res = [
-                discord.app_commands.Choice(name=x[1], value=str(x[0]))
-                for x in name_cards
-            ]
-        else:
-            res = [
-                *[
-                    discord.app_commands.Choice(name=n, value=str(i))
-                    for i, n in name_cards
-                ],
-                *[
-                    discord.app_commands.Choice(name=str(i), value=str(i))
-                    for i, _ in id_cards
-                ],
-            ]
+        catalog = Card.catalog()
+        res = await Card.owned_choices(
+            interaction.user.id,
+            current,
+            lambda card_id: catalog.by_id[card_id]["type"] == "spell",
+        )
         if "booklet".startswith(current):
+            res = res[:24]
             res.append(discord.app_commands.Choice(name="booklet", value="booklet"))
 
         return res
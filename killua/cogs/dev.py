@@ -9,7 +9,7 @@ from matplotlib import pyplot as plt
 import numpy as np
 
 from killua.bot import BaseBot
-from killua.utils.checks import check
+from killua.utils.checks import check, BlacklistCache, CommandUsageCache
 from killua.utils.paginator import Paginator
 from killua.utils.classes import User, Guild  # lgtm [py/unused-import]
 from killua.utils.interactions import View, Button, Modal
@@ -265,9 +265,7 @@ class Dev(commands.GroupCog, group_name="dev"):
 
     async def initial_top(self, ctx: commands.Context) -> None:  # pragma: no cover
         # Convert the ids to actually command names
-        usage_data: dict[str, int] = (await DB.const.find_one({"_id": "usage"}))[
-            "command_usage"
-        ]
+        usage_data = await CommandUsageCache.load()
         usage_data_formatted = {}
 
         cmds = self.client.get_raw_formatted_commands()
@@ -462,6 +460,7 @@ class Dev(commands.GroupCog, group_name="dev"):
                 }
             },
         )
+        BlacklistCache.add(discord_user.id)
         await ctx.send(f"Blacklisted user `{user}` for reason: {reason}", ephermal=True)
 
     @commands.is_owner()
@@ -490,6 +489,7 @@ class Dev(commands.GroupCog, group_name="dev"):
         await DB.const.update_one(
             {"_id": "blacklist"}, {"$pull": {"blacklist": to_pull[0]}}
         )
+        BlacklistCache.remove(user.id)
         await ctx.send(f"Successfully whitelisted `{user}`")
 
     @commands.is_owner()
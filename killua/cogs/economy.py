@@ -8,6 +8,7 @@ from killua.bot import BaseBot
 from killua.utils.checks import check
 from killua.utils.interactions import Select, View
 from killua.utils.classes import User, Guild, LootBox
+from killua.utils.leaderboard import leaderboards
 from killua.static.enums import Category
 from killua.static.constants import (
     USER_FLAGS,
@@ -159,22 +160,25 @@ class Economy(commands.GroupCog, group_name="econ"):
 
     async def _lb(self, ctx: commands.Context, limit: int = 10) -> dict:
         """Creates a list of the top members regarding jenny in a server"""
-        members = await DB.teams.find(
-            {"id": {"$in": [x.id for x in ctx.guild.members]}}
+        member_ids = [x.id for x in ctx.guild.members]
+        # The database adds up the points of the server instead of sending every member
+        total = await (
+            await DB.teams.aggregate(
+                [
+                    {"$match": {"id": {"$in": member_ids}}},
+                    {"$group": {"_id": None, "points": {"$sum": "$points"}}},
+                ]
+            )
         ).to_list(None)
-        top = sorted(
-            members, key=lambda x: x["points"], reverse=True
-        )  # Bringing it in a nice lederboard order
-        points = 0
-        for m in top:
-            points += m["points"]  # Working out total points in the server
+        points = total[0]["points"] if total else 0
+        top = await leaderboards["jenny"].among(member_ids, limit or len(member_ids))
 
         return {
             "points": points,
             "top": [
-                {"name": ctx.guild.get_member(x["id"]), "points": x["points"]}
-                for x in top
-            ][: (limit or len(top))],
+                {"name": ctx.guild.get_member(user_id), "points": score}
+                for user_id, score in top
+            ],
         }
 
     async def lootbox_autocomplete(
@@ -214,7 +218,11 @@ class Economy(commands.GroupCog, group_name="econ"):
                     {"name": "Combined Jenny", "value": top["points"]},
                     {
                         "name": "Richest Member",
-                        "value": f"{top['top'][0]['name']} with {top['top'][0]['points']} jenny",
+                        "value": (
+                            f"{top['top'][0]['name']} with {top['top'][0]['points']} jenny"
+                            if top["top"]
+                            else "Nobody here has any jenny yet"
+                        ),
                     },
                     {
                         "name": "Server created at",
@@ -246,6 +254,8 @@ class Economy(commands.GroupCog, group_name="econ"):
                 f"Nobody here has any jenny! Be the first to claim some with `{(await self.client.command_prefix(self.client, ctx.message))[2]}daily`!",
                 allowed_mentions=discord.AllowedMentions.none(),
             )
+        user = await User.new(ctx.author.id)
+        rank = await leaderboards["jenny"].rank(user.id, user.jenny)
         embed = discord.Embed.from_dict(
             {
                 "title": f"Top users on guild {ctx.guild.name}",
@@ -257,6 +267,7 @@ class Economy(commands.GroupCog, group_name="econ"):
                 ),
                 "color": 0x3E4A78,
                 "thumbnail": {"url": str(ctx.guild.icon.url)},
+                "footer": {"text": f"You are #{rank} of all users"},
             }
         )
         await self.client.send_message(ctx, embed=embed)
@@ -337,8 +348,9 @@ class Economy(commands.GroupCog, group_name="econ"):
         if user.is_entitled_to_double_jenny:
             daily *= 2
 
-        await user.claim_daily()
-        await user.add_jenny(daily)
+        async with User.batch():
+            await user.claim_daily()
+            await user.add_jenny(daily)
         await ctx.send(
             f"You claimed your {daily} daily Jenny and hold now on to {user.jenny}"
         )
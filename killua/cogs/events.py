@@ -9,7 +9,6 @@ from datetime import datetime
 from discord.ext import commands, tasks
 from PIL import Image
 from enum import Enum
-from typing import cast
 from matplotlib import pyplot as plt
 from pymongo.errors import ServerSelectionTimeoutError
 
@@ -19,6 +18,9 @@ from killua.utils.classes import Guild, Book, User, Card
 from killua.static.enums import PrintColors
 from killua.migrate import migrate_requiring_bot
 from killua.utils.topgg import post_metrics
+from killua.utils.render import RenderQueueFull
+from killua.utils.atlas import CardAtlas
+from killua.utils.reminders import reminder_wheel
 from killua.static.constants import (
     DBL_TOKEN,
     PatreonBanner,
@@ -72,7 +74,7 @@ class Events(commands.Cog):
                 await sleep(retry_timeout)
             else:
                 cards = await result.json()
-                Card.raw = cards
+                Card.load(cards)
                 logging.info(
                     PrintColors.OKGREEN
                     + "Successfully fetched and cached cards from "
@@ -104,36 +106,42 @@ class Events(commands.Cog):
         )
 
     async def _load_cards_cache(self) -> None:
-        """Downloads all the card images so the image manipulation is fairly fast"""
+        """Puts every new or changed card image into the card atlas so the book can be drawn without downloading them"""
 
         if len(Card.raw) == 0:
             return logging.error(
                 f"{PrintColors.WARNING}No cards cached, could not load image cache{PrintColors.ENDC}"
             )
 
+        outdated = Book.atlas.outdated(Card.raw)
+        if not outdated:
+            return logging.info(
+                f"{PrintColors.OKGREEN}Card atlas is up to date ({len(Book.atlas)} cards){PrintColors.ENDC}"
+            )
+
         token, expiry = self.client.sha256_for_api("all_cards", 180)
         logging.info(
             f"{PrintColors.OKGREEN}Created token to load cards cache{PrintColors.ENDC}"
         )
 
-        logging.info(f"{PrintColors.WARNING}Loading cards cache....{PrintColors.ENDC}")
+        logging.info(
+            f"{PrintColors.WARNING}Adding {len(outdated)} cards to the card atlas....{PrintColors.ENDC}"
+        )
         percentages = [25, 50, 75]
-        for p, item in enumerate(Card.raw):
+        for p, item in enumerate(outdated):
             try:
-                if item["id"] in Book.card_cache:
-                    continue  # in case the event fires multiple times this avoids using unnecessary cpu power
-
                 res = await self.client.session.get(
                     self.client.api_url(to_fetch=True)
                     + item["image"]
                     + f"?token={token}&expiry={expiry}"
                 )
                 image_bytes = await res.read()
-                image_card = Image.open(io.BytesIO(image_bytes)).convert("RGBA")
-                image_card = image_card.resize((84, 115), Image.LANCZOS)
+                thumbnails = await self.client.renderer.run(
+                    CardAtlas.create_thumbnails, image_bytes, Book.atlas.scalars
+                )
+                Book.atlas.set(item["id"], item["image"], thumbnails)
 
-                Book.card_cache[str(item["_id"])] = image_card
-                if len(percentages) >= 1 and (p / len(Card.raw)) * 100 > (
+                if len(percentages) >= 1 and (p / len(outdated)) * 100 > (
                     percent := percentages[0]
                 ):
                     logging.info(
@@ -142,9 +150,10 @@ class Events(commands.Cog):
                     percentages.remove(percent)
             except Exception as e:
                 logging.error(
-                    f"{PrintColors.FAIL}Failed to load card {item['_id']} with error: {e}{PrintColors.ENDC}"
+                    f"{PrintColors.FAIL}Failed to load card {item['id']} with error: {e}{PrintColors.ENDC}"
                 )
 
+        Book.atlas.save()
         logging.info(
             f"{PrintColors.OKGREEN}All cards successfully cached{PrintColors.ENDC}"
         )
@@ -236,72 +245,59 @@ class Events(commands.Cog):
     # async def before_status(self):
     #     await self.client.wait_until_ready()
 
-    def _date_helper(self, hour: int) -> int:
-        if hour > 11:
-            return hour - 12
-        return hour
+    async def _send_vote_reminder(
+        self, user_id: int, site: str, last_vote: datetime
+    ) -> None:
+        try:
+            user = self.client.get_user(user_id) or await self.client.fetch_user(
+                user_id
+            )
+        except discord.HTTPException:
+            return
+        embed = discord.Embed.from_dict(
+            {
+                "title": "Vote Reminder",
+                "description": f"Hey {user.display_name}, you voted the last time <t:{int(last_vote.timestamp())}:R> for Killua on __{site}__. Please consider voting for Killua so you can get your daily rewards and help the bot grow and keep your voting streak 🔥 going! You can toggle these reminders with `/dev voteremind`",
+                "color": 0x3E4A78,
+            }
+        )
+        view = discord.ui.View()
+        if site == "topgg":
+            view.add_item(
+                discord.ui.Button(
+                    label="Vote on top.gg",
+                    url=f"https://top.gg/bot/{self.client.user.id}/vote",
+                    style=discord.ButtonStyle.link,
+                )
+            )
+        elif site == "discordbotlist":
+            view.add_item(
+                discord.ui.Button(
+                    label="Vote on discordbotlist",
+                    url=f"https://discordbotlist.com/bots/killua/upvote",
+                    style=discord.ButtonStyle.link,
+                )
+            )
+
+        try:
+            await user.send(embed=embed, view=view)
+        except discord.Forbidden:
+            pass
 
     @tasks.loop(minutes=1)
     async def vote_reminders(self):  # pragma: no cover
         try:
-            enabled = DB.teams.find({"voting_reminder": True})
-            async for user in enabled:
-                user = await User.new(user["id"])
-                for site, data in user.voting_streak.items():
-                    if not data["last_vote"]:
-                        continue
-                    if (
-                        self._date_helper(data["last_vote"].hour)
-                        == self._date_helper(datetime.now().hour)
-                        and cast(datetime, data["last_vote"]).minute
-                        == datetime.now().minute
-                        and not (
-                            int(int(datetime.now().timestamp()) / 60)
-                            == int(
-                                int(cast(datetime, data["last_vote"]).timestamp()) / 60
-                            )
-                        )
-                    ):  # If they are the same amounts of minutes away from the unix epoch
-
-                        user = self.client.get_user(
-                            user.id
-                        ) or await self.client.fetch_user(user.id)
-                        if not user:
-                            continue
-                        embed = discord.Embed.from_dict(
-                            {
-                                "title": "Vote Reminder",
-                                "description": f"Hey {user.display_name}, you voted the last time <t:{int(data['last_vote'].timestamp())}:R> for Killua on __{site}__. Please consider voting for Killua so you can get your daily rewards and help the bot grow and keep your voting streak 🔥 going! You can toggle these reminders with `/dev voteremind`",
-                                "color": 0x3E4A78,
-                            }
-                        )
-                        view = discord.ui.View()
-                        if site == "topgg":
-                            view.add_item(
-                                discord.ui.Button(
-                                    label="Vote on top.gg",
-                                    url=f"https://top.gg/bot/{self.client.user.id}/vote",
-                                    style=discord.ButtonStyle.link,
-                                )
-                            )
-                        elif site == "discordbotlist":
-                            view.add_item(
-                                discord.ui.Button(
-                                    label="Vote on discordbotlist",
-                                    url=f"https://discordbotlist.com/bots/killua/upvote",
-                                    style=discord.ButtonStyle.link,
-                                )
-                            )
-
-                        try:
-                            await user.send(embed=embed, view=view)
-                        except discord.Forbidden:
-                            continue
+            if not reminder_wheel.built:
+                await reminder_wheel.build()
         except ServerSelectionTimeoutError:
             return logging.warning(
                 f"{PrintColors.WARNING}Could not send vote reminders because the database is not available{PrintColors.ENDC}"
             )
 
+        # Only the reminders due this minute are looked at
+        for user_id, site, last_vote in reminder_wheel.due(datetime.now()):
+            await self._send_vote_reminder(user_id, site, last_vote)
+
     @tasks.loop(hours=24)
     async def save_guilds(self):  # pragma: no cover
         from killua.static.constants import daily_users
@@ -320,6 +316,7 @@ class Events(commands.Cog):
 
         # If it has been more than 24 hours since the last save
         if self.skipped_first:
+            active_users = daily_users.rollover()
             approx_users = await self.client.get_approximate_user_count()
             approximate_user_install_count = (
                 await self.client.application_info()
@@ -330,7 +327,7 @@ class Events(commands.Cog):
                     len(self.client.guilds),
                     len(self.client.users),
                     await DB.teams.count_documents({}),
-                    len(daily_users.users),
+                    active_users,
                     approx_users,
                     approximate_user_install_count,
                     PrintColors.ENDC,
@@ -345,7 +342,7 @@ class Events(commands.Cog):
                             "guilds": len(self.client.guilds),
                             "users": len(self.client.users),
                             "registered_users": await DB.teams.count_documents({}),
-                            "daily_users": len(daily_users.users),
+                            "daily_users": active_users,
                             "approximate_users": approx_users,
                             "user_installs": approximate_user_install_count,
                         }
@@ -353,8 +350,7 @@ class Events(commands.Cog):
                 },
             )
             if self.client.run_in_docker:
-                DAILY_ACTIVE_USERS.set(len(daily_users.users))
-            daily_users.users = []  # Resetting the daily users list
+                DAILY_ACTIVE_USERS.set(active_users)
         else:  # We want to avoid saving data each time the bot restarts, start 24h after one
             self.skipped_first = True
 
@@ -1074,6 +1070,15 @@ class Events(commands.Cog):
         if isinstance(error, commands.NoPrivateMessage):
             return await ctx.send("This command can only be used inside of a guild")
 
+        original = error
+        while hasattr(original, "original"):  # Unwrap CommandInvokeError and HybridCommandError
+            original = original.original
+        if isinstance(original, RenderQueueFull):
+            return await ctx.send(
+                "I am drawing a lot of images right now, please try again in a few seconds!",
+                ephemeral=True,
+            )
+
         if isinstance(error, commands.CommandNotFound) or isinstance(
             error, commands.CheckFailure
         ):  # I don't care if this happens
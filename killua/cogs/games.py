@@ -5,7 +5,6 @@ import re
 import random
 import asyncio
 import math
-from copy import deepcopy
 from aiohttp import ClientSession
 from urllib.parse import unquote
 from typing import Literal, Callable, cast
@@ -16,9 +15,10 @@ from killua.utils.classes import CardLimitReached, User
 from killua.utils.interactions import ConfirmButton
 from killua.static.cards import Card
 from killua.static.enums import Category, GameOptions
-from killua.static.constants import ALLOWED_AMOUNT_MULTIPLE, DB, TRIVIA_TOPICS
+from killua.static.constants import ALLOWED_AMOUNT_MULTIPLE, TRIVIA_TOPICS
 from killua.utils.checks import blcheck, check
 from killua.utils.interactions import Select
+from killua.utils.leaderboard import leaderboards
 
 DISCORD_LIMITATION = (
     "\nTo play again, you must re-use the command. This is a Discord limitation :c"
@@ -1264,168 +1264,71 @@ class Games(commands.GroupCog, group_name="games"):
             )
         )
 
-        all: list[dict] = await DB.teams.find(
-            {}
-            if where == "global"
-            else {"id": {"$in": [m.id for m in ctx.guild.members]}}
-        ).to_list(None)
-
-        if game == GameOptions.rps:
-            top_5_pve: list[dict] = deepcopy(
-                all
-            )  # Not get this resorted in the code below
-            top_5_pve.sort(
-                key=lambda x: dict(x)
-                .get("stats", {})
-                .get("rps", {})
-                .get("pve", {})
-                .get("won", 0),
-                reverse=True,
+        async def top_5(board: str) -> list[tuple[int, int]]:
+            if where == "global":
+                return await leaderboards[board].top(5)
+            return await leaderboards[board].among(
+                [m.id for m in ctx.guild.members], 5
             )
 
-            top_5_pvp: list[dict] = all
-            top_5_pvp.sort(
-                key=lambda x: dict(x)
-                .get("stats", {})
-                .get("rps", {})
-                .get("pvp", {})
-                .get("won", 0),
-                reverse=True,
-            )
+        if game == GameOptions.rps:
+            top_5_pve = await top_5("rps_pve")
+            top_5_pvp = await top_5("rps_pvp")
 
             embed = discord.Embed(
                 title="Global RPS leaderboard", description="**PVE**", color=0x3E4A78
             )
-            for pos, player in enumerate(top_5_pve[:5]):
-                # user = self.client.get_user(player["_id"])
-                # if user:
-                wins = (
-                    player.get("stats", {}).get("rps", {}).get("pve", {}).get("won", 0)
-                )
-                embed.description += f"\n**{pos+1}.** <@{player['id']}> - {wins} win{'s' if wins != 1 else ''}"
+            for pos, (player, wins) in enumerate(top_5_pve):
+                embed.description += f"\n**{pos+1}.** <@{player}> - {wins} win{'s' if wins != 1 else ''}"
 
             embed.description += "\n\n**PVP**"
 
-            for pos, player in enumerate(top_5_pvp[:5]):
-                # user = self.client.get_user(player["_id"])
-                # if user:
-                wins = (
-                    player.get("stats", {}).get("rps", {}).get("pvp", {}).get("won", 0)
-                )
-                embed.description += f"\n**{pos+1}.** <@{player['id']}> - {wins} win{'s' if wins != 1 else ''}"
+            for pos, (player, wins) in enumerate(top_5_pvp):
+                embed.description += f"\n**{pos+1}.** <@{player}> - {wins} win{'s' if wins != 1 else ''}"
 
             await initial_response.edit(embed=embed)
 
         elif game == GameOptions.trivia:
-            top_5_hard = deepcopy(all)  # Not get this resorted in the code below
-            top_5_hard.sort(
-                key=lambda x: dict(x)
-                .get("stats", {})
-                .get("trivia", {})
-                .get("hard", {})
-                .get("right", 0),
-                reverse=True,
-            )
-
-            top_5_medium = deepcopy(all)  # Not get this resorted in the code below
-            top_5_medium.sort(
-                key=lambda x: dict(x)
-                .get("stats", {})
-                .get("trivia", {})
-                .get("medium", {})
-                .get("right", 0),
-                reverse=True,
-            )
-
-            top_5_easy = all
-            top_5_easy.sort(
-                key=lambda x: dict(x)
-                .get("stats", {})
-                .get("trivia", {})
-                .get("easy", {})
-                .get("right", 0),
-                reverse=True,
-            )
+            top_5_hard = await top_5("trivia_hard")
+            top_5_medium = await top_5("trivia_medium")
+            top_5_easy = await top_5("trivia_easy")
 
             embed = discord.Embed(
                 title="Global Trivia leaderboard",
                 description="**Hard**",
                 color=0x3E4A78,
             )
-            for pos, player in enumerate(top_5_hard[:5]):
-                # user = self.client.get_user(player["_id"])
-                # if user:
-                right_answers = (
-                    player.get("stats", {})
-                    .get("trivia", {})
-                    .get("hard", {})
-                    .get("right", 0)
-                )
-                embed.description += f"\n**{pos+1}.** <@{player['id']}> - {right_answers} right answer{'s' if right_answers != 1 else ''}"
+            for pos, (player, right_answers) in enumerate(top_5_hard):
+                embed.description += f"\n**{pos+1}.** <@{player}> - {right_answers} right answer{'s' if right_answers != 1 else ''}"
 
             embed.description += "\n\n**Medium**"
 
-            for pos, player in enumerate(top_5_medium[:5]):
-                # user = self.client.get_user(player["_id"])
-                # if user:
-                right_answers = (
-                    player.get("stats", {})
-                    .get("trivia", {})
-                    .get("medium", {})
-                    .get("right", 0)
-                )
-                embed.description += f"\n**{pos+1}.** <@{player['id']}> - {right_answers} right answer{'s' if right_answers != 1 else ''}"
+            for pos, (player, right_answers) in enumerate(top_5_medium):
+                embed.description += f"\n**{pos+1}.** <@{player}> - {right_answers} right answer{'s' if right_answers != 1 else ''}"
 
             embed.description += "\n\n**Easy**"
 
-            for pos, player in enumerate(top_5_easy[:5]):
-                # user = self.client.get_user(player["_id"])
-                # if user:
-                right_answers = (
-                    player.get("stats", {})
-                    .get("trivia", {})
-                    .get("easy", {})
-                    .get("right", 0)
-                )
-                embed.description += f"\n**{pos+1}.** <@{player['id']}> - {right_answers} right answer{'s' if right_answers != 1 else ''}"
+            for pos, (player, right_answers) in enumerate(top_5_easy):
+                embed.description += f"\n**{pos+1}.** <@{player}> - {right_answers} right answer{'s' if right_answers != 1 else ''}"
 
             await initial_response.edit(embed=embed)
 
         elif game == GameOptions.counting:
-            top_5_hard = deepcopy(all)  # Not get this resorted in the code below
-            top_5_hard.sort(
-                key=lambda x: dict(x)
-                .get("stats", {})
-                .get("counting_highscore", {})
-                .get("hard", 0),
-                reverse=True,
-            )
-
-            top_5_easy = all
-            top_5_easy.sort(
-                key=lambda x: dict(x)
-                .get("stats", {})
-                .get("counting_highscore", {})
-                .get("easy", 0),
-                reverse=True,
-            )
+            top_5_hard = await top_5("counting_hard")
+            top_5_easy = await top_5("counting_easy")
 
             embed = discord.Embed(
                 title="Global Counting leaderboard",
                 description="**Hard**",
                 color=0x3E4A78,
             )
-            for pos, player in enumerate(top_5_hard[:5]):
-                # user = self.client.get_user(player["_id"])
-                # if user:
-                embed.description += f"\n**{pos+1}.** <@{player['id']}> - {player.get('stats', {}).get('counting_highscore', {}).get('hard', 0)} high score"
+            for pos, (player, score) in enumerate(top_5_hard):
+                embed.description += f"\n**{pos+1}.** <@{player}> - {score} high score"
 
             embed.description += "\n\n**Easy**"
 
-            for pos, player in enumerate(top_5_easy[:5]):
-                # user = self.client.get_user(player["_id"])
-                # if user:
-                embed.description += f"\n**{pos+1}.** <@{player['id']}> - {player.get('stats', {}).get('counting_highscore', {}).get('easy', 0)} high score"
+            for pos, (player, score) in enumerate(top_5_easy):
+                embed.description += f"\n**{pos+1}.** <@{player}> - {score} high score"
 
             await initial_response.edit(embed=embed)
 
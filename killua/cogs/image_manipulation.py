@@ -32,7 +32,8 @@ class ImageManipulation(commands.GroupCog, group_name="image"):
         _bytes = await res.read()
         return io.BytesIO(_bytes)
 
-    def _crop_to_circle(self, im: Image.Image) -> Image.Image:
+    @staticmethod
+    def _crop_to_circle(im: Image.Image) -> Image.Image:
         """Crops the given image to a circle"""
         bigsize = (im.size[0] * 3, im.size[1] * 3)
         mask = Image.new("L", bigsize, 0)
@@ -43,16 +44,18 @@ class ImageManipulation(commands.GroupCog, group_name="image"):
 
         return im.copy()
 
-    def _create_frames(self, image: Image.Image) -> list[Image.Image]:
+    @staticmethod
+    def _create_frames(image: Image.Image) -> list[Image.Image]:
         """Creates the frames for the spin, slightly rotating each frame"""
         res = []
         for i in range(17):
             res.append(image.rotate(i * 20 - 1))
         return res
 
-    async def _create_spin_gif(self, url: str) -> io.BytesIO:
-        """Takes in a url and returns io bytes of a spinning GIF"""
-        image = Image.open(await self._get_image_bytes(url)).convert("RGB")
+    @staticmethod
+    def _render_spin_gif(image_bytes: bytes) -> bytes:
+        """Turns an image into a spinning GIF. Runs in a render worker"""
+        image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
         # Crops the image to a square in the middle with the smallest side being the size of the largest side
         image = image.crop(
             (
@@ -62,19 +65,28 @@ class ImageManipulation(commands.GroupCog, group_name="image"):
                 image.height / 2 + min(image.width, image.height) / 2,
             )
         )
-        new_image = self._crop_to_circle(image)
+        new_image = ImageManipulation._crop_to_circle(image)
         image.close()
-        frames = self._create_frames(new_image)
+        frames = ImageManipulation._create_frames(new_image)
         new_image.close()
         buffer = io.BytesIO()
         save_transparent_gif(
             frames, durations=1, save_file=buffer
         )  # making sure the gif is transparent. This is necessarry because of a pillow bug and slows this down quite significantly
-        buffer.seek(0)
-        return buffer
+        return buffer.getvalue()
+
+    async def _create_spin_gif(self, url: str) -> io.BytesIO:
+        """Takes in a url and returns io bytes of a spinning GIF"""
+        image_bytes = (await self._get_image_bytes(url)).getvalue()
+        return io.BytesIO(
+            await self.client.renderer.run(
+                ImageManipulation._render_spin_gif, image_bytes
+            )
+        )
 
+    @staticmethod
     def _put_horizontally(
-        self, im1: Image.Image, im2: Image.Image, reduce_by: int = 5
+        im1: Image.Image, im2: Image.Image, reduce_by: int = 5
     ) -> Image.Image:
         """Puts im2 below im2 with regards to each others sizes"""
         heigth_avatar = int(im2.width * (im1.height / im1.width))
@@ -88,18 +100,29 @@ class ImageManipulation(commands.GroupCog, group_name="image"):
         dst.paste(im2, (0, heigth_avatar))
         return dst
 
+    @staticmethod
+    def _render_wtf_meme(image_bytes: bytes, meme_bytes: bytes) -> bytes:
+        """Puts the meme below the image. Runs in a render worker"""
+        image = Image.open(io.BytesIO(meme_bytes)).convert("RGBA")
+        url_image = Image.open(io.BytesIO(image_bytes)).convert("RGBA")
+
+        buffer = io.BytesIO()
+        ImageManipulation._put_horizontally(url_image, image).save(buffer, "PNG")
+        return buffer.getvalue()
+
     async def create_wtf_meme(self, url: str) -> io.BytesIO:
         """Puts a "excuse me what the frick" below the image provided"""
         if not self.wtf_meme:
             self.wtf_meme = await self._get_image_bytes(self.wtf_meme_url)
 
-        image = Image.open(self.wtf_meme).copy().convert("RGBA")
-        url_image = Image.open(await self._get_image_bytes(url)).convert("RGBA")
-
-        buffer = io.BytesIO()
-        self._put_horizontally(url_image, image).save(buffer, "PNG")
-        buffer.seek(0)
-        return buffer
+        image_bytes = (await self._get_image_bytes(url)).getvalue()
+        return io.BytesIO(
+            await self.client.renderer.run(
+                ImageManipulation._render_wtf_meme,
+                image_bytes,
+                self.wtf_meme.getvalue(),
+            )
+        )
 
     async def _validate_input(
         self, ctx: commands.Context, target: str | None
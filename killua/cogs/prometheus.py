@@ -2,14 +2,16 @@ from discord.ext import commands, tasks
 from discord import Interaction, InteractionType
 
 import logging
+from time import monotonic
 from pymongo.errors import ServerSelectionTimeoutError
 from prometheus_client import start_http_server
 from typing import cast
 from psutil import virtual_memory, cpu_percent
 
 from killua.metrics import *
-from killua.static.constants import DB, API_ROUTES
+from killua.static.constants import DB, API_ROUTES, PROMETHEUS_REFRESH_INTERVALS
 from killua.utils.classes import User
+from killua.utils.checks import CommandUsageCache
 from killua.bot import BaseBot as Bot
 
 log = logging.getLogger("prometheus")
@@ -32,6 +34,8 @@ class PrometheusCog(commands.Cog):
         self.initial = False
         self.api_previous: dict[str, dict[str, int]] = {}
         self.spam_previous: int = 0
+        # metric group -> when it was last refreshed
+        self.refreshed_at: dict[str, float] = {}
 
         if self.client.run_in_docker:
             if not self.latency_loop.is_running():
@@ -86,52 +90,118 @@ class PrometheusCog(commands.Cog):
         API_SPAM_REQUESTS.inc(new_spam)
 
     async def save_locales(self):
-        locales = [
-            doc["locale"]
-            async for doc in DB.teams.find({"locale": {"$exists": True}})
-            if "locale" in doc and doc["locale"]
-        ]
-        # turn into dict with locale as key and count as value
-        locale_count = {locale: locales.count(locale) for locale in locales}
-        for locale, count in locale_count.items():
-            LOCALE.labels(
-                cast(str, locale).split("-")[-1].upper()
-                if "-" in locale
-                else cast(str, locale).upper()
-            ).set(count)
+        # Counted by the database so only one small document per locale is sent back
+        cursor = await DB.teams.aggregate(
+            [
+                {"$match": {"locale": {"$exists": True}}},
+                {"$group": {"_id": "$locale", "count": {"$sum": 1}}},
+            ]
+        )
+        locale_count: dict[str, int] = {}
+        for doc in await cursor.to_list(length=None):
+            if not doc["_id"]:
+                continue
+            label = self._locale_label(doc["_id"])
+            locale_count[label] = locale_count.get(label, 0) + doc["count"]
+        for label, count in locale_count.items():
+            LOCALE.labels(label).set(count)
 
-    async def init_gauges(self):
-        log.debug("Initializing gauges")
-        num_of_commands = len(self.get_all_commands())
-        COMMANDS_GAUGE.set(num_of_commands)
-
-        # The main point of this is to initialise the Counter
-        # with the correct labels, so that the labels are present
-        # in the metrics even if no one has voted there yet.
-        VOTES.labels("topgg")
-        VOTES.labels("discordbotlist")
+    @staticmethod
+    def _locale_label(locale: str) -> str:
+        return locale.split("-")[-1].upper() if "-" in locale else locale.upper()
 
+    async def save_user_stats(self):
         registered_users = await DB.teams.count_documents({})
         REGISTERED_USER_GAUGE.set(registered_users)
 
-        dau = (await DB.const.find_one({"_id": "growth"}))["growth"][-1]["daily_users"]
-        DAILY_ACTIVE_USERS.set(dau)
-
         APPROXIMATE_USER_COUNT.set(await self.client.get_approximate_user_count())
+        # This is not a db stat but to my knowledge no event exists for it so we have to do it here
         USER_INSTALLS.set(
             (await self.client.application_info()).approximate_user_install_count
         )
 
+    async def save_todo_stats(self):
+        cursor = await DB.todo.aggregate(
+            [
+                {
+                    "$group": {
+                        "_id": None,
+                        "lists": {"$sum": 1},
+                        "todos": {"$sum": {"$size": {"$ifNull": ["$todos", []]}}},
+                    }
+                }
+            ]
+        )
+        result = await cursor.to_list(length=1)
+        TODO_LISTS.set(result[0]["lists"] if result else 0)
+        TODOS.set(result[0]["todos"] if result else 0)
+
+    async def save_tag_stats(self):
+        cursor = await DB.guilds.aggregate(
+            [
+                {"$match": {"tags": {"$exists": True}}},
+                {"$group": {"_id": None, "tags": {"$sum": {"$size": "$tags"}}}},
+            ]
+        )
+        result = await cursor.to_list(length=1)
+        TAGS.set(result[0]["tags"] if result else 0)
+
+    async def save_card_stats(self):
         CARDS.set(await User.total_cards_in_circulation())
         _, num = await User.get_top_collector()
         BIGGEST_COLLECTION.set(num)
 
-        await self.save_locales()
+    async def refresh_db_metrics(self, force: bool = False) -> None:
+        """
+        Refreshes every group of metrics whose interval in PROMETHEUS_REFRESH_INTERVALS
+        has passed, or all of them if `force` is set. A group that fails is tried
+        again on the next tick without holding up the others.
+        """
+        groups = {
+            "users": self.save_user_stats,
+            "todos": self.save_todo_stats,
+            "tags": self.save_tag_stats,
+            "cards": self.save_card_stats,
+            "locales": self.save_locales,
+            "api": self.update_api_stats,
+        }
+        for group, refresh in groups.items():
+            last = self.refreshed_at.get(group)
+            if (
+                not force
+                and last is not None
+                and monotonic() - last < PROMETHEUS_REFRESH_INTERVALS[group]
+            ):
+                continue
+            try:
+                await refresh()
+                self.refreshed_at[group] = monotonic()
+            except ServerSelectionTimeoutError:
+                return logging.warning(
+                    "Failed to save mongodb stats to DB due to connection error"
+                )  # Skip this iteration
+            except Exception as e:  # The loop should not be stopped due to an error
+                logging.critical(
+                    f"Failed to save {group} stats due to an unexpected error: {e}"
+                )
+
+    async def init_gauges(self):
+        log.debug("Initializing gauges")
+        num_of_commands = len(self.get_all_commands())
+        COMMANDS_GAUGE.set(num_of_commands)
 
-        # Update command stats
-        usage_data: dict[str, int] = (await DB.const.find_one({"_id": "usage"}))[
-            "command_usage"
-        ]
+        # The main point of this is to initialise the Counter
+        # with the correct labels, so that the labels are present
+        # in the metrics even if no one has voted there yet.
+        VOTES.labels("topgg")
+        VOTES.labels("discordbotlist")
+
+        dau = (await DB.const.find_one({"_id": "growth"}))["growth"][-1]["daily_users"]
+        DAILY_ACTIVE_USERS.set(dau)
+
+        # Update command stats from the in memory counts so usage that has
+        # not been written to the database yet is included
+        usage_data = await CommandUsageCache.load()
         cmds = self.client.get_raw_formatted_commands()
         for cmd in cmds:
             if (
@@ -144,7 +214,7 @@ class PrometheusCog(commands.Cog):
                 self.client._get_group(cmd), cmd.name, cmd.extras["id"], None
             ).set(usage_data[str(cmd.extras["id"])])
 
-        await self.update_api_stats()
+        await self.refresh_db_metrics(force=True)
 
     def get_all_commands(self) -> list[commands.Command]:
         return self.client.get_raw_formatted_commands()
@@ -159,42 +229,9 @@ class PrometheusCog(commands.Cog):
         for shard, latency in self.client.latencies:
             LATENCY_GAUGE.labels(shard).set(latency)
 
-    @tasks.loop(minutes=10)
+    @tasks.loop(seconds=min(PROMETHEUS_REFRESH_INTERVALS.values()))
     async def db_loop(self):
-        try:
-            registered_users = await DB.teams.count_documents({})
-            REGISTERED_USER_GAUGE.set(registered_users)
-
-            APPROXIMATE_USER_COUNT.set(await self.client.get_approximate_user_count())
-            # This is not a db stat but to my knowledge no event exists for it so we have to do it here
-            USER_INSTALLS.set(
-                (await self.client.application_info()).approximate_user_install_count
-            )
-
-            todo_list_amount = await DB.todo.count_documents({})
-            TODO_LISTS.set(todo_list_amount)
-            todos = sum([len(todo["todos"]) async for todo in DB.todo.find({})])
-            TODOS.set(todos)
-            tags = await DB.guilds.find({"tags": {"$exists": True}}).to_list(
-                length=None
-            )
-            tag_amount = sum([len(v["tags"]) for v in tags])
-            TAGS.set(tag_amount)        
-            CARDS.set(await User.total_cards_in_circulation())
-            _, num = await User.get_top_collector()
-            BIGGEST_COLLECTION.set(num)
-            
-            await self.save_locales()
-            await self.update_api_stats()
-        except ServerSelectionTimeoutError:
-            logging.warning(
-                "Failed to save mongodb stats to DB due to connection error"
-            )
-            # Skip this iteration
-        except Exception as e:  # The loop should not be stopped due to an error
-            logging.critical(
-                f"Failed to save mongodb stats to DB due to an unexpected error: {e}"
-            )
+        await self.refresh_db_metrics()
 
     @tasks.loop(seconds=5)
     async def system_usage_loop(self):
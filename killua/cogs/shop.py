@@ -17,6 +17,7 @@ from killua.static.constants import (
     PRICES,
     LOOTBOXES,
     PRICE_INCREASE_FOR_SPELL,
+    USER_LOCK_TIMEOUT,
     DB,
     editing,
 )
@@ -24,6 +25,7 @@ from killua.static.constants import (
 from killua.utils.checks import check
 from killua.utils.paginator import DefaultEmbed, Paginator
 from killua.utils.interactions import Button, ConfirmButton, Select, View
+from killua.utils.locks import LockTimeout
 from killua.utils.classes import User, TodoList, CardNotFound, CardLimitReached
 
 
@@ -54,7 +56,6 @@ class Shop(commands.Cog):
 
     def __init__(self, client: BaseBot):
         self.client = client
-        self.cardname_cache: dict[int, tuple[str, str]] = {}
         self.last_update = None
 
     async def _format_offers(
@@ -116,40 +117,26 @@ class Shop(commands.Cog):
             number_of_items = randint(3, 5)  # How many items the shop has
             if randint(1, 100) > 95:
                 # Add a S/A card to the shop
-                cards = Card.find(
-                    lambda c: c["type"] == "normal"
-                    and c["rank"] in ["A", "S"]
-                    and c["available"]
-                )
+                cards = Card.find(types=["normal"], ranks=["A", "S"], available=True)
                 shop_items.append(choice(cards).id)
             if randint(1, 100) > 20:  # 80% chance for spell
                 if randint(1, 100) > 95:  # 5% chance for a good spell (they are rare)
-                    spells = Card.find(
-                        lambda c: c["type"] == "spell"
-                        and c["rank"] in ["A"]
-                        and c["available"]
-                    )
+                    spells = Card.find(types=["spell"], ranks=["A"], available=True)
                     shop_items.append(choice(spells).id)
                 elif randint(1, 10) > 5:  # 50% chance of getting a medium good card
                     spells = Card.find(
-                        lambda c: c["type"] == "spell"
-                        and c["rank"] in ["B", "C"]
-                        and c["available"]
+                        types=["spell"], ranks=["B", "C"], available=True
                     )
                     shop_items.append(choice(spells).id)
                 else:  # otherwise getting a fairly normal card
                     spells = Card.find(
-                        lambda c: c["type"] == "spell"
-                        and c["rank"] in ["D", "E", "F", "G"]
-                        and c["available"]
+                        types=["spell"], ranks=["D", "E", "F", "G"], available=True
                     )
                     shop_items.append(choice(spells).id)
 
                 while len(shop_items) != number_of_items:  # Filling remaining spots
                     cards = Card.find(
-                        lambda c: c["type"] == "normal"
-                        and c["rank"] in ["D", "B"]
-                        and c["available"]
+                        types=["normal"], ranks=["D", "B"], available=True
                     )
                     # There is just one D item so there is a really high
                     # probability of it being in the shop EVERY TIME
@@ -626,10 +613,17 @@ class Shop(commands.Cog):
 
         if amount < 1:
             return await ctx.send(f"You can't transfer less than 1 Jenny!")
-        if user.jenny < amount:
-            return await ctx.send("You can't transfer more Jenny than you have")
-        await o.add_jenny(amount)
-        await user.remove_jenny(amount)
+        try:
+            async with User.locks.hold(user.id, o.id, timeout=USER_LOCK_TIMEOUT):
+                if user.jenny < amount:
+                    return await ctx.send("You can't transfer more Jenny than you have")
+                async with User.batch():
+                    await o.add_jenny(amount)
+                    await user.remove_jenny(amount)
+        except LockTimeout:
+            return await ctx.send(
+                "One of you is busy with another command, try again in a moment"
+            )
         return await ctx.send(
             f"✉️ transferred {amount} Jenny to `{other}`!",
             allowed_mentions=discord.AllowedMentions.none(),
@@ -641,37 +635,7 @@ class Shop(commands.Cog):
         current: str,
     ) -> list[discord.app_commands.Choice[str]]:
         """Autocomplete for all cards"""
-        if not self.cardname_cache:
-            for card in Card.raw:
-                self.cardname_cache[card["id"]] = card["name"], card["type"]
-
-        name_cards = [
-            (x[0], self.cardname_cache[x[0]][0])
-            for x in (await User.new(interaction.user.id)).all_cards
-            if self.cardname_cache[x[0]][0].lower().startswith(current.lower())
-        ]
-        id_cards = [
-            (x[0], self.cardname_cache[x[0]][0])
-            for x in (await User.new(interaction.user.id)).all_cards
-            if str(x[0]).startswith(current)
-        ]
-        name_cards = list(dict.fromkeys(name_cards))
-        id_cards = list(
-            dict.fromkeys(id_cards)
-        )  # removing all duplicates from the list
-
-        if current == "":  # No ids AND names if the user hasn't typed anything yet
-            return [
-                discord.app_commands.Choice(name=x[1], value=str(x[0]))
-                for x in name_cards
-            ][:25]
-        return [
-            *[discord.app_commands.Choice(name=n, value=str(i)) for i, n in name_cards],
-            *[
-                discord.app_commands.Choice(name=str(i), value=str(i))
-                for i, _ in id_cards
-            ][:25],
-        ]
+        return await Card.owned_choices(interaction.user.id, current)
 
     @check()
     @give.command(
@@ -695,17 +659,25 @@ class Shop(commands.Cog):
             item = (Card(card)).id
         except CardNotFound:
             return await ctx.send("Invalid card number")
-        if user.has_any_card(item, False) is False:
-            return await ctx.send("You don't have any not fake copies of this card!")
-        if (len(o.fs_cards) >= 40 and item < 100 and o.has_rs_card(item)) or (
-            len(o.fs_cards) >= 40 and item > 99
-        ):
+        try:
+            async with User.locks.hold(user.id, o.id, timeout=USER_LOCK_TIMEOUT):
+                if user.has_any_card(item, False) is False:
+                    return await ctx.send(
+                        "You don't have any not fake copies of this card!"
+                    )
+                if (len(o.fs_cards) >= 40 and item < 100 and o.has_rs_card(item)) or (
+                    len(o.fs_cards) >= 40 and item > 99
+                ):
+                    return await ctx.send(
+                        "The user you are trying to give the cards's free slots are full!"
+                    )
+
+                removed_card = await user.remove_card(item)
+                await o.add_card(item, clone=removed_card[1]["clone"])
+        except LockTimeout:
             return await ctx.send(
-                "The user you are trying to give the cards's free slots are full!"
+                "One of you is busy with another command, try again in a moment"
             )
-
-        removed_card = await user.remove_card(item)
-        await o.add_card(item, clone=removed_card[1]["clone"])
         return await ctx.send(
             f"✉️ gave `{other}` card No. {item}!",
             allowed_mentions=discord.AllowedMentions.none(),
@@ -766,10 +738,16 @@ class Shop(commands.Cog):
             if not box:
                 return await ctx.send("Invalid lootbox. ")
 
-        if int(box) not in user.lootboxes:
-            return await ctx.send("You don't own this lootbox!")
-        await user.remove_lootbox(int(box))
-        await o.add_lootbox(int(box))
+        try:
+            async with User.locks.hold(user.id, o.id, timeout=USER_LOCK_TIMEOUT):
+                if int(box) not in user.lootboxes:
+                    return await ctx.send("You don't own this lootbox!")
+                await user.remove_lootbox(int(box))
+                await o.add_lootbox(int(box))
+        except LockTimeout:
+            return await ctx.send(
+                "One of you is busy with another command, try again in a moment"
+            )
         await ctx.send(
             f"✉️ gave {other.display_name} the box '{LOOTBOXES[int(box)]['name']}'",
             allowed_mentions=discord.AllowedMentions.none(),
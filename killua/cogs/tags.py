@@ -1,12 +1,10 @@
 import discord
 from discord.ext import commands
 from datetime import datetime
-from typing import cast
 import math
 from dataclasses import dataclass, field
 
 from killua.bot import BaseBot
-from killua.static.constants import DB
 from killua.static.enums import Category
 from killua.utils.classes import Guild
 from killua.utils.checks import check
@@ -23,7 +21,6 @@ class Tag:
     content: str | None = None
     uses: int | None = None
     guild_id: int | None = None
-    indx: int | None = None
 
     @classmethod
     async def new(cls, guild_id: int, tag_name: str) -> "Tag":
@@ -31,16 +28,12 @@ class Tag:
             guild = await Guild.new(guild_id)
         except Exception:
             return Tag(found=False, guild_id=guild_id)
-        if tag_name.lower() not in [cast(str, r["name"]).lower() for r in guild.tags]:
+        tag = guild.get_tag(tag_name)
+        if tag is None:
             return Tag(tags=guild.tags, found=False, guild_id=guild_id)
 
-        indx = [cast(str, r["name"]).lower() for r in guild.tags].index(
-            tag_name.lower()
-        )
-        tag = guild.tags[indx]
         return Tag(
             found=True,
-            indx=indx,
             guild_id=guild_id,
             tags=guild.tags,
             # By saving it that way it is non case sensitive when searching but keeps case sensitivity when displayed
@@ -51,27 +44,20 @@ class Tag:
             uses=tag["uses"],
         )
 
-    async def _sync(self) -> None:
-        guild = await Guild.new(self.guild_id)
-        guild.tags = self.tags
-        await guild._update_val("tags", self.tags)
-
     async def update(self, key: str, value: str | int | datetime) -> None:
-        self.tags[self.indx][key] = value
-        await self._sync()
+        await (await Guild.new(self.guild_id)).update_tag(self.name, key, value)
+        setattr(self, key, value)
 
     async def delete(self) -> None:
-        self.tags.pop(self.indx)
-        await self._sync()
+        await (await Guild.new(self.guild_id)).remove_tag(self.name)
 
     async def add_use(self) -> None:
-        self.tags[self.indx]["uses"] += 1
-        await self._sync()
+        await (await Guild.new(self.guild_id)).add_tag_use(self.name)
+        self.uses += 1
 
     async def transfer(self, to: int) -> None:
         """Transfers the ownership of a tag to the new id"""
-        self.tags[self.indx]["owner"] = to
-        await self._sync()
+        await self.update("owner", to)
 
     async def create(self, name: str, content: str, owner: int) -> None:
         if self.found:
@@ -79,18 +65,20 @@ class Tag:
         self.name = name
         self.owner = owner
         self.content = content
-        self.tags.append(
+        self.created_at = datetime.now()
+        self.uses = 0
+        guild = await Guild.new(self.guild_id)
+        await guild.add_tag(
             {
                 "name": self.name,
-                "created_at": datetime.now(),
+                "created_at": self.created_at,
                 "owner": self.owner,
                 "content": self.content,
-                "uses": 0,
+                "uses": self.uses,
             }
         )
         self.found = True
-        self.indx = len(self.tags) - 1
-        await self._sync()
+        self.tags = guild.tags
 
 
 @dataclass
@@ -100,18 +88,15 @@ class Member:
 
     @classmethod
     async def new(cls, user_id: int, guild_id: int) -> "Member":
-        tag_list = (await Guild.new(guild_id)).tags
-        if not tag_list:
+        # Already sorted by uses, most used first
+        owned_tags: list[list] = [
+            [x["name"], x["uses"]]
+            for x in (await Guild.new(guild_id)).tags_by_uses
+            if x["owner"] == user_id
+        ]
+        if not owned_tags:
             return Member(has_tags=False)
 
-        if user_id not in [r["owner"] for r in tag_list]:
-            return Member(has_tags=False)
-
-        owned_tags: list[list] = []
-        for x in tag_list:
-            if x["owner"] == user_id:
-                owned_tags.append([x["name"], x["uses"]])
-
         return Member(has_tags=True, tags=owned_tags)
 
 
@@ -386,10 +371,7 @@ class Tags(commands.Cog):
             tag.owner
         )
 
-        s = sorted(
-            zip([x["name"] for x in guild.tags], [x["uses"] for x in guild.tags])
-        )
-        rank = [cast(str, x[0]).lower() for x in s].index(name.lower()) + 1
+        rank = guild.tag_rank(tag.name)
         embed = discord.Embed.from_dict(
             {
                 "title": f'Information about tag "{tag.name}"',
@@ -408,26 +390,16 @@ class Tags(commands.Cog):
     @discord.app_commands.describe(page="The page of the tag list you want to view")
     async def list(self, ctx: commands.Context, page: int = 1):
         """Get a list of tags on the current server sorted by uses"""
-        guild = await DB.guilds.find_one({"id": ctx.guild.id})
-        if "tags" not in guild:
-            return await ctx.send("Seems like this server doesn't have any tags!")
-
-        s = sorted(
-            zip(
-                [x["name"] for x in guild["tags"]],
-                [x["uses"] for x in guild["tags"]],
-            )
-        )
-
-        if len(guild["tags"]) == 0:
+        guild = await Guild.new(ctx.guild.id)
+        if len(guild.tags) == 0:
             return await ctx.send("Seems like this server doesn't have any tags!")
 
-        if math.ceil(len(guild["tags"]) / 10) < page:
+        if math.ceil(len(guild.tags) / 10) < page:
             return await ctx.send("Invalid page")
 
-        tags = [f"Tag `{n}` with `{u}` uses" for n, u in s]
+        tags = [f"Tag `{x['name']}` with `{x['uses']}` uses" for x in guild.tags_by_uses]
 
-        if len(guild["tags"]) <= 10:
+        if len(guild.tags) <= 10:
             return await ctx.send(embed=self._build_embed(ctx, tags, page))
 
         def make_embed(page, *_):
@@ -453,13 +425,7 @@ class Tags(commands.Cog):
             return await ctx.send(
                 "This user currently does not have any tags!", ephemeral=True
             )
-        z = sorted(
-            zip([x[1] for x in member.tags], [x[0] for x in member.tags]), reverse=True
-        )
-        g: list[str] = []
-        for i in z:
-            uses, name = i
-            g.append(f"`{name}` with `{uses}` uses")
+        g: list[str] = [f"`{name}` with `{uses}` uses" for name, uses in member.tags]
         if len(g) <= 10:
             return await ctx.send(
                 embed=self._build_embed(ctx, g, 1, user),
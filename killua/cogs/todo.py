@@ -1,12 +1,19 @@
 import discord
+import logging
 from discord.ext import commands, tasks
-from datetime import datetime
+from datetime import datetime, timedelta
 import math, re
 from typing import Literal, cast
 
 from killua.bot import BaseBot
 from killua.static.enums import Category
-from killua.static.constants import DB, URL_REGEX, editing, REPORT_CHANNEL
+from killua.static.constants import (
+    DB,
+    URL_REGEX,
+    editing,
+    REPORT_CHANNEL,
+    TODO_NOTIFY_RETRY_DELAY,
+)
 from killua.utils.checks import check, blcheck
 from killua.utils.classes import TodoList, Todo, User, TodoListNotFound
 from killua.utils.interactions import ConfirmButton, Button
@@ -43,52 +50,66 @@ class TodoSystem(commands.Cog):
         for menu in menus:
             self.client.tree.add_command(menu)
 
-    @tasks.loop(seconds=60)
+    @tasks.loop()
     async def check_todo_dues(self):
         """
-        Checks if any todo's are due and sends a message to the owner if so
+        Sleeps until the next todo is due and sends a message to everyone involved
         """
-        lists = [await TodoList.new(r["_id"]) async for r in DB.todo.find({})]
-
-        for todo_list in lists:
-            for todo in todo_list.todos:
-
-                if (
-                    "due_at" in todo
-                    and todo["due_at"]
-                    and todo["due_at"] < datetime.now()
-                    and not todo["notified"]
-                ):
-                    to_be_notified = []
-                    to_be_notified.append(self.client.get_user(todo["added_by"]))
-                    to_be_notified.extend(
-                        [self.client.get_user(u) for u in todo["assigned_to"]]
+        await TodoList.dues.wait()
+        for entry in TodoList.dues.pop_due(datetime.now()):
+            try:
+                await self._notify_due(*entry)
+            except Exception as e:
+                # Tried again later instead of losing the todo or stopping the loop
+                logging.error(
+                    f"Could not notify about todo {entry[2]} of todo list {entry[1]}: {e}"
+                )
+                TodoList.dues.retry(
+                    entry, datetime.now() + timedelta(seconds=TODO_NOTIFY_RETRY_DELAY)
+                )
+
+    async def _notify_due(self, due_at: datetime, list_id: int, position: int) -> None:
+        """Sends a message to everyone involved in a todo that is due"""
+        try:
+            todo_list = await TodoList.new(list_id)
+        except TodoListNotFound:
+            return
+
+        if position >= len(todo_list.todos):
+            return
+        todo = todo_list.todos[position]
+        if todo.get("due_at") != due_at or todo.get("notified"):
+            return
+
+        to_be_notified = []
+        to_be_notified.append(self.client.get_user(todo["added_by"]))
+        to_be_notified.extend([self.client.get_user(u) for u in todo["assigned_to"]])
+
+        for user in to_be_notified:
+            if user:
+                try:
+                    embed = discord.Embed.from_dict(
+                        {
+                            "title": "Todo due",
+                            "description": f"Your todo `{todo['todo']}` is due\nAdded <t:{int(todo['added_on'].timestamp())}:R>",
+                            "color": todo_list.color or 0x3E4A78,
+                            "footer": {
+                                "text": f"From todo list: {todo_list.name} (ID: {todo_list.id})",
+                                "icon_url": todo_list.thumbnail,
+                            },
+                        }
                     )
+                    await cast(discord.User, user).send(embed=embed)
+                except discord.HTTPException:
+                    continue  # If dms are closed we don't want to interrupt the loop
 
-                    for user in to_be_notified:
-                        if user:
-                            try:
-                                embed = discord.Embed.from_dict(
-                                    {
-                                        "title": "Todo due",
-                                        "description": f"Your todo `{todo['todo']}` is due\nAdded <t:{int(todo['added_on'].timestamp())}:R>",
-                                        "color": todo_list.color or 0x3E4A78,
-                                        "footer": {
-                                            "text": f"From todo list: {todo_list.name} (ID: {todo_list.id})",
-                                            "icon_url": todo_list.thumbnail,
-                                        },
-                                    }
-                                )
-                                await cast(discord.User, user).send(embed=embed)
-                            except discord.HTTPException:
-                                continue  # If dms are closed we don't want to interrupt the loop
-
-                    todo["notified"] = True
-                    await todo_list.set_property("todos", todo_list.todos)
+        todo["notified"] = True
+        await todo_list.set_property("todos", todo_list.todos)
 
     @check_todo_dues.before_loop
     async def before_check_todo_dues(self):
         await self.client.wait_until_ready()
+        await TodoList.dues.build()
 
     async def _get_user(self, u: int) -> discord.User:
         """Gets a user from cache if possible, else makes an API request"""
@@ -12,6 +12,9 @@ from .metrics import (
     API_REQUESTS_COUNTER,
     API_RESPONSE_TIME,
     IPC_RESPONSE_TIME,
+    IPC_REQUESTS_IN_FLIGHT,
+    IPC_ROUTE_LATENCY,
+    IPC_TIMEOUT_COUNTER,
     API_SPAM_REQUESTS,
     DAILY_ACTIVE_USERS,
     APPROXIMATE_USER_COUNT,
@@ -25,6 +28,21 @@ from .metrics import (
     CARDS,
     BIGGEST_COLLECTION,
     LOCALE,
+    CACHE_HITS,
+    CACHE_MISSES,
+    CACHE_EVICTIONS,
+    CACHE_SIZE,
+    CACHE_BYTES,
+    COOLDOWN_ENTRIES,
+    COOLDOWN_EVICTIONS,
+    RENDER_QUEUE_DEPTH,
+    RENDER_LATENCY,
+    RENDER_REJECTED,
+    LEADERBOARD_LOADS,
+    LEADERBOARD_FALLBACKS,
+    CARD_UPDATE_CONFLICTS,
+    LOCK_WAIT,
+    LOCKS_HELD,
     IS_DEV,
 )
 
@@ -45,6 +63,9 @@ __all__ = [
     "API_REQUESTS_COUNTER",
     "API_RESPONSE_TIME",
     "IPC_RESPONSE_TIME",
+    "IPC_REQUESTS_IN_FLIGHT",
+    "IPC_ROUTE_LATENCY",
+    "IPC_TIMEOUT_COUNTER",
     "API_SPAM_REQUESTS",
     "DAILY_ACTIVE_USERS",
     "APPROXIMATE_USER_COUNT",
@@ -58,5 +79,20 @@ __all__ = [
     "CARDS",
     "BIGGEST_COLLECTION",
     "LOCALE",
+    "CACHE_HITS",
+    "CACHE_MISSES",
+    "CACHE_EVICTIONS",
+    "CACHE_SIZE",
+    "CACHE_BYTES",
+    "COOLDOWN_ENTRIES",
+    "COOLDOWN_EVICTIONS",
+    "RENDER_QUEUE_DEPTH",
+    "RENDER_LATENCY",
+    "RENDER_REJECTED",
+    "LEADERBOARD_LOADS",
+    "LEADERBOARD_FALLBACKS",
+    "CARD_UPDATE_CONFLICTS",
+    "LOCK_WAIT",
+    "LOCKS_HELD",
     "IS_DEV",
 ]
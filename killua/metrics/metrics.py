@@ -1,4 +1,4 @@
-from prometheus_client import Counter, Gauge
+from prometheus_client import Counter, Gauge, Histogram
 
 METRIC_PREFIX = "discord_"
 
@@ -59,6 +59,23 @@ IPC_RESPONSE_TIME = Gauge(
     METRIC_PREFIX + "ipc_response_time", "Response time of the IPC server"
 )
 
+IPC_REQUESTS_IN_FLIGHT = Gauge(
+    METRIC_PREFIX + "ipc_requests_in_flight",
+    "Amount of IPC requests currently being handled",
+)
+
+IPC_ROUTE_LATENCY = Histogram(
+    METRIC_PREFIX + "ipc_route_latency",
+    "Time in seconds it took to handle an IPC request",
+    ["route"],
+)
+
+IPC_TIMEOUT_COUNTER = Counter(
+    METRIC_PREFIX + "ipc_timeouts",
+    "Amount of IPC requests that took longer than their route allows",
+    ["route"],
+)
+
 API_SPAM_REQUESTS = Counter(
     METRIC_PREFIX + "api_spam_requests",
     "Amount of requests that are attempted malice to my API",
@@ -122,6 +139,91 @@ LOCALE = Gauge(
     ["country"],
 )
 
+CACHE_HITS = Counter(
+    METRIC_PREFIX + "cache_hits",
+    "Amount of lookups that were served from an object cache",
+    ["cache"],
+)
+
+CACHE_MISSES = Counter(
+    METRIC_PREFIX + "cache_misses",
+    "Amount of lookups that were not found in an object cache",
+    ["cache"],
+)
+
+CACHE_EVICTIONS = Counter(
+    METRIC_PREFIX + "cache_evictions",
+    "Amount of entries evicted from an object cache because it was full or they expired",
+    ["cache"],
+)
+
+CACHE_SIZE = Gauge(
+    METRIC_PREFIX + "cache_size",
+    "Amount of entries in an object cache",
+    ["cache"],
+)
+
+CACHE_BYTES = Gauge(
+    METRIC_PREFIX + "cache_bytes",
+    "Amount of bytes used by a cache that has a size budget",
+    ["cache"],
+)
+
+COOLDOWN_ENTRIES = Gauge(
+    METRIC_PREFIX + "cooldown_entries",
+    "Amount of command cooldowns currently kept in memory",
+)
+
+COOLDOWN_EVICTIONS = Counter(
+    METRIC_PREFIX + "cooldown_evictions",
+    "Amount of command cooldowns dropped after they ran out",
+)
+
+RENDER_QUEUE_DEPTH = Gauge(
+    METRIC_PREFIX + "render_queue_depth",
+    "Amount of images being rendered or waiting for a render worker",
+)
+
+RENDER_LATENCY = Histogram(
+    METRIC_PREFIX + "render_latency_seconds",
+    "How long it took to render an image, including waiting for a worker",
+    ["task"],
+)
+
+RENDER_REJECTED = Counter(
+    METRIC_PREFIX + "render_rejected",
+    "Amount of renders rejected because too many were queued",
+)
+
+LEADERBOARD_LOADS = Counter(
+    METRIC_PREFIX + "leaderboard_loads",
+    "Amount of times a leaderboard was loaded from the database",
+    ["board"],
+)
+
+LEADERBOARD_FALLBACKS = Counter(
+    METRIC_PREFIX + "leaderboard_fallbacks",
+    "Amount of ranks or server leaderboards that had to be queried from the database",
+    ["board"],
+)
+
+CARD_UPDATE_CONFLICTS = Counter(
+    METRIC_PREFIX + "card_update_conflicts",
+    "Amount of card changes that had to be retried because the cards were changed elsewhere",
+)
+
+LOCK_WAIT = Histogram(
+    METRIC_PREFIX + "lock_wait_seconds",
+    "How long a command waited for the locks of the users it changes",
+    ["lock"],
+)
+
+LOCKS_HELD = Gauge(
+    METRIC_PREFIX + "locks_held",
+    "Amount of keys that are locked or waited for",
+    ["lock"],
+)
+
 IS_DEV = Gauge(
     METRIC_PREFIX + "is_dev",
     "If the bot is running in dev mode",
@@ -8,6 +8,7 @@ from typing import cast
 
 from .constants import (
     INDESTRUCTIBLE,
+    SPELL_TARGET_LOCK_TIMEOUT,
 )
 from killua.bot import BaseBot
 from killua.utils.classes import (
@@ -48,7 +49,8 @@ class Card1001(Card, IndividualCard):
         )
 
         self._permission_check(self.ctx, member)
-        await author.remove_card(self.id)
+        async with self._hold():
+            await author.remove_card(self.id)
         await self._view_defense_check(self.ctx, other)
 
         self._has_cards_check(other.fs_cards, " in their free slots", uses_up=True)
@@ -81,7 +83,8 @@ class Card1002(Card, IndividualCard):
         )
 
         self._permission_check(self.ctx, member)
-        await author.remove_card(self.id)
+        async with self._hold():
+            await author.remove_card(self.id)
         await self._view_defense_check(self.ctx, other)
 
         async def make_embed(page, *_):
@@ -98,14 +101,20 @@ class Card1007(Card, IndividualCard):
         author = await User.new(self.ctx.author.id)
         other = await User.new(member.id)
 
-        self._has_cards_check(other.rs_cards, " in their restricted slots")
-
-        target_card = random.choice([x[0] for x in other.rs_cards if x[0] != 0])
-        await author.remove_card(self.id)
-        await self._attack_defense_check(self.ctx, other, target_card)
+        async with self._hold(member):
+            self._has_cards_check(other.rs_cards, " in their restricted slots")
 
-        removed_card = await other.remove_card(target_card, restricted_slot=True)
-        await author.add_card(target_card, removed_card[1]["fake"])
+            target_card = random.choice([x[0] for x in other.rs_cards if x[0] != 0])
+            await author.remove_card(self.id)
+            defenses = await self._attack_defenses(other, target_card)
+        await self._wait_for_defense(self.ctx, other, defenses)
+
+        async with self._hold(member):
+            # They could have lost it while deciding how to defend themselves
+            if not other.has_rs_card(target_card):
+                raise CheckFailure("The specified user doesn't have this card anymore")
+            removed_card = await other.remove_card(target_card, restricted_slot=True)
+            await author.add_card(target_card, removed_card[1]["fake"])
         await self.ctx.send(
             f"Successfully stole card number `{target_card}` from `{member}`!"
         )
@@ -119,21 +128,27 @@ class Card1008(Card, IndividualCard):
         author = await User.new(self.ctx.author.id)
         other = await User.new(member.id)
 
-        self._has_cards_check(other.all_cards)
-        self._has_other_card_check(author.all_cards)
+        async with self._hold(member):
+            self._has_cards_check(other.all_cards)
+            self._has_other_card_check(author.all_cards)
 
-        target_card = random.choice(
-            [x[0] for x in other.all_cards if x[0] != 1008 and x[0] != 0]
-        )
-        await self._attack_defense_check(self.ctx, other, target_card)
+            target_card = random.choice(
+                [x[0] for x in other.all_cards if x[0] != 1008 and x[0] != 0]
+            )
+            defenses = await self._attack_defenses(other, target_card)
+        await self._wait_for_defense(self.ctx, other, defenses)
 
-        await author.remove_card(self.id)
-        removed_card_other = await other.remove_card(target_card)
-        removed_card_author = await author.remove_card(
-            random.choice([x[0] for x in author.all_cards if x[0] != 0])
-        )
-        await other.add_card(removed_card_author[0], removed_card_author[1]["fake"])
-        await author.add_card(removed_card_other[0], removed_card_other[1]["fake"])
+        async with self._hold(member), User.batch():
+            # Either of them could have lost cards while the defense was chosen
+            self._has_any_card(target_card, other)
+            self._has_other_card_check(author.all_cards)
+            await author.remove_card(self.id)
+            removed_card_other = await other.remove_card(target_card)
+            removed_card_author = await author.remove_card(
+                random.choice([x[0] for x in author.all_cards if x[0] != 0])
+            )
+            await other.add_card(removed_card_author[0], removed_card_author[1]["fake"])
+            await author.add_card(removed_card_other[0], removed_card_other[1]["fake"])
 
         await self.ctx.send(
             f"Successfully swapped cards! Gave {member} the card `{removed_card_author[0]}` and took card number `{removed_card_other[0]}` from them!"
@@ -145,14 +160,15 @@ class Card1010(Card, IndividualCard):
     async def exec(self, card_id: int) -> None:
         user = await User.new(self.ctx.author.id)
 
-        if not user.has_any_card(card_id, False):
-            raise CheckFailure(
-                "Seems like you don't own this card You already need to own a (non-fake) copy of the card you want to duplicate"
-            )
+        async with self._hold():
+            if not user.has_any_card(card_id, False):
+                raise CheckFailure(
+                    "Seems like you don't own this card You already need to own a (non-fake) copy of the card you want to duplicate"
+                )
 
-        await self._is_maxed_check(card_id)
-        await user.remove_card(self.id)
-        await user.add_card(card_id, clone=True)
+            await self._is_maxed_check(card_id)
+            await user.remove_card(self.id)
+            await user.add_card(card_id, clone=True)
 
         await self.ctx.send(
             f"Successfully added another copy of {card_id} to your book!"
@@ -164,15 +180,16 @@ class Card1011(Card, IndividualCard):
     async def exec(self, member: discord.Member) -> None:
         author = await User.new(self.ctx.author.id)
         other = await User.new(member.id)
-        await author.remove_card(self.id)
+        async with self._hold(member):
+            await author.remove_card(self.id)
 
-        self._has_cards_check(
-            other.rs_cards, " in their restricted slots!", uses_up=True
-        )
-        card = random.choice([x for x in other.rs_cards if x[0] != 0])
-        await self._is_maxed_check(card[0])
+            self._has_cards_check(
+                other.rs_cards, " in their restricted slots!", uses_up=True
+            )
+            card = random.choice([x for x in other.rs_cards if x[0] != 0])
+            await self._is_maxed_check(card[0])
 
-        await author.add_card(card[0], card[1]["fake"], True)
+            await author.add_card(card[0], card[1]["fake"], True)
         await self.ctx.send(
             f"Successfully added another copy of card No. {card[0]} to your book! This card is {'not' if card[1]['fake'] is False else ''} a fake!"
         )
@@ -194,7 +211,8 @@ class Card1015(Card, IndividualCard):
             member,
         )
 
-        await author.remove_card(self.id)
+        async with self._hold():
+            await author.remove_card(self.id)
 
         self._has_cards_check(other.all_cards)
 
@@ -213,7 +231,8 @@ class Card1018(Card, IndividualCard):
 
     async def exec(self) -> None:
         author = await User.new(self.ctx.author.id)
-        await author.remove_card(self.id)
+        async with self._hold():
+            await author.remove_card(self.id)
 
         users: list[discord.Member] = []
         stolen_cards = []
@@ -229,17 +248,22 @@ class Card1018(Card, IndividualCard):
         for user in users:
             try:
                 self._permission_check(self.ctx, user)
-                u = await User.new(user.id)
-                self._has_cards_check(u.all_cards)
-                target = random.choice([x for x in u.all_cards if x[0] != 0])
-                await self._attack_defense_check(self.ctx, u, target)
-                r = await u.remove_card(target[0], target[1]["fake"])
+                # Whoever is busy for too long is skipped
+                async with self._hold(user, timeout=SPELL_TARGET_LOCK_TIMEOUT):
+                    u = await User.new(user.id)
+                    self._has_cards_check(u.all_cards)
+                    target = random.choice([x for x in u.all_cards if x[0] != 0])
+                    defenses = await self._attack_defenses(u, target)
+                await self._wait_for_defense(self.ctx, u, defenses)
+                async with self._hold(user, timeout=SPELL_TARGET_LOCK_TIMEOUT):
+                    r = await u.remove_card(target[0], target[1]["fake"])
                 stolen_cards.append(r)
             except Exception:
                 continue
 
         if len(stolen_cards) > 0:
-            await author.add_multi(*stolen_cards)
+            async with self._hold():
+                await author.add_multi(*stolen_cards)
             await self.ctx.send(
                 f"Success! Stole the card{'s' if len(stolen_cards) > 1 else ''} {', '.join([str(x[0]) for x in stolen_cards])} from {len(stolen_cards)} user{'s' if len(users) > 1 else ''}!"
             )
@@ -259,8 +283,9 @@ class Card1020(Card, IndividualCard):
 
         author = await User.new(self.ctx.author.id)
 
-        await author.remove_card(self.id)
-        await author.add_card(card_id, True)
+        async with self._hold():
+            await author.remove_card(self.id)
+            await author.add_card(card_id, True)
         await self.ctx.send(
             f"Created a fake of card No. {card_id}! Make sure to remember that it's a fake, fakes don't count towards completion of the album"
         )
@@ -277,12 +302,17 @@ class Card1021(Card, IndividualCard):
         author = await User.new(self.ctx.author.id)
         other = await User.new(member.id)
 
-        self._has_any_card(card_id, other)
-        await author.remove_card(self.id)
-        await self._attack_defense_check(self.ctx, other, card_id)
-
-        stolen = await other.remove_card(card_id)
-        await author.add_card(stolen[0], stolen[1]["fake"])
+        async with self._hold(member):
+            self._has_any_card(card_id, other)
+            await author.remove_card(self.id)
+            defenses = await self._attack_defenses(other, card_id)
+        await self._wait_for_defense(self.ctx, other, defenses)
+
+        async with self._hold(member):
+            # They could have lost it while deciding how to defend themselves
+            self._has_any_card(card_id, other)
+            stolen = await other.remove_card(card_id)
+            await author.add_card(stolen[0], stolen[1]["fake"])
         await self.ctx.send(f"Stole card number {card_id} successfully!")
 
 
@@ -292,31 +322,29 @@ class Card1024(Card, IndividualCard):
         other = await User.new(member.id)
         author = await User.new(self.ctx.author.id)
 
-        tbr = [x for x in other.all_cards if x[1]["fake"] or x[1]["clone"]]
-
-        if len(tbr) == 0:
-            raise CheckFailure(
-                "This user does not have any cards you could target with this spell!"
-            )
-
-        await author.remove_card(self.id)
+        async with self._hold(member):
+            tbr = [x for x in other.all_cards if x[1]["fake"] or x[1]["clone"]]
 
-        rs_tbr = [
-            x for x in other.rs_cards if x[1]["fake"] is True or x[1]["clone"] is True
-        ]
-        fs_tbr = [
-            x for x in other.fs_cards if x[1]["fake"] is True or x[1]["clone"] is True
-        ]
+            if len(tbr) == 0:
+                raise CheckFailure(
+                    "This user does not have any cards you could target with this spell!"
+                )
 
-        for c in rs_tbr:
-            other.rs_cards.remove(c)
-        for c in fs_tbr:
-            other.fs_cards.remove(c)
+            await author.remove_card(self.id)
 
-        await other._update_val(
-            "cards",
-            {"rs": other.rs_cards, "fs": other.fs_cards, "effects": other.effects},
-        )
+            rs_tbr = [
+                x
+                for x in other.rs_cards
+                if x[1]["fake"] is True or x[1]["clone"] is True
+            ]
+            fs_tbr = [
+                x
+                for x in other.fs_cards
+                if x[1]["fake"] is True or x[1]["clone"] is True
+            ]
+
+            await other.bulk_remove(rs_tbr, fs_slots=False)
+            await other.bulk_remove(fs_tbr)
         await self.ctx.send(
             f"Successfully removed all cloned and fake cards from `{member}`. Cards removed in total: {len(tbr)}"
         )
@@ -348,14 +376,15 @@ class Card1026(Card, IndividualCard):
             elif view.value is False:
                 raise CheckFailure("Successfully canceled!")
 
-        if author.has_effect(str(self.id)):
-            await author.remove_effect(str(self.id))
+        async with self._hold():
+            if author.has_effect(str(self.id)):
+                await author.remove_effect(str(self.id))
 
-        # if (amount:=author.count_card(self.id)) > 1:
-        #     for i in range(amount):
-        #         await author.remove_card(self.id)
+            # if (amount:=author.count_card(self.id)) > 1:
+            #     for i in range(amount):
+            #         await author.remove_card(self.id)
 
-        await author.add_effect(str(self.id), 10)
+            await author.add_effect(str(self.id), 10)
 
         await self.ctx.send(
             "Done, you will be automatically protected from the next 10 attacks! You need to keep the card in your inventory until all 10 defenses are used up"
@@ -370,19 +399,26 @@ class Card1028(Card, IndividualCard):
         other = await User.new(member.id)
         author = await User.new(self.ctx.author.id)
 
-        self._has_cards_check(other.fs_cards, " in their free slots")
+        async with self._hold(member):
+            self._has_cards_check(other.fs_cards, " in their free slots")
 
-        target_card = random.choice(
-            [x for x in other.fs_cards if x[0] not in INDESTRUCTIBLE]
-        )
-        await author.remove_card(self.id)
-        await self._attack_defense_check(self.ctx, other, target_card)
-        await other.remove_card(
-            target_card[0],
-            remove_fake=target_card[1]["fake"],
-            restricted_slot=False,
-            clone=target_card[1]["clone"],
-        )
+            target_card = random.choice(
+                [x for x in other.fs_cards if x[0] not in INDESTRUCTIBLE]
+            )
+            await author.remove_card(self.id)
+            defenses = await self._attack_defenses(other, target_card)
+        await self._wait_for_defense(self.ctx, other, defenses)
+
+        async with self._hold(member):
+            # They could have lost it while deciding how to defend themselves
+            if target_card not in other.fs_cards:
+                raise CheckFailure("The specified user doesn't have this card anymore")
+            await other.remove_card(
+                target_card[0],
+                remove_fake=target_card[1]["fake"],
+                restricted_slot=False,
+                clone=target_card[1]["clone"],
+            )
         await self.ctx.send(f"Success, you destroyed card No. {target_card[0]}!")
 
 
@@ -394,19 +430,26 @@ class Card1029(Card, IndividualCard):
         other = await User.new(member.id)
         author = await User.new(self.ctx.author.id)
 
-        self._has_cards_check(other.rs_cards, " in their restricted slots")
+        async with self._hold(member):
+            self._has_cards_check(other.rs_cards, " in their restricted slots")
 
-        target_card = random.choice(
-            [x for x in other.rs_cards if x[0] not in INDESTRUCTIBLE and x[0] != 0]
-        )
-        await author.remove_card(self.id)
-        await self._attack_defense_check(self.ctx, other, target_card)
-        await other.remove_card(
-            target_card[0],
-            remove_fake=target_card[1]["fake"],
-            restricted_slot=True,
-            clone=target_card[1]["clone"],
-        )
+            target_card = random.choice(
+                [x for x in other.rs_cards if x[0] not in INDESTRUCTIBLE and x[0] != 0]
+            )
+            await author.remove_card(self.id)
+            defenses = await self._attack_defenses(other, target_card)
+        await self._wait_for_defense(self.ctx, other, defenses)
+
+        async with self._hold(member):
+            # They could have lost it while deciding how to defend themselves
+            if target_card not in other.rs_cards:
+                raise CheckFailure("The specified user doesn't have this card anymore")
+            await other.remove_card(
+                target_card[0],
+                remove_fake=target_card[1]["fake"],
+                restricted_slot=True,
+                clone=target_card[1]["clone"],
+            )
         await self.ctx.send(f"Success, you destroyed card No. {target_card[0]}!")
 
 
@@ -416,7 +459,8 @@ class Card1031(Card, IndividualCard):
         await self._is_valid_card_check(card_id)
 
         author = await User.new(self.ctx.author.id)
-        await author.remove_card(self.id)
+        async with self._hold():
+            await author.remove_card(self.id)
         embed, file = await self._get_analysis_embed(card_id, self.ctx.bot)
         await self.ctx.send(embed=embed, file=file)
 
@@ -425,19 +469,19 @@ class Card1032(Card, IndividualCard):
 
     async def exec(self) -> None:
         author = await User.new(self.ctx.author.id)
-        self._is_full_check(author)
-
-        target = random.choice(
-            Card.find(
-                lambda c: c["type"] == "normal"
-                and c["available"] is True
-                and c["rank"] != "SS"
-                and c["id"] != 0
-            )
-        )  # random card for lottery
-        await author.remove_card(self.id)
-        await self._is_maxed_check(target.id)
-        await author.add_card(target.id)
+        async with self._hold():
+            self._is_full_check(author)
+
+            target = random.choice(
+                Card.find(
+                    lambda c: c["rank"] != "SS" and c["id"] != 0,
+                    types=["normal"],
+                    available=True,
+                )
+            )  # random card for lottery
+            await author.remove_card(self.id)
+            await self._is_maxed_check(target.id)
+            await author.add_card(target.id)
 
         await self.ctx.send(f"Successfully added card No. {target} to your inventory")
 
@@ -449,11 +493,12 @@ class Card1035(Card, IndividualCard):
 
         if page > 6 or page < 1:
             raise CheckFailure("You need to choose a page between 1 and 6")
-        self._has_effect_check(author, f"page_protection_{page}")
-        await author.remove_card(self.id)
-        await author.add_effect(
-            f"page_protection_{page}", datetime.now()
-        )  # The value doesn't matter here
+        async with self._hold():
+            self._has_effect_check(author, f"page_protection_{page}")
+            await author.remove_card(self.id)
+            await author.add_effect(
+                f"page_protection_{page}", datetime.now()
+            )  # The value doesn't matter here
         await self.ctx.send(f"Success! Page {page} is now permanently protected")
 
 
@@ -467,9 +512,10 @@ class Card1036(Card, IndividualCard):
                 f"You need to have used the card {self.id} once to use this command"
             )
 
-        if author.has_fs_card(self.id) and str(self.id) not in author.effects:
-            await author.remove_card(self.id)
-        await author.add_effect(str(self.id), datetime.now())
+        async with self._hold():
+            if author.has_fs_card(self.id) and str(self.id) not in author.effects:
+                await author.remove_card(self.id)
+            await author.add_effect(str(self.id), datetime.now())
 
         if effect.lower() not in ["list", "analysis", "1031", "1038"]:
             raise CheckFailure(
@@ -491,7 +537,8 @@ class Card1038(Card, IndividualCard):
         if card_id == 0:
             raise CheckFailure("Redacted card!")
 
-        await (await User.new(self.ctx.author.id)).remove_card(self.id)
+        async with self._hold():
+            await (await User.new(self.ctx.author.id)).remove_card(self.id)
 
         embed, file = await self._get_list_embed(card_id, self.ctx.bot)
         await self.ctx.send(embed=embed, file=file)
@@ -7,6 +7,7 @@ from pymongo.asynchronous.collection import AsyncCollection
 from typing import Any, Callable, TypeVar, Generic
 
 from killua.utils.test_db import TestingDatabase as Database
+from killua.utils.dau import DailyUserTracker
 import killua.args as args
 
 args.init()
@@ -28,6 +29,106 @@ CARDS_URL = "https://api.killua.dev/cards.json?public="
 
 API_ROUTES = ["/diagnostics", "/commands", "/stats", "/image", "/vote"]
 
+# After how many seconds the in memory blacklist is reloaded from the database
+BLACKLIST_REFRESH_INTERVAL = 60 * 10
+
+# How often (in seconds) command usage counted in memory is written to the database
+COMMAND_USAGE_FLUSH_INTERVAL = 60
+
+# How often (in seconds) command cooldowns that have run out are dropped from memory
+COOLDOWN_SWEEP_INTERVAL = 60 * 5
+
+# How many processes render images and how many renders may be queued before new ones are rejected
+RENDER_WORKERS = 2
+RENDER_MAX_PENDING = 32
+
+# Where the resized card images used to draw the book are stored
+CARD_ATLAS_PATH = "card_atlas"
+
+# How many bytes of rendered book pages are kept in memory
+BOOK_PAGE_CACHE_BYTES = 64 * 1024 * 1024
+
+# How many dominant colors of images (used for embed colors) are kept in memory, the
+# file they are saved to so they survive restarts (None to not save them) and how
+# often (in seconds) it is written
+DOMINANT_COLOR_CACHE_SIZE = 20_000
+DOMINANT_COLOR_CACHE_PATH = "dominant_colors.json"
+DOMINANT_COLOR_SAVE_INTERVAL = 60 * 10
+
+# How many users each leaderboard keeps in memory. Has to be at least the most
+# that is ever shown at once (50 on the website)
+LEADERBOARD_SIZE = 100
+
+# After how many seconds a leaderboard is loaded from the database again, to pick
+# up changes that did not go through the bot
+LEADERBOARD_TTL = 30 * 60
+
+# How often (in seconds) each group of Prometheus metrics is refreshed from the database
+PROMETHEUS_REFRESH_INTERVALS = {
+    "users": 60 * 10,  # Registered users, approximate user count and user installs
+    "todos": 60 * 10,
+    "tags": 60 * 10,
+    "cards": 60 * 30,  # Cards in circulation and the biggest collection
+    "locales": 60 * 60,
+    "api": 60 * 10,
+}
+
+# If set (4-16), daily users are estimated with a HyperLogLog sketch of 2^precision bytes
+# instead of keeping the id of every user in memory. None counts them exactly
+DAILY_USERS_HLL_PRECISION = None
+
+# How many User and Guild objects are kept in memory at most and after how many
+# seconds without being used they are evicted
+USER_CACHE_SIZE = 10_000
+USER_CACHE_TTL = 60 * 60
+GUILD_CACHE_SIZE = 5_000
+GUILD_CACHE_TTL = 60 * 60 * 6
+
+# How often a change to the cards of a user is tried while they are changed elsewhere
+# at the same time, before it is written without checking their version
+CARD_UPDATE_ATTEMPTS = 3
+
+# How many seconds a command waits for the cards or jenny of a user to stop being
+# changed by another command before telling them to try again
+USER_LOCK_TIMEOUT = 10
+
+# How many seconds a spell that targets everyone in a channel waits for the cards of one
+# of them to stop being changed by another command before leaving them out
+SPELL_TARGET_LOCK_TIMEOUT = 5
+
+# How many nekos.best images of every action are fetched at once (the API allows
+# up to 20) and how few can be left before the next ones are fetched in the background
+ACTION_POOL_SIZE = 20
+ACTION_POOL_LOW_WATER = 5
+# How many seconds fetching them in the background pauses after the API failed,
+# doubling with every failure in a row up to the maximum
+ACTION_POOL_BACKOFF = 5
+ACTION_POOL_MAX_BACKOFF = 60 * 5
+# How many dominant colors of those images are found at once in the background, so
+# they never take more than a few of the render workers' queue slots
+ACTION_COLOR_RENDERS = 2
+
+# How many seconds a todo that could not be notified about waits to be tried again
+TODO_NOTIFY_RETRY_DELAY = 60
+
+# How many IPC requests are handled at the same time and how many seconds a route
+# may take before the API gets an error back. A timeout of `None` means the route
+# is never interrupted, which is needed for routes that write to the database in several steps
+IPC_MAX_CONCURRENT_REQUESTS = 64
+IPC_DEFAULT_TIMEOUT = 10
+IPC_ROUTE_TIMEOUTS = {
+    "heartbeat": 2,
+    "stats": 15,
+    "user_info": 15,
+    "user_get_basic_details": 15,
+    "guild_command_usage": 30,
+    # These post or edit a message before saving it, so they can't stop in between
+    "news_save": None,
+    "news_edit": None,
+    "news_delete": None,
+    "vote": None,
+}
+
 T = TypeVar("T")
 
 
@@ -757,12 +858,8 @@ DEFAULT_AVATAR = "https://i.imgur.com/fehQCjC.png"
 editing = {}
 
 
-class _DailyUsers:
-    users = []
-
-
 # The users who have ran a command in the last 24h
-daily_users = _DailyUsers()
+daily_users = DailyUserTracker(DAILY_USERS_HLL_PRECISION)
 
 # ACTION DATA
 ACTIONS = {
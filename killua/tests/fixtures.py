@@ -26,20 +26,30 @@ def ensure_test_cards() -> None:
         )
 
     with _CARDS_FILE.open() as handle:
-        Card.raw = json.load(handle)
+        Card.load(json.load(handle))
 
-    Card.cached_raw = []
     Card.cache.clear()
 
 
 def reset_test_fixtures() -> None:
-    """Reset in-memory DB, user cache, and bot flags between test command classes."""
+    """Reset in-memory DB, user cache, book pages, leaderboards, blacklist, command usage and bot flags between test command classes."""
     TestingDatabase.reset_all()
     DB._test_const_seeded = False
 
-    from killua.utils.classes import User
+    from killua.utils.classes import User, Book
 
     User.cache.clear()
+    Book.page_cache.clear()
+
+    from killua.utils.leaderboard import leaderboards
+
+    for board in leaderboards.values():
+        board.clear()
+
+    from killua.utils.checks import BlacklistCache, CommandUsageCache
+
+    BlacklistCache.reset()
+    CommandUsageCache.reset()
 
     from .types import Bot
 
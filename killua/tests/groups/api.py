@@ -2,8 +2,10 @@
 
 from __future__ import annotations
 
+import asyncio
 from datetime import datetime
 from io import BytesIO
+from json import dumps, loads
 from unittest.mock import AsyncMock, MagicMock, patch
 
 from PIL import Image
@@ -13,6 +15,7 @@ from ..types import Bot
 from ...cogs.api import IPCRoutes, NewsMessage
 from ...static.constants import DB, NEWS_CHANNEL, POST_CHANNEL, UPDATE_CHANNEL
 from ...utils.classes import User
+from ...utils.ipc import IPCDispatcher
 
 
 class TestingApi(Testing):
@@ -898,3 +901,147 @@ class TopggAnnouncementTests(_ApiTests):
                     }
                 )
         mock_request.assert_not_called()
+
+
+class _FakeRouterSocket:
+    """Stands in for a ZMQ ROUTER socket: queued incoming messages, recorded replies."""
+
+    def __init__(self) -> None:
+        self.incoming: asyncio.Queue = asyncio.Queue()
+        self.sent: list[list[bytes]] = []
+        self.reply_sent = asyncio.Event()
+
+    def request(self, identity: bytes, route: str, data: dict | None = None) -> None:
+        body = b"\x00" + dumps({"route": route, "data": data or {}}).encode()
+        self.incoming.put_nowait([identity, b"", body])
+
+    async def recv_multipart(self) -> list[bytes]:
+        return await self.incoming.get()
+
+    async def send_multipart(self, parts: list[bytes]) -> None:
+        self.sent.append(parts)
+        self.reply_sent.set()
+
+    async def wait_for_replies(self, amount: int) -> None:
+        while len(self.sent) < amount:
+            self.reply_sent.clear()
+            await asyncio.wait_for(self.reply_sent.wait(), 1)
+
+
+class IpcDispatcherTests(_ApiTests):
+    @staticmethod
+    def _dispatcher(socket, handler, **kwargs) -> IPCDispatcher:
+        kwargs.setdefault("max_concurrency", 8)
+        kwargs.setdefault("default_timeout", 1)
+        return IPCDispatcher(socket, handler, **kwargs)
+
+    @test
+    async def slow_route_does_not_block_fast_route(self) -> None:
+        release = asyncio.Event()
+
+        async def handler(route: str, data: dict):
+            if route == "slow":
+                await release.wait()
+            return {"route": route}
+
+        socket = _FakeRouterSocket()
+        serving = asyncio.create_task(self._dispatcher(socket, handler).serve())
+        socket.request(b"client-a", "slow")
+        socket.request(b"client-b", "fast")
+
+        await socket.wait_for_replies(1)
+        assert socket.sent[0][0] == b"client-b", socket.sent
+        assert loads(socket.sent[0][-1]) == {"route": "fast"}
+
+        release.set()
+        await socket.wait_for_replies(2)
+        assert socket.sent[1][0] == b"client-a", socket.sent
+        assert socket.sent[1][1] == b"", socket.sent
+
+        serving.cancel()
+        await asyncio.gather(serving, return_exceptions=True)
+
+    @test
+    async def concurrency_limit_is_respected(self) -> None:
+        running = 0
+        peak = 0
+
+        async def handler(route: str, data: dict):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        socket = _FakeRouterSocket()
+        dispatcher = self._dispatcher(socket, handler, max_concurrency=2)
+        serving = asyncio.create_task(dispatcher.serve())
+        for i in range(6):
+            socket.request(str(i).encode(), "route")
+
+        await socket.wait_for_replies(6)
+        assert peak == 2, peak
+        assert all(loads(r[-1]) == {"status": "ok"} for r in socket.sent)
+
+        serving.cancel()
+        await asyncio.gather(serving, return_exceptions=True)
+        assert dispatcher.in_flight == 0, dispatcher.in_flight
+
+    @test
+    async def route_timeout_replies_with_error(self) -> None:
+        async def handler(route: str, data: dict):
+            await asyncio.sleep(1)
+
+        dispatcher = self._dispatcher(
+            _FakeRouterSocket(), handler, route_timeouts={"user_info": 0.01}
+        )
+        assert dispatcher.timeout_for("user/info") == 0.01
+        assert dispatcher.timeout_for("heartbeat") == 1
+
+        reply = await dispatcher.process(
+            [b"id", b"", b'\x00{"route": "user/info", "data": {}}']
+        )
+        assert reply[0] == b"id", reply
+        assert loads(reply[-1]) == {"error": "Route user/info timed out"}, reply
+
+    @test
+    async def process_error_replies(self) -> None:
+        async def handler(route: str, data: dict):
+            raise ValueError("User ID is required")
+
+        dispatcher = self._dispatcher(_FakeRouterSocket(), handler)
+        reply = await dispatcher.process(
+            [b"id", b"", b'{"route": "user/info", "data": {}}']
+        )
+        assert loads(reply[-1]) == {"error": "User ID is required"}, reply
+
+        reply = await dispatcher.process([b"id", b"", b"\x01"])
+        assert "Docker" in loads(reply[-1])["error"], reply
+
+        reply = await dispatcher.process([b"id", b"", b"not json"])
+        assert "error" in loads(reply[-1]), reply
+
+    @test
+    async def unknown_routes_share_a_label(self) -> None:
+        async def handler(route: str, data: dict):
+            if route != "heartbeat":
+                raise AttributeError(route)
+
+        dispatcher = self._dispatcher(
+            _FakeRouterSocket(), handler, is_route=lambda route: route == "heartbeat"
+        )
+        with patch("killua.utils.ipc.IPC_ROUTE_LATENCY") as latency:
+            for route in ("heartbeat", "hearbeat", "x" * 50):
+                await dispatcher.process(
+                    [b"id", b"", dumps({"route": route, "data": {}}).encode()]
+                )
+        labels = [c.args[0] for c in latency.labels.call_args_list]
+        assert labels == ["heartbeat", "unknown", "unknown"], labels
+
+        assert self.cog._has_route("heartbeat") and self.cog._has_route("news/save")
+        assert not self.cog._has_route("hearbeat") and not self.cog._has_route(None)
+
+    @test
+    async def call_route_uses_cog_method(self) -> None:
+        ipc = self.cog
+        assert await ipc._call_route("heartbeat", {}) == {"status": "ok"}
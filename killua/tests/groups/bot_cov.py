@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 from io import BytesIO
-from unittest.mock import AsyncMock
+from unittest.mock import AsyncMock, patch
 
 from PIL import Image
 
@@ -130,3 +130,19 @@ class BotHelperTests(_BotTests):
         Bot.session.get = AsyncMock(return_value=Resp())
         color = await Bot.find_dominant_color("http://example.test/x.png")
         assert isinstance(color, int)
+
+    @test
+    async def flush_command_usage_survives_db_errors(self) -> None:
+        from pymongo.errors import AutoReconnect
+
+        from ...static.constants import DB
+        from ...utils.checks import CommandUsageCache
+
+        CommandUsageCache.reset()
+        CommandUsageCache.add("1", 3)
+        with patch.object(
+            type(DB.const), "update_one", AsyncMock(side_effect=AutoReconnect())
+        ):
+            await Bot._flush_command_usage()
+        assert CommandUsageCache.pending == {"1": 3}
+        CommandUsageCache.reset()
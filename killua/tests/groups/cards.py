@@ -3,6 +3,7 @@ from __future__ import annotations
 from random import randint
 from math import ceil
 from datetime import datetime, timedelta
+from io import BytesIO
 from unittest.mock import patch
 
 from ..types import DiscordMember, Message, random_date
@@ -54,7 +55,12 @@ class TestingCards(Testing):
             from ...utils.classes.book import Book as BookClass
 
             async def _mock_create_image(self, data, restricted_slots, page):
-                return PILImage.new("RGBA", (620 * 2, 400 * 2), (255, 255, 255, 255))
+                buffer = BytesIO()
+                PILImage.new("RGBA", (620 * 2, 400 * 2), (255, 255, 255, 255)).save(
+                    buffer, "png"
+                )
+                buffer.seek(0)
+                return buffer
 
             BookClass.create_image = _mock_create_image
             TestingCards._cards_initialized = True
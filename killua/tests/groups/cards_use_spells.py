@@ -241,6 +241,30 @@ class UseSpell1021(TestingUseSpell):
             message_fragment="Stole card number",
         )
 
+    @test
+    async def releases_locks_while_defending(self) -> None:
+        target, tid = target_member(self, 50_024)
+        await setup_author_spell(self.base_author.id, 1021)
+        tu = await setup_target_user(tid, rs_cards=[STEAL_TARGET_CARD])
+        ensure_no_defense(tu)
+        locked = []
+
+        async def _wait_for_defense(_self, ctx, other, effects) -> None:
+            locked.append(
+                User.locks.locked(self.base_author.id) or User.locks.locked(tid)
+            )
+
+        with patch.object(Card, "_wait_for_defense", _wait_for_defense):
+            await invoke_use(self, 1021, target=target, args=STEAL_TARGET_CARD)
+        assert locked == [False], locked
+        await assert_steal_succeeded(
+            self.base_context,
+            self.base_author.id,
+            tid,
+            STEAL_TARGET_CARD,
+            message_fragment="Stole card number",
+        )
+
     @test
     async def target_lacks_card(self) -> None:
         target, _ = target_member(self, 50_022)
@@ -57,7 +57,6 @@ class EventsDeep(_DeepTests):
     @test
     async def events_date_and_author(self) -> None:
         events = Events(Bot)
-        assert events._date_helper(0) == 0
         ix = MagicMock()
         ix.user.id = self.base_author.id
         assert events.is_author(ix, str(self.base_author.id))
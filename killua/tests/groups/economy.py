@@ -387,3 +387,4 @@ class Leaderboard(TestingEconomy):
         assert "Top users" in emb[0].title
         assert "#1 `First` with `500` jenny" in emb[0].description
         assert "#2 `Second` with `300` jenny" in emb[0].description
+        assert emb[0].footer.text.startswith("You are #"), emb[0].footer.text
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+from datetime import datetime
 from unittest.mock import MagicMock, patch
 
 import discord
@@ -10,6 +11,7 @@ from discord.ext import commands
 from ..testing import Testing, test, collect_test_classes
 from ..types import Bot, DiscordMember
 from ...cogs.events import Events
+from ...utils.reminders import _slot
 from ...utils.classes.guild import Guild as KilluaGuild
 from ..harnesses import (
     ListenerFakeButton,
@@ -281,10 +283,9 @@ class CommandErrorTests(_EventsTests):
         assert (ctx.result.message.content or "") == "" or len(ctx.result.message.content or "") >= before
 
     @test
-    async def date_helper(self) -> None:
-        events = self.cog
-        assert events._date_helper(15) == 3
-        assert events._date_helper(9) == 9
+    async def reminder_slot(self) -> None:
+        assert _slot(datetime(2024, 1, 1, 15, 7)) == 3 * 60 + 7
+        assert _slot(datetime(2024, 1, 1, 9, 0)) == 9 * 60
 
     @test
     async def is_author_numeric(self) -> None:
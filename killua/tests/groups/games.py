@@ -8,6 +8,7 @@ from ...utils.classes import User
 from ..testing import Testing, test
 from ...cogs.games import Games
 from ...utils.test_db import TestingDatabase
+from ...utils.leaderboard import leaderboards
 from ..types.member import TestingMember
 
 
@@ -15,6 +16,9 @@ def _seed_teams(docs: list[dict]) -> None:
     TestingDatabase.db["teams"] = []
     for d in docs:
         TestingDatabase.db["teams"].append(d)
+    # Written past User, so the leaderboards would not know about them
+    for board in leaderboards.values():
+        board.clear()
 
 
 def _last_embed_title_description(message) -> tuple[str, str]:
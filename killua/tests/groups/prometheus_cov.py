@@ -7,7 +7,9 @@ from unittest.mock import AsyncMock, patch
 from ..testing import Testing, test, collect_test_classes
 from ..types import Bot
 from ...cogs.prometheus import PrometheusCog
+from ...metrics import LOCALE, TAGS, TODO_LISTS, TODOS
 from ...static.constants import API_ROUTES
+from ...utils.test_db import TestingDatabase
 
 
 class TestingPrometheus(Testing):
@@ -102,3 +104,86 @@ class PrometheusHandlerTests(_PromTests):
             cmd.extras["id"] = 1
         ctx.command = cmd
         await cog.on_command(ctx)
+
+
+class PrometheusAggregationTests(_PromTests):
+    @test
+    async def todo_and_tag_stats(self) -> None:
+        cog = PrometheusCog(Bot, port=9999)
+        TestingDatabase.db["todo"] = [
+            {"_id": 1, "todos": [{"todo": "a"}, {"todo": "b"}]},
+            {"_id": 2, "todos": []},
+            {"_id": 3},
+        ]
+        TestingDatabase.db["guilds"] = [
+            {"id": 1, "tags": [{"name": "a"}, {"name": "b"}, {"name": "c"}]},
+            {"id": 2},
+        ]
+        await cog.save_todo_stats()
+        await cog.save_tag_stats()
+        assert TODO_LISTS._value.get() == 3, TODO_LISTS._value.get()
+        assert TODOS._value.get() == 2, TODOS._value.get()
+        assert TAGS._value.get() == 3, TAGS._value.get()
+
+        TestingDatabase.db["todo"] = []
+        await cog.save_todo_stats()
+        assert TODOS._value.get() == 0
+
+    @test
+    async def locales_are_counted_by_label(self) -> None:
+        cog = PrometheusCog(Bot, port=9999)
+        TestingDatabase.db["teams"] = [
+            {"id": 1, "locale": "en-US"},
+            {"id": 2, "locale": "en-US"},
+            {"id": 3, "locale": "US"},
+            {"id": 4, "locale": "de"},
+            {"id": 5, "locale": None},
+            {"id": 6},
+        ]
+        await cog.save_locales()
+        assert LOCALE.labels("US")._value.get() == 3
+        assert LOCALE.labels("DE")._value.get() == 1
+
+    @test
+    async def groups_refresh_on_their_own_interval(self) -> None:
+        cog = PrometheusCog(Bot, port=9999)
+        calls = []
+        methods = [
+            "save_user_stats",
+            "save_todo_stats",
+            "save_tag_stats",
+            "save_card_stats",
+            "save_locales",
+            "update_api_stats",
+        ]
+        with patch.multiple(
+            cog,
+            **{m: AsyncMock(side_effect=lambda m=m: calls.append(m)) for m in methods},
+        ):
+            await cog.refresh_db_metrics()
+            assert len(calls) == 6, calls
+            await cog.refresh_db_metrics()
+            assert len(calls) == 6, calls
+
+            cog.refreshed_at["locales"] -= 60 * 60
+            await cog.refresh_db_metrics()
+            assert calls[6:] == ["save_locales"], calls
+            await cog.refresh_db_metrics(force=True)
+            assert len(calls) == 13, calls
+
+    @test
+    async def failing_group_does_not_stop_the_others(self) -> None:
+        cog = PrometheusCog(Bot, port=9999)
+        with patch.multiple(
+            cog,
+            save_user_stats=AsyncMock(side_effect=ValueError("boom")),
+            save_todo_stats=AsyncMock(),
+            save_tag_stats=AsyncMock(),
+            save_card_stats=AsyncMock(),
+            save_locales=AsyncMock(),
+            update_api_stats=AsyncMock(),
+        ):
+            await cog.refresh_db_metrics()
+            assert "users" not in cog.refreshed_at
+            assert "api" in cog.refreshed_at
+            cog.save_todo_stats.assert_awaited_once()
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import copy
 from datetime import datetime
 from unittest.mock import patch, AsyncMock
@@ -85,6 +86,27 @@ class Jenny(TestingShop):
             and "Jenny" in self.base_context.result.message.content
         ), self.base_context.result.message.content
 
+    @test
+    async def busy(self) -> None:
+        user = await User.new(self.base_author.id)
+        await user.add_jenny(100)
+        held, release = asyncio.Event(), asyncio.Event()
+
+        async def other_command() -> None:
+            async with User.locks.hold(user.id):
+                held.set()
+                await release.wait()
+
+        task = asyncio.create_task(other_command())
+        await held.wait()
+        with patch("killua.cogs.shop.USER_LOCK_TIMEOUT", 0.01):
+            await self.command(self.cog, self.base_context, TestingMember(), amount=10)
+        release.set()
+        await task
+        assert (
+            "busy with another command" in self.base_context.result.message.content
+        ), self.base_context.result.message.content
+
 
 class Lootbox(TestingShop):
 
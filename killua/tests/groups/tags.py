@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from copy import deepcopy
 from datetime import datetime
 from unittest.mock import patch
 
@@ -54,7 +55,7 @@ class TestingTags(Testing):
             "approximate_member_count": self.base_guild.member_count,
         }
         if tags is not None:
-            doc["tags"] = tag_list
+            doc["tags"] = deepcopy(tag_list)
         TestingDatabase.db[coll].append(doc)
 
     def _make_tag(self, name="test", content="test content", owner=None, uses=0):
@@ -89,6 +90,14 @@ class Get(TestingTags):
             self.base_context.result.message.content == "world"
         ), self.base_context.result.message.content
 
+    @test
+    async def counts_use(self) -> None:
+        self._seed_guild(tags=[self._make_tag(name="other"), self._make_tag(name="Hello")])
+        await self.command(self.cog, self.base_context, name="hello")
+        doc = await TestingDatabase("guilds").find_one({"id": self.base_guild.id})
+        assert [t["uses"] for t in doc["tags"]] == [0, 1], doc["tags"]
+        assert KilluaGuild.cache[self.base_guild.id].tags[1]["uses"] == 1
+
 
 class Delete(TestingTags):
 
@@ -182,6 +191,23 @@ class List(TestingTags):
             "Top tags of guild" in self.base_context.result.message.embeds[0].title
         ), self.base_context.result.message.embeds[0].title
 
+    @test
+    async def sorted_by_uses(self) -> None:
+        self._seed_guild(
+            tags=[
+                self._make_tag(name="rare", uses=1),
+                self._make_tag(name="popular", uses=9),
+                self._make_tag(name="Common", uses=4),
+            ]
+        )
+        await self.command(self.cog, self.base_context)
+        description = self.base_context.result.message.embeds[0].description
+        assert description.split("\n") == [
+            "Tag `popular` with `9` uses",
+            "Tag `Common` with `4` uses",
+            "Tag `rare` with `1` uses",
+        ], description
+
     @test
     async def list_paginator_next_page(self) -> None:
         """Paginator: tag list with >10 tags advances with next button."""
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
-from datetime import datetime
-from unittest.mock import AsyncMock, patch
+import asyncio
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
 
 from ..types import DiscordMember
 from ...utils.classes import User
@@ -288,6 +289,53 @@ class Add(TestingTodo):
         )
 
 
+    @test
+    async def add_with_due_date_notifies(self) -> None:
+        _clear_todo_state()
+        todo_list = await _make_list(self.base_author.id)
+        todo_list._bought.append("due_in")
+
+        await self.command(
+            self.cog, self.base_context, text="Call mom", due_in=timedelta(minutes=5)
+        )
+        assert "I'll remind you" in self.base_context.result.message.content, (
+            self.base_context.result.message.content
+        )
+        todo = todo_list.todos[-1]
+        assert TodoList.dues._lists[todo_list.id] == {1: todo["due_at"]}, TodoList.dues._lists
+
+        todo["due_at"] = datetime.now() - timedelta(seconds=1)
+        await todo_list.set_property("todos", todo_list.todos)
+        user = MagicMock()
+        user.send = AsyncMock()
+        with patch.object(self.cog.client, "get_user", MagicMock(return_value=user)):
+            await asyncio.wait_for(self.cog.check_todo_dues.coro(self.cog), 5)
+
+        user.send.assert_awaited_once()
+        assert todo_list.todos[-1]["notified"] is True
+        assert todo_list.id not in TodoList.dues._lists
+
+    @test
+    async def failed_due_notification_is_retried(self) -> None:
+        _clear_todo_state()
+        todo_list = await _make_list(self.base_author.id)
+        todo_list._bought.append("due_in")
+        await self.command(
+            self.cog, self.base_context, text="Call mom", due_in=timedelta(minutes=5)
+        )
+        todo = todo_list.todos[-1]
+        todo["due_at"] = datetime.now() - timedelta(seconds=1)
+        await todo_list.set_property("todos", todo_list.todos)
+
+        with patch.object(
+            self.cog.client, "get_user", MagicMock(side_effect=RuntimeError())
+        ):
+            await asyncio.wait_for(self.cog.check_todo_dues.coro(self.cog), 5)
+        assert not todo_list.todos[-1]["notified"]
+        assert TodoList.dues._retries[0][1] == (todo["due_at"], todo_list.id, 1)
+        TodoList.dues._retries.clear()
+
+
 class Remove(TestingTodo):
 
     def __init__(self):
@@ -2,24 +2,33 @@
 
 from __future__ import annotations
 
+import asyncio
+import contextvars
+import os
+import tempfile
+import time
 from datetime import datetime, timedelta
 from io import BytesIO
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import discord
 from PIL import Image
+from pymongo.errors import PyMongoError
 from discord.ext import commands
 from discord.ext.commands import BadArgument
 
 from ..testing import Testing, test, collect_test_classes, expect_raises
 from ..types import Bot, DiscordMember, Role
+from ...cogs.actions import Actions
 from ...cogs.economy import Economy
 from ...cogs.api import IPCRoutes
 from ...cogs.image_manipulation import ImageManipulation
-from ...static.constants import DB, daily_users
+from ...metrics import CARD_UPDATE_CONFLICTS
+from ...static.constants import ACTION_COLOR_RENDERS, DB, LOOTBOXES, daily_users
 from ...static.enums import Booster
 from ...utils.checks import (
     blcheck,
+    BlacklistCache,
     premium_guild_only,
     premium_user_only,
     CommandUsageCache,
@@ -28,6 +37,31 @@ from ...utils.checks import (
 from ...utils.classes import User, Guild
 from ...utils.classes.lootbox import LootBox
 from ...utils.classes.book import Book
+from ...utils.classes.card import Card
+from ...utils.asset_pool import AssetPool
+from ...utils.atlas import CardAtlas, CARD_SIZE
+from ...utils.card_catalog import CardCatalog, OwnedCardIndex
+from ...utils.card_collection import CardCollection
+from ...utils.cache import ObjectCache, BytesCache
+from ...utils.colors import DEFAULT_COLOR, DominantColorCache, dominant_color, normalize_url
+from ...utils.cooldowns import CooldownStore
+from ...utils.render import RenderExecutor, RenderQueueFull
+from ...utils.dau import DailyUserTracker, HyperLogLog
+from ...utils.leaderboard import (
+    BOARDS,
+    TopK,
+    create_indexes as create_leaderboard_indexes,
+    leaderboards,
+)
+from ...utils.locks import KeyedLocks, LockTimeout
+from ...utils.reminders import (
+    TodoDueQueue,
+    VoteReminderWheel,
+    create_indexes as create_reminder_indexes,
+    reminder_wheel,
+)
+from ...utils.test_db import TestingDatabase
+from ...utils.unit_of_work import UnitOfWork, current_unit_of_work
 from ...utils.converters import TimeConverter
 from ...utils.gif import TransparentAnimatedGifConverter, save_transparent_gif
 from ...utils.interactions import View, Modal, Button as KButton
@@ -121,6 +155,7 @@ class ChecksUnit(_UnitBoostTests):
     @test
     async def blcheck_not_listed(self) -> None:
         DB.const.db["const"] = [{"_id": "blacklist", "blacklist": []}]
+        BlacklistCache.reset()
         assert await blcheck(self.base_author.id) is False
 
     @test
@@ -131,7 +166,43 @@ class ChecksUnit(_UnitBoostTests):
                 "blacklist": [{"id": self.base_author.id, "reason": "x"}],
             }
         ]
-        assert await blcheck(self.base_author.id) is True
+        BlacklistCache.reset()
+        try:
+            assert await blcheck(self.base_author.id) is True
+        finally:
+            BlacklistCache.reset()
+
+    @test
+    async def blcheck_does_not_query_db_once_loaded(self) -> None:
+        DB.const.db["const"] = [{"_id": "blacklist", "blacklist": []}]
+        BlacklistCache.reset()
+        await blcheck(self.base_author.id)
+        with patch.object(
+            type(DB.const), "find_one", AsyncMock(side_effect=AssertionError("DB hit"))
+        ):
+            assert await blcheck(self.base_author.id) is False
+            BlacklistCache.add(self.base_author.id)
+            assert await blcheck(self.base_author.id) is True
+            BlacklistCache.remove(self.base_author.id)
+            assert await blcheck(self.base_author.id) is False
+
+    @test
+    async def blcheck_reloads_after_interval(self) -> None:
+        DB.const.db["const"] = [{"_id": "blacklist", "blacklist": []}]
+        BlacklistCache.reset()
+        with patch("killua.utils.checks.monotonic", return_value=0):
+            assert await blcheck(self.base_author.id) is False
+        DB.const.db["const"][0]["blacklist"].append({"id": self.base_author.id})
+        try:
+            with patch("killua.utils.checks.monotonic", return_value=1):
+                assert await blcheck(self.base_author.id) is False
+            with patch(
+                "killua.utils.checks.monotonic",
+                return_value=checks_module.BLACKLIST_REFRESH_INTERVAL + 1,
+            ):
+                assert await blcheck(self.base_author.id) is True
+        finally:
+            BlacklistCache.reset()
 
     @test
     async def premium_guild_denied(self) -> None:
@@ -171,12 +242,51 @@ class ChecksUnit(_UnitBoostTests):
 
     @test
     async def command_usage_cache(self) -> None:
-        cache = CommandUsageCache()
-        cache.data = {"1": 2}
-        assert cache.get("1", 0) == 2
-        assert "1" in cache
-        await cache.set("2", 5)
-        assert cache.data["2"] == 5
+        DB.const.db["const"] = [{"_id": "usage", "command_usage": {"1": 2}}]
+        CommandUsageCache.reset()
+        CommandUsageCache.add("1")
+        assert await CommandUsageCache.load() == {"1": 3}
+        CommandUsageCache.add("2", 5)
+        assert CommandUsageCache.get("2") == 5
+        assert CommandUsageCache.get("3") == 0
+        # Nothing is written until the cache is flushed
+        assert DB.const.db["const"][0]["command_usage"] == {"1": 2}
+
+    @test
+    async def command_usage_cache_flushes_once(self) -> None:
+        DB.const.db["const"] = [{"_id": "usage", "command_usage": {"1": 2}}]
+        CommandUsageCache.reset()
+        for _ in range(10):
+            CommandUsageCache.add("1")
+            CommandUsageCache.add("2")
+        updates = []
+        original = type(DB.const).update_one
+
+        async def _recording_update_one(db, where, update):
+            updates.append(update)
+            return await original(db, where, update)
+
+        with patch.object(type(DB.const), "update_one", _recording_update_one):
+            await CommandUsageCache.flush()
+            await CommandUsageCache.flush()
+        assert updates == [
+            {"$inc": {"command_usage.1": 10, "command_usage.2": 10}}
+        ], updates
+        assert DB.const.db["const"][0]["command_usage"] == {"1": 12, "2": 10}
+
+    @test
+    async def command_usage_cache_keeps_pending_on_failure(self) -> None:
+        CommandUsageCache.reset()
+        CommandUsageCache.add("1", 4)
+        with patch.object(
+            type(DB.const), "update_one", AsyncMock(side_effect=RuntimeError())
+        ):
+            try:
+                await CommandUsageCache.flush()
+            except RuntimeError:
+                pass
+        assert CommandUsageCache.pending == {"1": 4}
+        CommandUsageCache.reset()
 
     @test
     async def check_predicate_tracks_usage(self) -> None:
@@ -184,13 +294,17 @@ class ChecksUnit(_UnitBoostTests):
             {"_id": "blacklist", "blacklist": []},
             {"_id": "usage", "command_usage": {"99": 1}},
         ]
-        daily_users.users.clear()
-        checks_module.cooldowndict = {}
+        daily_users.rollover()
+        checks_module.cooldowns.clear()
         await Guild.new(self.base_guild.id)
         await User.new(self.base_author.id)
         ctx = _check_context(self)
+        CommandUsageCache.reset()
         pred = check(time=0).predicate
         assert await pred(ctx) is True
+        assert len(daily_users) == 1
+        assert CommandUsageCache.pending == {"99": 1}
+        await CommandUsageCache.flush()
         row = next(d for d in DB.const.db["const"] if d["_id"] == "usage")
         assert row["command_usage"]["99"] == 2
 
@@ -200,7 +314,7 @@ class ChecksUnit(_UnitBoostTests):
             {"_id": "blacklist", "blacklist": []},
             {"_id": "usage", "command_usage": {}},
         ]
-        checks_module.cooldowndict = {}
+        checks_module.cooldowns.clear()
         await Guild.new(self.base_guild.id)
         await User.new(self.base_author.id)
         ctx = _check_context(self)
@@ -222,7 +336,7 @@ class ChecksUnit(_UnitBoostTests):
             {"_id": "blacklist", "blacklist": []},
             {"_id": "usage", "command_usage": {}},
         ]
-        checks_module.cooldowndict = {}
+        checks_module.cooldowns.clear()
         guild = await Guild.new(self.base_guild.id)
         guild.commands = {"daily": _settings_doc(enabled=False, channel_id=self.base_channel.id)}
         await User.new(self.base_author.id)
@@ -236,7 +350,7 @@ class ChecksUnit(_UnitBoostTests):
             {"_id": "blacklist", "blacklist": []},
             {"_id": "usage", "command_usage": {}},
         ]
-        checks_module.cooldowndict = {}
+        checks_module.cooldowns.clear()
         guild = await Guild.new(self.base_guild.id)
         cid = str(self.base_channel.id)
         guild.commands = {
@@ -256,7 +370,7 @@ class ChecksUnit(_UnitBoostTests):
             {"_id": "blacklist", "blacklist": []},
             {"_id": "usage", "command_usage": {}},
         ]
-        checks_module.cooldowndict = {}
+        checks_module.cooldowns.clear()
         guild = await Guild.new(self.base_guild.id)
         guild.commands = {
             "daily": _settings_doc(channel_id=self.base_channel.id + 999)
@@ -272,7 +386,7 @@ class ChecksUnit(_UnitBoostTests):
             {"_id": "blacklist", "blacklist": []},
             {"_id": "usage", "command_usage": {}},
         ]
-        checks_module.cooldowndict = {}
+        checks_module.cooldowns.clear()
         Guild.cache.pop(self.base_guild.id, None)
         guild = await Guild.new(self.base_guild.id)
         rid = 88001
@@ -294,7 +408,7 @@ class ChecksUnit(_UnitBoostTests):
             {"_id": "blacklist", "blacklist": []},
             {"_id": "usage", "command_usage": {}},
         ]
-        checks_module.cooldowndict = {}
+        checks_module.cooldowns.clear()
         Guild.cache.pop(self.base_guild.id, None)
         guild = await Guild.new(self.base_guild.id)
         self.base_author.roles = [Role(id=88003, position=1)]
@@ -315,7 +429,7 @@ class ChecksUnit(_UnitBoostTests):
             {"_id": "blacklist", "blacklist": []},
             {"_id": "usage", "command_usage": {}},
         ]
-        checks_module.cooldowndict = {}
+        checks_module.cooldowns.clear()
         guild = await Guild.new(self.base_guild.id)
         guild.badges = ["premium"]
         await User.new(self.base_author.id)
@@ -333,12 +447,16 @@ class ChecksUnit(_UnitBoostTests):
             },
             {"_id": "usage", "command_usage": {}},
         ]
-        checks_module.cooldowndict = {}
+        BlacklistCache.reset()
+        checks_module.cooldowns.clear()
         await Guild.new(self.base_guild.id)
         await User.new(self.base_author.id)
         ctx = _check_context(self)
         pred = check(time=0).predicate
-        assert await pred(ctx) is False
+        try:
+            assert await pred(ctx) is False
+        finally:
+            BlacklistCache.reset()
 
     @test
     async def check_settings_allows_matching_role(self) -> None:
@@ -346,7 +464,7 @@ class ChecksUnit(_UnitBoostTests):
             {"_id": "blacklist", "blacklist": []},
             {"_id": "usage", "command_usage": {}},
         ]
-        checks_module.cooldowndict = {}
+        checks_module.cooldowns.clear()
         Guild.cache.pop(self.base_guild.id, None)
         guild = await Guild.new(self.base_guild.id)
         rid = 88002
@@ -369,7 +487,7 @@ class ChecksUnit(_UnitBoostTests):
             {"_id": "blacklist", "blacklist": []},
             {"_id": "usage", "command_usage": {}},
         ]
-        checks_module.cooldowndict = {}
+        checks_module.cooldowns.clear()
         Guild.cache.pop(self.base_guild.id, None)
         guild = await Guild.new(self.base_guild.id)
         ctx = _check_context(self)
@@ -390,8 +508,8 @@ class ChecksUnit(_UnitBoostTests):
             {"_id": "blacklist", "blacklist": []},
             {"_id": "usage", "command_usage": {}},
         ]
-        checks_module.cooldowndict = {}
-        daily_users.users.clear()
+        checks_module.cooldowns.clear()
+        daily_users.rollover()
         await User.new(self.base_author.id)
         ctx = _check_context(self)
         prev_guild = ctx.guild
@@ -408,7 +526,7 @@ class ChecksUnit(_UnitBoostTests):
             {"_id": "blacklist", "blacklist": []},
             {"_id": "usage", "command_usage": {}},
         ]
-        checks_module.cooldowndict = {}
+        checks_module.cooldowns.clear()
         await Guild.new(self.base_guild.id)
         await User.new(self.base_author.id)
         ctx = _check_context(self, command_name="daily", command_id="99")
@@ -429,13 +547,26 @@ class ChecksUnit(_UnitBoostTests):
         await Guild.new(self.base_guild.id)
         await User.new(self.base_author.id)
         ctx = _check_context(self)
-        checks_module.cooldowndict = {
-            self.base_author.id: {
-                "daily": datetime.now() - timedelta(seconds=200),
-            }
-        }
+        checks_module.cooldowns.clear()
         pred = check(time=60).predicate
-        assert await pred(ctx) is True
+        with patch("killua.utils.cooldowns.monotonic", return_value=0):
+            assert await pred(ctx) is True
+        with patch("killua.utils.cooldowns.monotonic", return_value=200):
+            assert await pred(ctx) is True
+
+    @test
+    async def check_cooldown_concurrent_calls(self) -> None:
+        DB.const.db["const"] = [
+            {"_id": "blacklist", "blacklist": []},
+            {"_id": "usage", "command_usage": {}},
+        ]
+        checks_module.cooldowns.clear()
+        await Guild.new(self.base_guild.id)
+        await User.new(self.base_author.id)
+        ctx = _check_context(self)
+        pred = check(time=120).predicate
+        results = await asyncio.gather(*(pred(ctx) for _ in range(5)))
+        assert results.count(True) == 1, results
 
     @test
     async def check_cooldown_premium_user_halves_wait(self) -> None:
@@ -443,7 +574,7 @@ class ChecksUnit(_UnitBoostTests):
             {"_id": "blacklist", "blacklist": []},
             {"_id": "usage", "command_usage": {}},
         ]
-        checks_module.cooldowndict = {}
+        checks_module.cooldowns.clear()
         await Guild.new(self.base_guild.id)
         uid = self.base_author.id
         await User.new(uid)
@@ -460,7 +591,7 @@ class ChecksUnit(_UnitBoostTests):
             {"_id": "blacklist", "blacklist": []},
             {"_id": "usage", "command_usage": {"99": 0}},
         ]
-        checks_module.cooldowndict = {}
+        checks_module.cooldowns.clear()
         Guild.cache.pop(self.base_guild.id, None)
         await Guild.new(self.base_guild.id)
         await User.new(self.base_author.id)
@@ -468,8 +599,10 @@ class ChecksUnit(_UnitBoostTests):
         ctx.command = MagicMock(spec=commands.HybridGroup)
         ctx.command.name = "daily"
         ctx.command.extras = {"id": "99"}
+        CommandUsageCache.reset()
         pred = check(time=0).predicate
         assert await pred(ctx) is True
+        await CommandUsageCache.flush()
         row = next(d for d in DB.const.db["const"] if d["_id"] == "usage")
         assert row["command_usage"]["99"] == 0
 
@@ -479,7 +612,7 @@ class ChecksUnit(_UnitBoostTests):
             {"_id": "blacklist", "blacklist": []},
             {"_id": "usage", "command_usage": {}},
         ]
-        checks_module.cooldowndict = {}
+        checks_module.cooldowns.clear()
         Guild.cache.pop(self.base_guild.id, None)
         await Guild.new(self.base_guild.id)
         user = await User.new(self.base_author.id)
@@ -501,7 +634,7 @@ class ChecksUnit(_UnitBoostTests):
             {"_id": "blacklist", "blacklist": []},
             {"_id": "usage", "command_usage": {}},
         ]
-        checks_module.cooldowndict = {}
+        checks_module.cooldowns.clear()
         guild = await Guild.new(self.base_guild.id)
         guild.commands = {"daily": "broken"}
         await User.new(self.base_author.id)
@@ -527,8 +660,10 @@ class BookUnit(_UnitBoostTests):
         bg = await book._get_background(0)
         assert bg.size[0] > 0
         book.card_cache["1"] = cached
-        data = [(1, "http://cards.example/1.png")]
-        merged = await book._cards(bg.copy(), data, option=0)
+        data = [(1, "http://cards.example/1.png"), (2, None)]
+        cards = await book._get_cards(data)
+        assert cards == [cached, None]
+        merged = book._paste_cards(bg.copy(), cards, option=0)
         assert merged.size == bg.size
 
     @test
@@ -545,7 +680,7 @@ class BookUnit(_UnitBoostTests):
             [i, None if i % 2 else "http://cards.example/card.png"]
             for i in range(1, 11)
         ]
-        img = await book.create_image(data, restricted_slots=True, page=1)
+        img = Image.open(await book.create_image(data, restricted_slots=True, page=1))
         assert img.size[0] > 0
 
     @test
@@ -588,7 +723,7 @@ class BookUnit(_UnitBoostTests):
             [i, None if i % 2 else "http://cards.example/card.png"]
             for i in range(1, 11)
         ]
-        img = await book.create_image(data, restricted_slots=True, page=1)
+        img = Image.open(await book.create_image(data, restricted_slots=True, page=1))
         assert img.size[0] > 0
 
     @test
@@ -605,6 +740,660 @@ class BookUnit(_UnitBoostTests):
         assert card.size[0] > 0
 
 
+class BookPageCacheUnit(_UnitBoostTests):
+    @test
+    async def page_is_rendered_once(self) -> None:
+        user = await User.new(self.base_author.id)
+        await user.nuke_cards("all")
+        Book.page_cache.clear()
+        book = Book(Bot)
+        render = AsyncMock(side_effect=lambda *_: BytesIO(b"page"))
+        with patch.object(Book, "create_image", render):
+            for page in (1, 2, 1, 2):
+                _, f = await book.create(self.base_author, page)
+                assert f.fp.read() == b"page"
+            assert render.await_count == 2, render.await_count
+
+            # A new card on the page changes it, a card on another page does not
+            await user.add_card(1)
+            await book.create(self.base_author, 1)
+            await book.create(self.base_author, 2)
+            assert render.await_count == 3, render.await_count
+
+            # So does fetching the card data again or replacing a card image
+            Card.load(list(Card.raw))
+            await book.create(self.base_author, 1)
+            assert render.await_count == 4, render.await_count
+            with tempfile.TemporaryDirectory() as tmp:
+                atlas = CardAtlas(tmp)
+                with patch.object(Book, "atlas", atlas):
+                    await book.create(self.base_author, 1)
+                    atlas.set(1, "/cards/1.png", CardAtlas.create_thumbnails(CardAtlasUnit._png((1, 1, 1, 255)), (1, 2)))
+                    await book.create(self.base_author, 1)
+            assert render.await_count == 6, render.await_count
+        await user.nuke_cards("all")
+
+    @test
+    async def bytes_cache_budget(self) -> None:
+        cache = BytesCache("test", max_bytes=10)
+        cache.set("a", b"1234")
+        cache.set("b", b"1234")
+        assert cache.get("a") == b"1234"  # "b" is now the least recently used
+        cache.set("c", b"1234")
+        assert "b" not in cache
+        assert cache.size == 8 and len(cache) == 2
+        cache.set("a", b"12")
+        assert cache.size == 6
+        cache.set("too big", b"x" * 11)
+        assert "too big" not in cache and len(cache) == 2
+        assert cache.get("missing") is None
+        cache.clear()
+        assert cache.size == 0 and len(cache) == 0
+
+
+class CardAtlasUnit(_UnitBoostTests):
+    @staticmethod
+    def _png(colour: tuple[int, int, int, int]) -> bytes:
+        buf = BytesIO()
+        Image.new("RGBA", (200, 280), colour).save(buf, format="PNG")
+        return buf.getvalue()
+
+    @test
+    async def set_get_and_reload(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            atlas = CardAtlas(tmp)
+            cards = [{"id": n, "image": f"/cards/{n}.png"} for n in range(3)]
+            assert atlas.outdated(cards) == cards
+            for n, colour in enumerate([(255, 0, 0, 255), (0, 255, 0, 255), (0, 0, 255, 255)]):
+                atlas.set(n, f"/cards/{n}.png", CardAtlas.create_thumbnails(self._png(colour), (1, 2)))
+            atlas.save()
+
+            reloaded = CardAtlas(tmp)
+            assert reloaded.outdated(cards) == []
+            small, big = reloaded.get(1, 1), reloaded.get(1, 2)
+            assert small.size == CARD_SIZE
+            assert big.size == (CARD_SIZE[0] * 2, CARD_SIZE[1] * 2)
+            assert big.getpixel((10, 10)) == (0, 255, 0, 255)
+            assert reloaded.get(99, 2) is None
+
+    @test
+    async def only_changed_cards_are_outdated(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            atlas = CardAtlas(tmp)
+            thumbnails = CardAtlas.create_thumbnails(self._png((1, 2, 3, 255)), (1, 2))
+            for n in range(5):  # More than the first sheet can hold, so it has to grow
+                atlas.set(n, f"/cards/{n}.png", thumbnails)
+            atlas.save()
+
+            cards = [{"id": n, "image": f"/cards/{n}.png"} for n in range(5)]
+            cards[2]["image"] = "/cards/2_v2.png"
+            cards.append({"id": 5, "image": "/cards/5.png"})
+            assert CardAtlas(tmp).outdated(cards) == [cards[2], cards[5]]
+
+            atlas.set(2, "/cards/2_v2.png", CardAtlas.create_thumbnails(self._png((9, 9, 9, 255)), (1, 2)))
+            assert len(atlas) == 5
+            assert atlas.get(2, 1).getpixel((0, 0)) == (9, 9, 9, 255)
+            assert atlas.get(3, 1).getpixel((0, 0)) == (1, 2, 3, 255)
+
+    @test
+    async def book_uses_atlas_without_downloading(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            atlas = CardAtlas(tmp)
+            atlas.set(7, "/cards/7.png", CardAtlas.create_thumbnails(self._png((5, 5, 5, 255)), (1, 2)))
+            book = Book(Bot)
+            with patch.object(Book, "atlas", atlas), patch.object(
+                Book, "_get_card", AsyncMock(side_effect=AssertionError("downloaded"))
+            ):
+                cards = await book._get_cards([[7, "http://cards.example/7.png"], [8, None]])
+            assert cards[0].size == (CARD_SIZE[0] * book.scalar, CARD_SIZE[1] * book.scalar)
+            assert cards[1] is None
+
+
+class CardCatalogUnit(_UnitBoostTests):
+    RAW = [
+        {"id": 1, "name": "Bug", "rank": "A", "type": "normal", "available": True},
+        {"id": 2, "name": "bubble", "rank": "B", "type": "spell", "available": True},
+        {"id": 3, "name": "Apple", "rank": "A", "type": "spell", "available": False},
+        {"id": 4, "name": "Bu", "rank": "C", "type": "monster"},
+    ]
+
+    @test
+    async def looks_up_by_id_and_name(self) -> None:
+        catalog = CardCatalog(self.RAW)
+        assert catalog.get(2)["name"] == "bubble"
+        assert catalog.get("3")["name"] == "Apple"
+        assert catalog.get("BUBBLE")["id"] == 2
+        assert catalog.get("nope") is None and catalog.get(99) is None
+        assert len(catalog) == 4
+
+    @test
+    async def selects_from_indexes_in_order(self) -> None:
+        catalog = CardCatalog(self.RAW)
+        ids = lambda cards: [c["id"] for c in cards]
+        assert ids(catalog.select(types=["spell"])) == [2, 3]
+        assert ids(catalog.select(types=["spell"], available=True)) == [2]
+        assert ids(catalog.select(ranks=["A", "C"])) == [1, 3, 4]
+        assert ids(catalog.select(available=False)) == [3]
+        assert ids(catalog.select(types=["unknown"])) == []
+
+    @test
+    async def card_uses_the_current_data(self) -> None:
+        raw, catalog = Card.raw, Card._catalog
+        try:
+            Card.load(self.RAW)
+            assert Card.catalog().get("apple")["id"] == 3
+            Card.raw = self.RAW[:1]  # Replaced without load
+            assert Card.catalog().get("apple") is None
+        finally:
+            Card.raw, Card._catalog = raw, catalog
+
+
+class OwnedCardIndexUnit(_UnitBoostTests):
+    RAW = CardCatalogUnit.RAW + [
+        {"id": 12, "name": "Bugged", "rank": "C", "type": "spell"},
+    ]
+
+    @test
+    async def completes_names_then_ids(self) -> None:
+        index = OwnedCardIndex([12, 1, 1, 2, 4, 99], CardCatalog(self.RAW))
+        assert len(index) == 4  # Duplicates and unknown cards are left out
+        assert index.complete("bu") == [("Bu", 4), ("bubble", 2), ("Bug", 1), ("Bugged", 12)]
+        assert index.complete("1") == [("1", 1), ("12", 12)]
+        assert index.complete("BUG", lambda card_id: card_id != 1) == [("Bugged", 12)]
+        assert index.complete("", limit=2) == [("Bu", 4), ("bubble", 2)]
+
+    @test
+    async def rebuilt_when_cards_change(self) -> None:
+        raw, catalog = Card.raw, Card._catalog
+        try:
+            Card.load(self.RAW)
+            user = await User.new(self.base_author.id)
+            user.all_cards = []
+            await user.add_card(1)
+            assert [c.name for c in await Card.owned_choices(user.id, "b")] == ["Bug"]
+
+            await user.remove_card(1)
+            await user.add_card(2)
+            assert [c.name for c in await Card.owned_choices(user.id, "b")] == ["bubble"]
+
+            user.fs_cards.append([12, {"fake": False, "clone": False}])
+            assert [c.value for c in await Card.owned_choices(user.id, "")] == ["2", "12"]
+        finally:
+            Card.raw, Card._catalog = raw, catalog
+            (await User.new(self.base_author.id)).all_cards = []
+
+
+class CardCollectionUnit(_UnitBoostTests):
+    DOC = [
+        [5, {"fake": False, "clone": False}],
+        [5, {"fake": True, "clone": False}],
+        [7, {"fake": False, "clone": True}],
+        [9, {"fake": True, "clone": True}],
+    ]
+
+    @test
+    async def converts_losslessly(self) -> None:
+        cards = CardCollection(self.DOC)
+        assert cards.to_list() == self.DOC
+        assert cards == self.DOC and cards == CardCollection(self.DOC)
+        assert cards[-1] == [9, {"fake": True, "clone": True}]
+        assert [5, {"fake": True, "clone": False}] in cards
+        assert [7, {"fake": True, "clone": False}] not in cards
+        assert len(cards) == 4 and sorted(cards.ids) == [5, 7, 9]
+
+    @test
+    async def counts_as_cards_change(self) -> None:
+        cards = CardCollection(self.DOC)
+        assert cards.count(5) == 2 and cards.count(5, including_fakes=False) == 1
+        assert cards.real_count == 2
+        assert cards.has(9) and not cards.has(9, fake_allowed=False)
+        assert cards.has(5, only_allow_fakes=True) and not cards.has(7, only_allow_fakes=True)
+
+        cards.remove([5, {"fake": False, "clone": False}])
+        assert cards.real_count == 1 and cards.count(5, including_fakes=False) == 0
+        assert cards.find(5, fake=False) is None and cards.find(5) == 0
+        del cards[cards.find(9)]
+        assert not cards.has(9) and 9 not in cards.ids
+        cards.append([11, {"fake": False, "clone": False}])
+        assert cards.real_count == 2
+        async with expect_raises(ValueError):
+            cards.remove([11, {"fake": True, "clone": False}])
+
+    @test
+    async def user_keeps_cards_compact(self) -> None:
+        user = await User.new(self.base_author.id)
+        user.rs_cards = [[3, {"fake": False, "clone": False}]]
+        assert isinstance(user.rs_cards, CardCollection)
+        user.all_cards = []
+        assert isinstance(user.fs_cards, CardCollection) and len(user.fs_cards) == 0
+
+        await user.add_multi([3, {"fake": False, "clone": False}], [1001, {"fake": True, "clone": False}])
+        assert user.count_card(1001) == 1 and user.count_card(1001, including_fakes=False) == 0
+        doc = await DB.teams.find_one({"id": user.id})
+        assert doc["cards"]["fs"] == [[1001, {"fake": True, "clone": False}]], doc["cards"]
+        user.all_cards = []
+
+    @test
+    async def leaving_a_full_book_removes_card_0(self) -> None:
+        user = await User.new(self.base_author.id)
+        user.all_cards = []
+        await user.add_multi(*[[i, {"fake": False, "clone": False}] for i in range(1, 99)])
+        await user.add_card(99)
+        assert user.has_rs_card(0) and user.rs_cards.real_count == 100
+        assert "greed_island_badge" not in user.badges
+
+        await user.remove_card(42)
+        assert not user.has_rs_card(0) and user.rs_cards.real_count == 98
+        user.all_cards = []
+
+
+class CardVersionUnit(_UnitBoostTests):
+    REAL = {"fake": False, "clone": False}
+
+    async def _user(self, fs: list) -> User:
+        user = await User.new(self.base_author.id)
+        await user.nuke_cards()
+        await user.add_multi(*fs)
+        return user
+
+    @test
+    async def removes_one_of_identical_copies(self) -> None:
+        user = await self._user([[1005, self.REAL], [1005, self.REAL], [1007, self.REAL]])
+        version = user.cards_version
+        await user.remove_card(1005, restricted_slot=False)
+        doc = await DB.teams.find_one({"id": user.id})
+        assert doc["cards"]["fs"] == [[1005, self.REAL], [1007, self.REAL]], doc["cards"]
+        assert doc["cards"]["version"] == user.cards_version == version + 1, doc["cards"]
+
+        await user.bulk_remove([[1007, self.REAL], [1005, self.REAL], [1009, self.REAL]])
+        doc = await DB.teams.find_one({"id": user.id})
+        assert doc["cards"]["fs"] == [] and len(user.fs_cards) == 0, doc["cards"]
+        await user.nuke_cards()
+
+    @test
+    async def removes_nothing_from_empty_slots(self) -> None:
+        user = await self._user([])
+        version = user.cards_version
+        # Like Card 1024 does with a target without any free slot cards
+        await user.bulk_remove([[1005, self.REAL]])
+        await user.bulk_remove([], fs_slots=False)
+        assert user.cards_version == version
+
+        await user.add_multi([1005, self.REAL], [1007, self.REAL])
+        await user.bulk_remove([[1007, self.REAL]])
+        doc = await DB.teams.find_one({"id": user.id})
+        assert doc["cards"]["fs"] == [[1005, self.REAL]] == user.fs_cards, doc["cards"]
+        await user.remove_card(1005, restricted_slot=False)
+        doc = await DB.teams.find_one({"id": user.id})
+        assert doc["cards"]["fs"] == [] and len(user.fs_cards) == 0, doc["cards"]
+        await user.nuke_cards()
+
+    @test
+    async def reloads_cards_changed_elsewhere(self) -> None:
+        user = await self._user([[1005, self.REAL]])
+        conflicts = CARD_UPDATE_CONFLICTS._value.get()
+        # Another process adds a card the user object does not know about
+        await DB.teams.update_one(
+            {"id": user.id},
+            {"$push": {"cards.fs": [1007, self.REAL]}, "$inc": {"cards.version": 1}},
+        )
+        await user.add_card(1009)
+        assert CARD_UPDATE_CONFLICTS._value.get() == conflicts + 1
+        doc = await DB.teams.find_one({"id": user.id})
+        assert user.fs_cards == doc["cards"]["fs"] == [
+            [1005, self.REAL],
+            [1007, self.REAL],
+            [1009, self.REAL],
+        ], doc["cards"]
+        assert user.cards_version == doc["cards"]["version"]
+        await user.nuke_cards()
+
+    @test
+    async def swaps_in_place(self) -> None:
+        user = await self._user([[1005, self.REAL]])
+        await user.add_card(5, fake=True)
+        await user.add_card(5)
+        assert await user.swap(5) is None
+        doc = await DB.teams.find_one({"id": user.id})
+        assert doc["cards"]["rs"] == [[5, self.REAL]] == user.rs_cards, doc["cards"]
+        assert doc["cards"]["fs"] == [
+            [1005, self.REAL],
+            [5, {"fake": True, "clone": False}],
+        ] == user.fs_cards, doc["cards"]
+        assert await user.swap(1005) is False
+        await user.nuke_cards()
+
+
+class UnitOfWorkUnit(_UnitBoostTests):
+    @test
+    async def merges_updates(self) -> None:
+        unit = UnitOfWork()
+        unit.add("teams", {"id": 1}, {"$inc": {"points": 5}})
+        unit.add("teams", {"id": 1}, {"$inc": {"points": 2}, "$set": {"votes": 1}})
+        unit.add("teams", {"id": 1}, {"$push": {"cards.fs": [1, {}]}})
+        unit.add("teams", {"id": 1}, {"$push": {"cards.fs": {"$each": [[2, {}]]}}})
+        assert len(unit) == 1
+        assert unit._pending[0][2] == {
+            "$inc": {"points": 7},
+            "$set": {"votes": 1},
+            "$push": {"cards.fs": {"$each": [[1, {}], [2, {}]]}},
+        }, unit._pending
+
+        # Touches a field another operator of the same update changes
+        unit.add("teams", {"id": 1}, {"$pull": {"cards.fs": [1, {}]}})
+        assert len(unit) == 2, unit._pending
+        unit.add("teams", {"id": 2}, {"$set": {"votes": 1}})
+        unit.add("teams", {"id": 1}, {"$set": {"locale": "de"}})
+        unit.add("teams", {"id": 2}, {"$set": {"votes": 2}})
+        assert [update for _, _, update in unit._pending[1:]] == [
+            {"$pull": {"cards.fs": [1, {}]}, "$set": {"locale": "de"}},
+            {"$set": {"votes": 2}},
+        ], unit._pending
+        # A tag filter is a different filter for the same document
+        unit.add("guilds", {"id": 2, "tags.name": "a"}, {"$inc": {"tags.$.uses": 1}})
+        unit.add("guilds", {"id": 2}, {"$set": {"prefix": "!"}})
+        assert len(unit) == 5, unit._pending
+
+    @test
+    async def writes_when_left(self) -> None:
+        user = await User.new(self.base_author.id)
+        other = await User.new(self.base_author.id + 1)
+        await user.nuke_cards()
+        jenny, other_jenny = user.jenny, other.jenny
+
+        async with User.batch() as unit:
+            await user.add_jenny(10)
+            await user.add_card(1005)
+            await other.add_jenny(5)
+            async with User.batch() as inner:
+                assert inner is unit and current_unit_of_work() is unit
+                await user.add_jenny(1)
+            assert len(unit) == 2, unit._pending
+            doc = await DB.teams.find_one({"id": user.id})
+            assert doc["points"] == jenny and doc["cards"]["fs"] == [], doc
+
+        assert current_unit_of_work() is None
+        doc = await DB.teams.find_one({"id": user.id})
+        assert doc["points"] == jenny + 11 and doc["cards"]["fs"] == user.fs_cards
+        assert doc["cards"]["version"] == user.cards_version, doc["cards"]
+        assert (await DB.teams.find_one({"id": other.id}))["points"] == other_jenny + 5
+        await user.nuke_cards()
+
+    @test
+    async def writes_before_removing_cards(self) -> None:
+        user = await User.new(self.base_author.id)
+        await user.nuke_cards()
+        async with User.batch() as unit:
+            await user.add_card(1005)
+            await user.add_card(1007)
+            await user.remove_card(1005)
+            assert len(unit) == 0
+            doc = await DB.teams.find_one({"id": user.id})
+            assert doc["cards"]["fs"] == [[1007, {"fake": False, "clone": False}]]
+            assert doc["cards"]["version"] == user.cards_version, doc["cards"]
+        await user.nuke_cards()
+
+    @test
+    async def counts_added_cards_once_written(self) -> None:
+        user = await User.new(self.base_author.id)
+        await user.nuke_cards()
+        version = user.cards_version
+        async with User.batch():
+            await user.add_card(1005)
+            await user.add_card(1006)
+            assert user.cards_version == version
+            # Another command adding a card before the batch is written
+            await asyncio.create_task(user.add_card(1007), context=contextvars.Context())
+        doc = await DB.teams.find_one({"id": user.id})
+        assert doc["cards"]["version"] == user.cards_version == version + 3, doc["cards"]
+        assert doc["cards"]["fs"] == user.fs_cards.to_list(), (doc["cards"], user.fs_cards)
+
+        async with User.batch():
+            await user.add_card(1008)
+        assert user.cards_version == version + 4
+        await user.nuke_cards()
+
+
+class KeyedLocksUnit(_UnitBoostTests):
+    @test
+    async def holds_keys_one_at_a_time(self) -> None:
+        locks = KeyedLocks("test")
+        order = []
+
+        async def run(name: str, *keys: int) -> None:
+            async with locks.hold(*keys):
+                order.append(f"{name} start")
+                await asyncio.sleep(0.01)
+                order.append(f"{name} end")
+
+        # Locked in opposite orders, which would deadlock without sorting the keys
+        await asyncio.wait_for(
+            asyncio.gather(run("a", 1, 2), run("b", 2, 1), run("c", 3)), 1
+        )
+        assert order.index("a end") < order.index("b start"), order
+        assert order.index("c start") < order.index("a end"), order
+        assert len(locks) == 0
+
+    @test
+    async def is_reentrant_for_the_holding_task(self) -> None:
+        locks = KeyedLocks("test")
+        async with locks.hold(1):
+            async with locks.hold(2, 1):
+                assert locks.locked(1) and locks.locked(2) and len(locks) == 2
+            assert locks.locked(1) and not locks.locked(2)
+        assert len(locks) == 0
+
+    @test
+    async def times_out_without_holding_anything(self) -> None:
+        locks = KeyedLocks("test")
+        async with locks.hold(2):
+            async with expect_raises(LockTimeout):
+                await asyncio.create_task(self._hold(locks, 1, 2))
+            assert not locks.locked(1) and len(locks) == 1
+        assert len(locks) == 0
+
+    @staticmethod
+    async def _hold(locks: KeyedLocks, *keys: int) -> None:
+        async with locks.hold(*keys, timeout=0.01):
+            pass
+
+
+class DominantColorUnit(_UnitBoostTests):
+    @staticmethod
+    def _png(image: Image.Image) -> bytes:
+        buf = BytesIO()
+        image.save(buf, format="PNG")
+        return buf.getvalue()
+
+    @test
+    async def normalizes_signed_urls(self) -> None:
+        url = "https://CDN.discordapp.com/a/b.png?ex=1&is=2&hm=abc&size=64#x"
+        assert normalize_url(url) == "https://cdn.discordapp.com/a/b.png?size=64"
+        assert normalize_url("https://api.killua.dev/image/x.gif?token=a&expiry=3") == (
+            "https://api.killua.dev/image/x.gif"
+        )
+
+    @test
+    async def finds_the_most_common_color(self) -> None:
+        image = Image.new("RGB", (10, 10), (250, 0, 0))
+        # Close shades of blue together cover more than the red
+        for x in range(10):
+            for y in range(6):
+                image.putpixel((x, y), (0, 0, 240 + y))
+        assert dominant_color(self._png(image)) in [0x0000F0 + y for y in range(6)]
+        assert dominant_color(self._png(Image.new("RGB", (3, 3), "red"))) == 0xFF0000
+        assert dominant_color(self._png(Image.new("L", (3, 3), 255))) == 0xFFFFFF
+
+    @test
+    async def shares_and_bounds_colors(self) -> None:
+        cache = DominantColorCache(max_size=2)
+        calls = []
+
+        async def compute() -> int:
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return 0x123456
+
+        colors = await asyncio.gather(
+            cache.get_or_compute("https://x.test/a.png?ex=1", compute),
+            cache.get_or_compute("https://x.test/a.png?ex=2", compute),
+        )
+        assert colors == [0x123456, 0x123456] and len(calls) == 1
+
+        async def unreadable() -> None:
+            return None
+
+        assert await cache.get_or_compute("https://x.test/b.png", unreadable) == DEFAULT_COLOR
+        assert "https://x.test/b.png" not in cache
+        cache.set("https://x.test/c.png", 1)
+        cache.set("https://x.test/d.png", 2)
+        assert len(cache) == 2 and "https://x.test/a.png" not in cache
+
+    @test
+    async def survives_restarts(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "colors.json")
+            cache = DominantColorCache(max_size=2, path=path)
+            for i, url in enumerate(["https://x.test/a", "https://x.test/b", "https://x.test/c"]):
+                cache.set(url, i)
+            cache.get("https://x.test/b")
+            cache.save()
+
+            loaded = DominantColorCache(max_size=1, path=path)
+            loaded.load()
+            assert len(loaded) == 1 and loaded.get("https://x.test/b") == 1
+
+    @test
+    async def keeps_unsaved_colors_after_failing_to_save(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "missing", "colors.json")
+            cache = DominantColorCache(max_size=2, path=path)
+            cache.set("https://x.test/a", 1)
+            cache.save()
+            assert cache._changed and not os.path.exists(path)
+
+            os.mkdir(os.path.dirname(path))
+            cache.save()
+            assert not cache._changed and os.path.exists(path)
+
+
+class AssetPoolUnit(_UnitBoostTests):
+    @staticmethod
+    def _pool(fetch, **kwargs) -> AssetPool[int]:
+        options = dict(size=4, low_water=1, backoff=60, max_backoff=600)
+        options.update(kwargs)
+        return AssetPool("test", fetch, **options)
+
+    @test
+    async def refills_below_low_water(self) -> None:
+        amounts, counter = [], iter(range(100))
+
+        async def fetch(amount: int) -> list[int]:
+            amounts.append(amount)
+            return [next(counter) for _ in range(amount)]
+
+        pool = self._pool(fetch)
+        assert await pool.take() == 0 and amounts == [4] and len(pool) == 3
+        assert [await pool.take(), await pool.take()] == [1, 2]
+        # Only one left, so the rest are fetched without anyone waiting for them
+        assert amounts == [4]
+        await asyncio.sleep(0.01)
+        assert amounts == [4, 3] and len(pool) == 4 and await pool.take() == 3
+
+    @test
+    async def shares_one_refill(self) -> None:
+        calls = []
+
+        async def fetch(amount: int) -> list[int]:
+            calls.append(amount)
+            await asyncio.sleep(0.01)
+            return list(range(amount))
+
+        pool = self._pool(fetch, low_water=0)
+        assert sorted(await asyncio.gather(*[pool.take() for _ in range(3)])) == [0, 1, 2]
+        assert calls == [4]
+
+    @test
+    async def backs_off_after_errors(self) -> None:
+        failing = True
+        calls = []
+
+        async def fetch(amount: int) -> list[int]:
+            calls.append(amount)
+            if failing:
+                raise ValueError("down")
+            return list(range(amount))
+
+        pool = self._pool(fetch, size=2, low_water=0)
+        async with expect_raises(ValueError):
+            await pool.take()
+        assert pool._failures == 1 and pool._retry_at > time.monotonic()
+
+        # An empty pool still asks the API, only the background refills wait
+        failing = False
+        assert await pool.take() == 0 and pool._failures == 0
+        failing = True
+        assert await pool.take() == 1
+        await asyncio.sleep(0.01)
+        assert pool._failures == 1 and len(calls) == 3
+
+        pool._assets.extend([5, 6])
+        assert [await pool.take(), await pool.take()] == [5, 6]
+        await asyncio.sleep(0.01)
+        assert len(calls) == 3  # Still backing off
+
+
+    @test
+    async def serves_actions_before_their_colors(self) -> None:
+        class Resp:
+            status = 200
+
+            async def json(self):
+                return {
+                    "results": [
+                        {"url": f"https://x.test/{i}.gif", "anime_name": "x"}
+                        for i in range(3)
+                    ]
+                }
+
+        cog = Actions(Bot)
+        cog.session = MagicMock(get=AsyncMock(return_value=Resp()))
+        readable = asyncio.Event()
+
+        async def find_dominant_color(url: str) -> int:
+            await readable.wait()
+            raise ValueError("Not an image")
+
+        with patch.object(Bot, "find_dominant_color", find_dominant_color):
+            asset = await cog.request_action("pat")
+            assert asset["url"] == "https://x.test/0.gif" and len(cog.pools["pat"]) == 2
+            assert len(cog._coloring) == 1
+            # Images that can't be read don't cost the pool the others
+            readable.set()
+            await asyncio.sleep(0.01)
+            assert not cog._coloring and len(cog.pools["pat"]) == 5
+        await cog.cog_unload()
+
+    @test
+    async def finds_few_colors_at_once(self) -> None:
+        cog = Actions(Bot)
+        running = most = 0
+
+        async def find_dominant_color(url: str) -> int:
+            nonlocal running, most
+            running += 1
+            most = max(most, running)
+            await asyncio.sleep(0)
+            running -= 1
+            return 0
+
+        assets = [{"url": f"https://x.test/{i}.gif", "anime_name": "x"} for i in range(20)]
+        with patch.object(Bot, "find_dominant_color", find_dominant_color):
+            # Two endpoints refilling at the same time
+            await asyncio.gather(cog._find_colors(assets), cog._find_colors(assets))
+        assert most == ACTION_COLOR_RENDERS, most
+
+
 class PaginatorUnit(_UnitBoostTests):
     @test
     async def first_page_from_strings(self) -> None:
@@ -848,6 +1637,637 @@ class ApiHelpersUnit(_UnitBoostTests):
         assert res["status"] == "deleted"
 
 
+class _Cached:
+    def __init__(self, key: int) -> None:
+        self.key = key
+
+
+class ObjectCacheUnit(_UnitBoostTests):
+    @test
+    async def evicts_least_recently_used(self) -> None:
+        cache = ObjectCache("test", max_size=2)
+        cache[1], cache[2] = _Cached(1), _Cached(2)
+        cache.get(1)  # 2 is now the least recently used
+        cache[3] = _Cached(3)
+        assert sorted(cache) == [1, 3], list(cache)
+        assert len(cache) == 2
+        assert cache.get(2) is None
+
+    @test
+    async def evicted_object_in_use_is_returned_again(self) -> None:
+        cache = ObjectCache("test", max_size=1)
+        held = _Cached(1)
+        cache[1] = held
+        cache[2] = _Cached(2)
+        assert 1 not in list(cache)
+        assert cache.get(1) is held
+        assert list(cache) == [1], list(cache)
+
+    @test
+    async def idle_entries_expire(self) -> None:
+        cache = ObjectCache("test", max_size=10, ttl=60)
+        with patch("killua.utils.cache.monotonic", return_value=0):
+            cache[1] = _Cached(1)
+        with patch("killua.utils.cache.monotonic", return_value=30):
+            cache[2] = _Cached(2)
+        with patch("killua.utils.cache.monotonic", return_value=61):
+            cache.sweep()
+        assert list(cache) == [2], list(cache)
+
+    @test
+    async def counts_hits_misses_and_evictions(self) -> None:
+        from ...metrics import CACHE_HITS, CACHE_MISSES, CACHE_EVICTIONS
+
+        def value(metric) -> float:
+            return metric.labels("counted")._value.get()
+
+        before = [value(m) for m in (CACHE_HITS, CACHE_MISSES, CACHE_EVICTIONS)]
+        cache = ObjectCache("counted", max_size=1)
+        cache[1] = _Cached(1)
+        cache.get(1)
+        cache.get(5)
+        cache[2] = _Cached(2)
+        after = [value(m) for m in (CACHE_HITS, CACHE_MISSES, CACHE_EVICTIONS)]
+        assert [a - b for a, b in zip(after, before)] == [1, 1, 1], (before, after)
+
+    @test
+    async def user_stays_one_object_after_eviction(self) -> None:
+        uid = self.base_author.id
+        User.cache.pop(uid, None)
+        user = await User.new(uid)
+        max_size = User.cache.max_size
+        try:
+            User.cache.max_size = 0
+            User.cache.sweep()
+            assert uid not in list(User.cache)
+            assert await User.new(uid) is user
+        finally:
+            User.cache.max_size = max_size
+
+
+class SingleFlightUnit(_UnitBoostTests):
+    """Concurrent cache misses for one id must share a single database fetch."""
+
+    @staticmethod
+    def _counting_find_one(calls: list):
+        from ...utils.test_db import TestingDatabase
+
+        original = TestingDatabase.find_one
+
+        async def find_one(db, where: dict, **kwargs):
+            calls.append(where)
+            # Yield like a real network round trip would, so the other callers run meanwhile
+            await asyncio.sleep(0)
+            return await original(db, where, **kwargs)
+
+        return patch.object(TestingDatabase, "find_one", find_one)
+
+    @test
+    async def user_new_fetches_once(self) -> None:
+        uid = self.base_author.id
+        await User.new(uid)
+        User.cache.pop(uid, None)
+
+        calls = []
+        with self._counting_find_one(calls):
+            users = await asyncio.gather(*[User.new(uid) for _ in range(50)])
+
+        assert len(calls) == 1, len(calls)
+        assert all(u is users[0] for u in users)
+        assert User.cache.get(uid) is users[0]
+
+    @test
+    async def unregistered_user_is_added_once(self) -> None:
+        uid = 424242424242
+        User.cache.pop(uid, None)
+        DB.teams.db["teams"] = [
+            d for d in DB.teams.db.get("teams", []) if d.get("id") != uid
+        ]
+
+        calls = []
+        with self._counting_find_one(calls):
+            users = await asyncio.gather(*[User.new(uid) for _ in range(20)])
+
+        # One lookup before the user is added and one to read the new entry back
+        assert len(calls) == 2, len(calls)
+        assert len([d for d in DB.teams.db["teams"] if d["id"] == uid]) == 1
+        assert all(u is users[0] for u in users)
+
+    @test
+    async def guild_new_fetches_once(self) -> None:
+        gid = self.base_guild.id
+        await Guild.new(gid)
+        Guild.cache.pop(gid, None)
+
+        calls = []
+        with self._counting_find_one(calls):
+            guilds = await asyncio.gather(*[Guild.new(gid) for _ in range(50)])
+
+        assert len(calls) == 1, len(calls)
+        assert all(g is guilds[0] for g in guilds)
+
+    @test
+    async def failed_load_is_not_cached(self) -> None:
+        cache = ObjectCache("test", max_size=10)
+        attempts = 0
+
+        async def loader():
+            nonlocal attempts
+            attempts += 1
+            await asyncio.sleep(0)
+            raise RuntimeError("database down")
+
+        results = await asyncio.gather(
+            *[cache.load(1, loader) for _ in range(5)], return_exceptions=True
+        )
+        assert attempts == 1, attempts
+        assert all(isinstance(r, RuntimeError) for r in results), results
+        assert 1 not in cache
+
+        async def working_loader():
+            return _Cached(1)
+
+        assert (await cache.load(1, working_loader)).key == 1
+
+
+class RenderExecutorUnit(_UnitBoostTests):
+    @test
+    async def runs_in_worker_process(self) -> None:
+        renderer = RenderExecutor(workers=1, max_pending=2)
+        try:
+            await renderer.start()
+            pid = await renderer.run(os.getpid)
+            assert pid != os.getpid()
+            assert renderer.pending == 0
+            # Workers are not forked from this process, which runs threads
+            assert renderer.pool._mp_context.get_start_method() != "fork"
+            # and import the functions they run themselves
+            png = BytesIO()
+            Image.new("RGB", (3, 3), "red").save(png, format="PNG")
+            assert await renderer.run(dominant_color, png.getvalue()) == 0xFF0000
+        finally:
+            renderer.shutdown()
+
+    @test
+    async def rejects_when_full(self) -> None:
+        renderer = RenderExecutor(workers=1, max_pending=1)
+        try:
+            slow = asyncio.create_task(renderer.run(time.sleep, 0.2))
+            await asyncio.sleep(0)
+            assert renderer.pending == 1
+            async with expect_raises(RenderQueueFull):
+                await renderer.run(os.getpid)
+            await slow
+            assert renderer.pending == 0
+            assert await renderer.run(os.getpid)
+        finally:
+            renderer.shutdown()
+
+
+class CooldownStoreUnit(_UnitBoostTests):
+    @test
+    async def new_user_keeps_other_cooldowns(self) -> None:
+        store = CooldownStore()
+        assert store.use(1, "daily", 60) == 0
+        assert store.use(2, "daily", 60) == 0
+        assert store.use(2, "hunt", 60) == 0
+        assert store.use(1, "daily", 60) > 0
+        assert store.use(2, "daily", 60) > 0
+
+    @test
+    async def remaining_and_lazy_expiry(self) -> None:
+        store = CooldownStore()
+        with patch("killua.utils.cooldowns.monotonic", return_value=100):
+            assert store.use(1, "daily", 60) == 0
+        with patch("killua.utils.cooldowns.monotonic", return_value=130):
+            assert store.use(1, "daily", 60) == 30
+            # A shorter cooldown (e.g. after getting premium) applies straight away
+            assert store.use(1, "daily", 15) == 0
+        with patch("killua.utils.cooldowns.monotonic", return_value=200):
+            assert store.use(1, "daily", 60) == 0
+        assert len(store) == 1
+
+    @test
+    async def sweep_drops_expired(self) -> None:
+        store = CooldownStore()
+        with patch("killua.utils.cooldowns.monotonic", return_value=0):
+            store.use(1, "daily", 10)
+            store.use(2, "daily", 100)
+        with patch("killua.utils.cooldowns.monotonic", return_value=50):
+            assert store.sweep() == 1
+            assert store.use(2, "daily", 100) == 50
+        assert len(store) == 1
+        store.reset(2, "daily")
+        assert len(store) == 0
+
+
+class DailyUsersUnit(_UnitBoostTests):
+    @test
+    async def counts_each_user_once(self) -> None:
+        tracker = DailyUserTracker()
+        for user_id in (1, 2, 2, 3, 1):
+            tracker.add(user_id)
+        assert len(tracker) == 3, len(tracker)
+
+    @test
+    async def rollover_starts_a_new_day(self) -> None:
+        tracker = DailyUserTracker()
+        tracker.add(1)
+        tracker.add(2)
+        since = tracker.since
+        assert tracker.rollover() == 2
+        assert len(tracker) == 0
+        assert tracker.since >= since
+        tracker.add(1)
+        assert tracker.rollover() == 1
+
+    @test
+    async def sketch_estimate_is_close(self) -> None:
+        tracker = DailyUserTracker(precision=14)
+        # Snowflake like ids, which all share their upper bits
+        ids = [(1_400_000_000_000 + n * 37) << 22 for n in range(50_000)]
+        for user_id in ids + ids[:1000]:
+            tracker.add(user_id)
+        assert abs(len(tracker) - 50_000) < 50_000 * 0.03, len(tracker)
+        assert len(tracker._users.registers) == 2**14
+
+    @test
+    async def sketch_is_accurate_for_few_users(self) -> None:
+        sketch = HyperLogLog(14)
+        assert len(sketch) == 0
+        for user_id in range(100):
+            sketch.add(user_id)
+        assert abs(len(sketch) - 100) <= 2, len(sketch)
+
+    @test
+    async def sketch_rejects_bad_precision(self) -> None:
+        async with expect_raises(ValueError):
+            HyperLogLog(20)
+
+
+class LeaderboardUnit(_UnitBoostTests):
+    @staticmethod
+    def _seed(scores: dict[int, int]) -> TopK:
+        TestingDatabase.db["teams"] = [
+            {"id": user_id, "points": points, "stats": {"rps": {"pve": {"won": points}}}}
+            for user_id, points in scores.items()
+        ]
+        return TopK("test", "points", 3, 60)
+
+    @test
+    async def loads_only_the_best(self) -> None:
+        board = self._seed({1: 10, 2: 50, 3: 0, 4: 30, 5: 20})
+        assert await board.top(3) == [(2, 50), (4, 30), (5, 20)]
+        assert len(board) == 3
+        assert board.floor == 20
+
+        nested = TopK("test", "stats.rps.pve.won", 3, 60)
+        assert await nested.top(2) == [(2, 50), (4, 30)]
+
+    @test
+    async def updates_without_asking_the_database(self) -> None:
+        board = self._seed({1: 10, 2: 50, 4: 30, 5: 20})
+        await board.top(3)
+        TestingDatabase.db["teams"] = []
+
+        board.update(1, 40)  # Pushes 5 off the board
+        assert await board.top(3) == [(2, 50), (1, 40), (4, 30)]
+        assert board.floor == 20
+        board.update(5, 15)  # Not enough to get back on
+        board.update(2, 60)
+        assert await board.top(3) == [(2, 60), (1, 40), (4, 30)]
+
+    @test
+    async def loads_again_when_too_short(self) -> None:
+        board = self._seed({1: 10, 2: 50, 4: 30, 5: 20})
+        await board.top(3)
+        board.update(2, 5)  # Could be behind 1 now, who is not on the board
+        TestingDatabase.db["teams"][1]["points"] = 5
+        assert len(board) == 2
+        assert await board.top(3) == [(4, 30), (5, 20), (1, 10)]
+
+    @test
+    async def board_without_floor_is_complete(self) -> None:
+        board = self._seed({1: 10, 2: 50})
+        assert await board.top(3) == [(2, 50), (1, 10)]
+        assert board.floor == 0
+        board.update(3, 1)
+        board.update(1, 0)
+        assert await board.top(3) == [(2, 50), (3, 1)]
+
+    @test
+    async def rank(self) -> None:
+        board = self._seed({1: 10, 2: 50, 3: 10, 4: 30, 5: 20, 6: 5})
+        assert await board.rank(2, 50) == 1
+        assert await board.rank(5, 20) == 3
+        # Not on the board, so counted by the database
+        assert await board.rank(1, 10) == 4
+        assert await board.rank(6, 5) == 6
+        assert await board.rank(7, 0) == 7
+
+    @test
+    async def among(self) -> None:
+        board = self._seed({1: 10, 2: 50, 3: 10, 4: 30, 5: 20, 6: 5})
+        assert await board.among([4, 5, 6], 2) == [(4, 30), (5, 20)]
+        # Only one of them is on the board, the rest comes from the database
+        assert await board.among([1, 5, 6], 2) == [(5, 20), (1, 10)]
+        assert await board.among([6, 7], 5) == [(6, 5)]
+
+    @test
+    async def creates_an_index_per_board(self) -> None:
+        await create_leaderboard_indexes()
+        indexes = list(TestingDatabase.indexes["teams"].values())
+        for field in BOARDS.values():
+            assert [(field, -1), ("id", 1)] in indexes, indexes
+
+    @test
+    async def server_leaderboard_adds_up_members(self) -> None:
+        self._seed({1: 10, 2: 50, 3: 5})
+        leaderboards["jenny"].clear()
+        ctx = MagicMock()
+        ctx.guild.members = [MagicMock(id=1), MagicMock(id=2), MagicMock(id=4)]
+        result = await self.cog._lb(ctx, limit=1)
+        assert result["points"] == 60
+        assert [entry["points"] for entry in result["top"]] == [50]
+        ctx.guild.members = [MagicMock(id=4)]
+        assert (await self.cog._lb(ctx))["points"] == 0
+        leaderboards["jenny"].clear()
+
+    @test
+    async def user_writes_update_the_boards(self) -> None:
+        TestingDatabase.db["teams"] = []
+        user = await User.new(self.base_author.id)
+        board = leaderboards["jenny"]
+        board.clear()
+        assert await board.top(5) == []
+        await user.add_jenny(100)
+        assert (self.base_author.id, 100) in await board.top(5)
+
+        # In a batch only once the batch was written
+        async with User.batch():
+            await user.add_jenny(50)
+            assert (self.base_author.id, 100) in await board.top(5)
+        assert (self.base_author.id, 150) in await board.top(5)
+        with patch.object(
+            TestingDatabase, "update_one", AsyncMock(side_effect=PyMongoError("down"))
+        ):
+            async with expect_raises(PyMongoError):
+                async with User.batch():
+                    await user.add_jenny(50)
+        assert (self.base_author.id, 150) in await board.top(5)
+        user.jenny -= 50
+
+        await board.top(1)
+        await user.add_rps_stat("won", True)
+        assert (self.base_author.id, user.rps_stats["pve"]["won"]) in await leaderboards[
+            "rps_pve"
+        ].top(5)
+        board.clear()
+
+
+class VoteReminderWheelUnit(_UnitBoostTests):
+    @test
+    async def fires_only_the_due_minute(self) -> None:
+        wheel = VoteReminderWheel()
+        voted = datetime(2024, 1, 1, 3, 15, 20)
+        wheel.set(1, {"topgg": voted, "discordbotlist": None})
+        wheel.set(2, {"topgg": voted + timedelta(minutes=1)})
+        assert len(wheel) == 2
+
+        assert wheel.due(datetime(2024, 1, 1, 15, 15, 1)) == [(1, "topgg", voted)]
+        # The same minute is not fired twice
+        assert wheel.due(datetime(2024, 1, 1, 15, 15, 40)) == []
+        assert wheel.due(datetime(2024, 1, 1, 15, 16, 2)) == [
+            (2, "topgg", voted + timedelta(minutes=1))
+        ]
+
+    @test
+    async def skips_votes_from_just_now(self) -> None:
+        wheel = VoteReminderWheel()
+        voted = datetime(2024, 1, 1, 3, 15, 20)
+        wheel.set(1, {"topgg": voted})
+        assert wheel.due(voted + timedelta(seconds=30)) == []
+
+    @test
+    async def catches_up_on_late_ticks(self) -> None:
+        wheel = VoteReminderWheel()
+        voted = datetime(2024, 1, 1, 3, 15)
+        wheel.set(1, {"topgg": voted})
+        wheel.set(2, {"topgg": voted + timedelta(minutes=1)})
+        wheel.due(datetime(2024, 1, 1, 15, 14, 50))
+        due = wheel.due(datetime(2024, 1, 1, 15, 16, 10))
+        assert [user_id for user_id, _, _ in due] == [1, 2], due
+
+    @test
+    async def set_replaces_and_removes(self) -> None:
+        wheel = VoteReminderWheel()
+        wheel.set(1, {"topgg": datetime(2024, 1, 1, 3, 15)})
+        wheel.set(1, {"topgg": datetime(2024, 1, 1, 4, 30)})
+        assert len(wheel) == 1
+        assert wheel.due(datetime(2024, 1, 1, 15, 15)) == []
+        wheel.set(1, {})
+        assert len(wheel) == 0
+        assert wheel.due(datetime(2024, 1, 1, 16, 30)) == []
+
+    @test
+    async def build_only_loads_enabled_users(self) -> None:
+        voted = datetime(2024, 1, 1, 3, 15)
+        TestingDatabase.db["teams"] = [
+            {"id": user_id, "voting_reminder": enabled, "voting_streak": {"topgg": {"last_vote": last}}}
+            for user_id, enabled, last in ((1, True, voted), (2, False, voted), (3, True, None))
+        ]
+        wheel = VoteReminderWheel()
+        await wheel.build()
+        assert wheel.built
+        assert wheel.due(datetime(2024, 1, 1, 3, 15, 30) + timedelta(hours=12)) == [
+            (1, "topgg", voted)
+        ]
+
+    @test
+    async def user_updates_the_wheel(self) -> None:
+        TestingDatabase.db["teams"] = []
+        User.cache.clear()
+        user = await User.new(self.base_author.id)
+        await user.add_vote("topgg")
+        assert user.id not in reminder_wheel._users
+
+        await user.toggle_votereminder()
+        assert user.voting_reminder
+        assert (await DB.teams.find_one({"id": user.id}))["voting_reminder"] is True
+        assert set(reminder_wheel._users[user.id]) == {"topgg"}
+        await user.add_vote("discordbotlist")
+        assert set(reminder_wheel._users[user.id]) == {"topgg", "discordbotlist"}
+
+        await user.toggle_votereminder()
+        assert user.id not in reminder_wheel._users
+
+
+class TodoDueQueueUnit(_UnitBoostTests):
+    @staticmethod
+    def _todo(due_at: datetime | None, notified: bool | None = False) -> dict:
+        return {"todo": "x", "due_at": due_at, "notified": notified if due_at else None}
+
+    @test
+    async def pops_in_due_order(self) -> None:
+        queue = TodoDueQueue()
+        now = datetime(2024, 1, 1, 12)
+        queue.schedule(1, [self._todo(now + timedelta(minutes=5)), self._todo(None)])
+        queue.schedule(2, [self._todo(now - timedelta(minutes=1)), self._todo(now)])
+        assert len(queue) == 3
+        assert queue.next_due() == now - timedelta(minutes=1)
+
+        assert queue.pop_due(now) == [
+            (now - timedelta(minutes=1), 2, 0),
+            (now, 2, 1),
+        ]
+        assert queue.pop_due(now) == []
+        assert queue.next_due() == now + timedelta(minutes=5)
+
+    @test
+    async def creates_the_due_date_index(self) -> None:
+        await create_reminder_indexes()
+        assert [("todos.due_at", 1)] in TestingDatabase.indexes["todo"].values()
+
+    @test
+    async def skips_changed_todos(self) -> None:
+        queue = TodoDueQueue()
+        now = datetime(2024, 1, 1, 12)
+        first, second = self._todo(now), self._todo(now + timedelta(minutes=1))
+        queue.schedule(1, [first, second])
+        # The first one is removed, so the second one moves up
+        queue.schedule(1, [second])
+        assert queue.pop_due(now + timedelta(minutes=1)) == [
+            (now + timedelta(minutes=1), 1, 0)
+        ]
+
+        queue.schedule(2, [self._todo(now, notified=True)])
+        queue.schedule(3, [self._todo(now)])
+        queue.remove(3)
+        assert queue.pop_due(now) == []
+        assert len(queue) == 0
+
+    @test
+    async def compacts_skipped_entries(self) -> None:
+        queue = TodoDueQueue()
+        now = datetime(2024, 1, 1, 12)
+        for minutes in range(500):
+            queue.schedule(1, [self._todo(now + timedelta(minutes=minutes))])
+        assert len(queue) == 1
+        assert len(queue._heap) <= 2 + 64, len(queue._heap)
+
+    @test
+    async def wait_wakes_up_on_changes(self) -> None:
+        queue = TodoDueQueue()
+        waiter = asyncio.ensure_future(queue.wait())
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        queue.schedule(1, [self._todo(datetime.now())])
+        await asyncio.wait_for(waiter, 1)
+        # Something is due already, so there is nothing to wait for
+        await asyncio.wait_for(queue.wait(), 1)
+
+    @test
+    async def build_only_loads_due_todos(self) -> None:
+        now = datetime(2024, 1, 1, 12)
+        TestingDatabase.db["todo"] = [
+            {"_id": 1, "todos": [self._todo(None), self._todo(now)]},
+            {"_id": 2, "todos": [self._todo(now, notified=True)]},
+            {"_id": 3, "todos": [self._todo(None)]},
+        ]
+        queue = TodoDueQueue()
+        await queue.build()
+        assert queue.pop_due(now) == [(now, 1, 1)]
+
+    @test
+    async def build_keeps_changes_made_while_loading(self) -> None:
+        now = datetime(2024, 1, 1, 12)
+        TestingDatabase.db["todo"] = [
+            {"_id": 1, "todos": [self._todo(now)]},
+            {"_id": 2, "todos": [self._todo(now)]},
+        ]
+        queue = TodoDueQueue()
+        original = TestingDatabase.find
+
+        def find(db, *args, **kwargs):
+            # Edited while the query runs, so the loaded lists are outdated
+            queue.schedule(1, [self._todo(now + timedelta(minutes=1))])
+            queue.schedule(3, [self._todo(now)])
+            return original(db, *args, **kwargs)
+
+        with patch.object(TestingDatabase, "find", find):
+            await queue.build()
+        assert queue.pop_due(now + timedelta(minutes=1)) == [
+            (now, 2, 0),
+            (now, 3, 0),
+            (now + timedelta(minutes=1), 1, 0),
+        ]
+
+    @test
+    async def retries_failed_notifications(self) -> None:
+        queue = TodoDueQueue()
+        now = datetime(2024, 1, 1, 12)
+        queue.schedule(1, [self._todo(now)])
+        [entry] = queue.pop_due(now)
+        queue.retry(entry, now + timedelta(minutes=1))
+        assert queue.next_due() == now + timedelta(minutes=1)
+        assert queue.pop_due(now) == []
+        assert queue.pop_due(now + timedelta(minutes=1)) == [entry]
+        assert queue.next_due() is None
+
+
+class GuildTagIndexUnit(_UnitBoostTests):
+    @staticmethod
+    def _seed(*uses: tuple[str, int]) -> Guild:
+        tags = [
+            {"name": name, "uses": count, "owner": 1, "content": "c"}
+            for name, count in uses
+        ]
+        TestingDatabase.db["guilds"] = [
+            {"id": 7, "prefix": "k!", "tags": [dict(t) for t in tags]}
+        ]
+        return Guild(id=7, prefix="k!", tags=tags)
+
+    @staticmethod
+    async def _stored() -> list[dict]:
+        return (await TestingDatabase("guilds").find_one({"id": 7}))["tags"]
+
+    @test
+    async def finds_and_ranks(self) -> None:
+        guild = self._seed(("Alpha", 1), ("beta", 5), ("gamma", 5))
+        assert guild.get_tag("ALPHA")["name"] == "Alpha"
+        assert guild.get_tag("delta") is None
+        assert [t["name"] for t in guild.tags_by_uses] == ["beta", "gamma", "Alpha"]
+        assert guild.tag_rank("alpha") == 3
+        assert guild.tag_rank("gamma") == 2
+
+    @test
+    async def uses_are_incremented_in_place(self) -> None:
+        guild = self._seed(("a", 1), ("b", 2))
+        await guild.add_tag_use("A")
+        await guild.add_tag_use("a")
+        assert [t["uses"] for t in await self._stored()] == [3, 2]
+        assert guild.tag_rank("a") == 1
+        assert [t["name"] for t in guild.tags_by_uses] == ["a", "b"]
+
+    @test
+    async def stays_coherent_after_changes(self) -> None:
+        guild = self._seed(("a", 1), ("b", 2), ("c", 3))
+        await guild.remove_tag("A")
+        assert guild.get_tag("c")["uses"] == 3
+        await guild.update_tag("b", "name", "Bee")
+        assert guild.get_tag("b") is None
+        assert guild.get_tag("bee")["name"] == "Bee"
+        await guild.update_tag("bee", "content", "new")
+        await guild.add_tag({"name": "d", "uses": 0, "owner": 2, "content": "d"})
+        assert [t["name"] for t in guild.tags_by_uses] == ["c", "Bee", "d"]
+        assert await self._stored() == guild.tags
+
+        # Replacing the whole list, like the dashboard does, rebuilds the index
+        guild.tags = [{"name": "z", "uses": 0, "owner": 1, "content": "z"}]
+        assert guild.get_tag("c") is None
+        assert guild.tag_rank("z") == 1
+
+
 class LootboxUnit(_UnitBoostTests):
     @test
     async def generate_rewards(self) -> None:
@@ -855,6 +2275,40 @@ class LootboxUnit(_UnitBoostTests):
         assert isinstance(rewards, list)
         assert len(rewards) > 0
 
+    @test
+    async def samplers_follow_the_card_data(self) -> None:
+        from killua.utils.classes.lootbox import _RewardSampler
+
+        data = {
+            "rewards": {
+                "guaranteed": {7: 2, 3: 1},
+                "cards": {"rarities": ["A", "B"], "types": ["spell"]},
+                "boosters": [1, 2],
+            }
+        }
+        sampler = _RewardSampler(data, CardCatalog(CardCatalogUnit.RAW))
+        assert sampler.pool == [2], sampler.pool  # Card 3 is not available
+        assert sampler.guaranteed == [7, 7, 3]
+        assert sampler.booster() in (1, 2)
+
+        samplers = LootBox.samplers()
+        assert LootBox.samplers() is samplers
+        assert set(samplers) == set(LOOTBOXES)
+        for box, sampler in samplers.items():
+            assert 0 not in sampler.pool, box
+            assert all(Card(card_id).available for card_id in sampler.pool), box
+
+    @test
+    async def generate_rewards_fills_every_slot(self) -> None:
+        for box, data in LOOTBOXES.items():
+            rewards = await LootBox.generate_rewards(box)
+            assert len(rewards) == data["rewards_total"], (box, rewards)
+            cards = [r for r in rewards if isinstance(r, Card)]
+            assert data["cards_total"][0] <= len(cards) <= data["cards_total"][1]
+            for card in cards:
+                assert card.rank in data["rewards"]["cards"]["rarities"], card.rank
+                assert card.type in data["rewards"]["cards"]["types"], card.type
+
     @test
     async def booster_select_options(self) -> None:
         from killua.utils.classes.lootbox import _BoosterSelect
@@ -871,6 +2325,23 @@ class GifUnit(_UnitBoostTests):
         out = conv.process()
         assert out is not None
 
+    @test
+    async def transparent_gif_converter_masks_and_remaps(self) -> None:
+        img = Image.new("RGBA", (4, 4), (0, 0, 0, 255))
+        for x in range(2):
+            for y in range(4):
+                img.putpixel((x, y), (255, 0, 0, 0))
+        out = TransparentAnimatedGifConverter(img).process()
+        data = out.tobytes()
+        # Transparent pixels use index 0, the opaque black moved away from it
+        assert all(data[y * 4 + x] == 0 for x in range(2) for y in range(4))
+        assert all(data[y * 4 + x] != 0 for x in range(2, 4) for y in range(4))
+        palette = out.getpalette()
+        idx = data[2]
+        assert tuple(palette[idx * 3 : idx * 3 + 3]) == (0, 0, 0)
+        assert tuple(palette[:3]) != (0, 0, 0)
+        assert out.info["transparency"] == 0
+
     @test
     async def save_transparent_gif(self) -> None:
         frames = [
@@ -0,0 +1,90 @@
+"""Assets from external APIs fetched ahead of time, so commands do not have to wait for them."""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from logging import warning
+from time import monotonic
+from typing import Awaitable, Callable, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class AssetPool(Generic[T]):
+    """
+    Assets of one kind, fetched in batches of up to `size` by `fetch(amount)`.
+
+    Taking an asset returns one from memory and starts fetching a new batch in the
+    background once `low_water` or fewer are left. If fetching fails, refilling in the
+    background is paused for `backoff` seconds, doubling with every failure in a row
+    up to `max_backoff`. Only when the pool is empty does taking an asset wait for
+    the API, also while backing off, since there is nothing else to serve.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fetch: Callable[[int], Awaitable[list[T]]],
+        size: int,
+        low_water: int,
+        backoff: float,
+        max_backoff: float,
+    ):
+        self.name = name
+        self.size = size
+        self.low_water = low_water
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._fetch = fetch
+        self._assets: deque[T] = deque()
+        self._refill: asyncio.Task | None = None
+        self._failures = 0
+        self._retry_at = 0.0
+
+    async def _fill(self) -> None:
+        amount = self.size - len(self._assets)
+        if amount > 0:
+            self._assets.extend(await self._fetch(amount))
+
+    def _refilled(self, task: asyncio.Task) -> None:
+        if task.cancelled():
+            return
+        if (e := task.exception()) is None:
+            self._failures = 0
+            self._retry_at = 0.0
+            return
+        self._failures += 1
+        delay = min(self.backoff * 2 ** (self._failures - 1), self.max_backoff)
+        self._retry_at = monotonic() + delay
+        warning(f"Refilling the {self.name} asset pool failed, pausing for {delay:.0f}s: {e}")
+
+    def _start_refill(self) -> asyncio.Task:
+        """Starts fetching a batch unless one is already being fetched"""
+        if self._refill is None or self._refill.done():
+            self._refill = asyncio.create_task(self._fill())
+            self._refill.add_done_callback(self._refilled)
+        return self._refill
+
+    async def take(self) -> T:
+        """
+        An asset nobody got yet. Raises whatever `fetch` raised if the pool was empty
+        and could not be refilled.
+        """
+        if not self._assets:
+            await asyncio.shield(self._start_refill())
+            if not self._assets:
+                raise LookupError(f"No {self.name} assets were fetched")
+
+        asset = self._assets.popleft()
+        if len(self._assets) <= self.low_water and monotonic() >= self._retry_at:
+            self._start_refill()
+        return asset
+
+    def close(self) -> None:
+        """Stops fetching"""
+        if self._refill is not None:
+            self._refill.cancel()
+
+    def __len__(self) -> int:
+        return len(self._assets)
@@ -0,0 +1,138 @@
+"""A sprite sheet of every card image, stored on disk so it survives restarts."""
+
+from __future__ import annotations
+
+import json
+import os
+from io import BytesIO
+from itertools import count
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+# Size of a card in the book at a scalar of 1
+CARD_SIZE = (84, 115)
+
+
+class CardAtlas:
+    """
+    Keeps a resized RGBA copy of every card image in one memory mapped array per
+    scalar, `atlas_<scalar>.npy`, with shape (slots, height, width, 4). Which card is
+    in which slot, and which image it was made from, is saved in `index.json` next
+    to it. Opening it only maps the files, so it is ready almost immediately, and
+    only cards whose image changed since the last time need to be downloaded again.
+    `version` changes whenever an image in it may have changed, and no two atlases
+    share one.
+    """
+
+    _versions = count(1)
+
+    def __init__(self, path: str | Path, scalars: tuple[int, ...] = (1, 2)):
+        self.path = Path(path)
+        self.scalars = scalars
+        # card id -> {"slot": int, "image": str}
+        self.index: dict[str, dict[str, int | str]] = {}
+        self._sheets: dict[int, np.memmap] = {}
+        self._loaded = False
+        self.version = next(self._versions)
+
+    def _sheet_path(self, scalar: int) -> Path:
+        return self.path / f"atlas_{scalar}.npy"
+
+    def load(self) -> None:
+        """Opens the atlas saved on disk, if there is one"""
+        self._loaded = True
+        self.version = next(self._versions)
+        try:
+            with open(self.path / "index.json") as f:
+                index = json.load(f)
+            sheets = {
+                scalar: np.load(self._sheet_path(scalar), mmap_mode="r+")
+                for scalar in self.scalars
+            }
+        except (OSError, ValueError):
+            return  # Nothing saved yet (or unreadable), everything is built again
+
+        if all(len(sheet) >= len(index) for sheet in sheets.values()):
+            self.index, self._sheets = index, sheets
+
+    def outdated(self, cards: list[dict]) -> list[dict]:
+        """Returns the cards that are not in the atlas or whose image changed"""
+        if not self._loaded:
+            self.load()
+        return [
+            card
+            for card in cards
+            if self.index.get(str(card["id"]), {}).get("image") != card["image"]
+        ]
+
+    @staticmethod
+    def create_thumbnails(
+        image_bytes: bytes, scalars: tuple[int, ...]
+    ) -> dict[int, np.ndarray]:
+        """Resizes a card image to every scalar. Runs in a render worker"""
+        image = Image.open(BytesIO(image_bytes)).convert("RGBA")
+        return {
+            scalar: np.asarray(
+                image.resize(
+                    (CARD_SIZE[0] * scalar, CARD_SIZE[1] * scalar), Image.LANCZOS
+                )
+            )
+            for scalar in scalars
+        }
+
+    def _grow(self, slots: int) -> None:
+        """Makes room for at least `slots` cards, keeping the ones already there"""
+        for scalar in self.scalars:
+            old = self._sheets.get(scalar)
+            if old is not None and len(old) >= slots:
+                continue
+            capacity = max(slots, 2 * len(old) if old is not None else 0)
+            tmp = self._sheet_path(scalar).with_suffix(".tmp.npy")
+            sheet = np.lib.format.open_memmap(
+                tmp,
+                mode="w+",
+                dtype=np.uint8,
+                shape=(capacity, CARD_SIZE[1] * scalar, CARD_SIZE[0] * scalar, 4),
+            )
+            if old is not None:
+                sheet[: len(old)] = old
+            sheet.flush()
+            os.replace(tmp, self._sheet_path(scalar))
+            self._sheets[scalar] = sheet
+
+    def set(self, card_id: int, image: str, thumbnails: dict[int, np.ndarray]) -> None:
+        """Puts the thumbnails of a card into the atlas"""
+        entry = self.index.get(str(card_id))
+        slot = entry["slot"] if entry else len(self.index)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._grow(slot + 1)
+        for scalar in self.scalars:
+            self._sheets[scalar][slot] = thumbnails[scalar]
+        self.index[str(card_id)] = {"slot": slot, "image": image}
+        self.version = next(self._versions)
+
+    def save(self) -> None:
+        """Writes the atlas to disk"""
+        for sheet in self._sheets.values():
+            sheet.flush()
+        tmp = self.path / "index.json.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.index, f)
+        os.replace(tmp, self.path / "index.json")
+
+    def get(self, card_id: int, scalar: int) -> Image.Image | None:
+        """The image of a card at a scalar, or None if the card is not in the atlas"""
+        if not self._loaded:
+            self.load()
+        entry = self.index.get(str(card_id))
+        if entry is None or scalar not in self._sheets:
+            return None
+        return Image.fromarray(self._sheets[scalar][entry["slot"]], "RGBA")
+
+    def __contains__(self, card_id: int) -> bool:
+        return str(card_id) in self.index
+
+    def __len__(self) -> int:
+        return len(self.index)
@@ -0,0 +1,194 @@
+"""Bounded caches for objects like User and Guild that must only exist once per id, and for rendered images."""
+
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from time import monotonic
+from typing import Awaitable, Callable, Generic, Hashable, Iterator, MutableMapping, TypeVar
+from weakref import WeakValueDictionary
+
+from killua.metrics import (
+    CACHE_HITS,
+    CACHE_MISSES,
+    CACHE_EVICTIONS,
+    CACHE_SIZE,
+    CACHE_BYTES,
+)
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class ObjectCache(MutableMapping[K, V], Generic[K, V]):
+    """
+    A least-recently-used cache with a maximum size and an idle time to live.
+
+    Entries that have not been used for `ttl` seconds, or that are pushed out because
+    the cache is full, are not thrown away straight away. They are kept as weak references
+    instead, so as long as anything (for example a command that is still running) holds
+    on to the object, looking up its id returns that same object again. Only once nothing
+    references it anymore is it actually gone and the next lookup loads a fresh one.
+    This way there are never two diverging objects for the same id.
+    """
+
+    def __init__(self, name: str, max_size: int, ttl: float | None = None):
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        # Ordered from least to most recently used, values are (object, last used)
+        self._entries: OrderedDict[K, tuple[V, float]] = OrderedDict()
+        self._evicted: WeakValueDictionary[K, V] = WeakValueDictionary()
+        self._loading: dict[K, asyncio.Future[V]] = {}
+
+    def get(self, key: K, default: V | None = None) -> V | None:
+        """Looks up an object and counts the lookup as a cache hit or miss"""
+        value = self._lookup(key)
+        if value is None:
+            CACHE_MISSES.labels(self.name).inc()
+            return default
+        CACHE_HITS.labels(self.name).inc()
+        return value
+
+    async def load(self, key: K, loader: Callable[[], Awaitable[V]]) -> V:
+        """
+        Loads an object that was not found in the cache and caches it.
+
+        If the same key is already being loaded, this waits for that load instead of starting
+        another one, so concurrent misses share one database request and all get the same object.
+        """
+        if (value := self._lookup(key)) is not None:
+            return value
+
+        pending = self._loading.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._load(key, loader))
+            self._loading[key] = pending
+        # Shielded so one waiter being cancelled does not cancel the load for everyone else
+        return await asyncio.shield(pending)
+
+    async def _load(self, key: K, loader: Callable[[], Awaitable[V]]) -> V:
+        try:
+            value = await loader()
+            self[key] = value
+            return value
+        finally:
+            self._loading.pop(key, None)
+
+    def _lookup(self, key: K) -> V | None:
+        now = monotonic()
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries[key] = (entry[0], now)
+            self._entries.move_to_end(key)
+            self._expire(now)
+            return entry[0]
+
+        value = self._evicted.pop(key, None)
+        if value is not None:
+            # Still in use somewhere, so it has to stay the one object for this id
+            self[key] = value
+        return value
+
+    def _expire(self, now: float) -> None:
+        """Evicts entries that are over the size limit or have been idle for too long"""
+        while self._entries:
+            key, (value, last_used) = next(iter(self._entries.items()))
+            if len(self._entries) <= self.max_size and (
+                self.ttl is None or now - last_used < self.ttl
+            ):
+                break
+            del self._entries[key]
+            self._evicted[key] = value
+            CACHE_EVICTIONS.labels(self.name).inc()
+        CACHE_SIZE.labels(self.name).set(len(self._entries))
+
+    def sweep(self) -> None:
+        """Evicts everything that has expired without waiting for the next access"""
+        self._expire(monotonic())
+
+    def __getitem__(self, key: K) -> V:
+        value = self._lookup(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: K, value: V) -> None:
+        self._evicted.pop(key, None)
+        self._entries[key] = (value, monotonic())
+        self._entries.move_to_end(key)
+        self._expire(monotonic())
+
+    def __delitem__(self, key: K) -> None:
+        found = self._entries.pop(key, None) is not None
+        found = self._evicted.pop(key, None) is not None or found
+        if not found:
+            raise KeyError(key)
+        CACHE_SIZE.labels(self.name).set(len(self._entries))
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._entries or key in self._evicted
+
+    def __iter__(self) -> Iterator[K]:
+        return iter(list(self._entries))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._evicted.clear()
+        CACHE_SIZE.labels(self.name).set(0)
+
+
+class BytesCache(Generic[K]):
+    """
+    A least-recently-used cache for encoded data like rendered images. Instead of
+    a number of entries it has a budget of bytes, and the least recently used
+    entries are evicted once all values together are larger than that.
+    """
+
+    def __init__(self, name: str, max_bytes: int):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: OrderedDict[K, bytes] = OrderedDict()
+
+    def get(self, key: K) -> bytes | None:
+        value = self._entries.get(key)
+        if value is None:
+            CACHE_MISSES.labels(self.name).inc()
+            return None
+        self._entries.move_to_end(key)
+        CACHE_HITS.labels(self.name).inc()
+        return value
+
+    def set(self, key: K, value: bytes) -> None:
+        if len(value) > self.max_bytes:
+            return  # Would evict everything else and still not fit
+
+        if (old := self._entries.pop(key, None)) is not None:
+            self.size -= len(old)
+        self._entries[key] = value
+        self.size += len(value)
+
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+            CACHE_EVICTIONS.labels(self.name).inc()
+        self._update_metrics()
+
+    def _update_metrics(self) -> None:
+        CACHE_SIZE.labels(self.name).set(len(self._entries))
+        CACHE_BYTES.labels(self.name).set(self.size)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size = 0
+        self._update_metrics()
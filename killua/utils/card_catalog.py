@@ -0,0 +1,126 @@
+"""Indexes of the card data so cards can be looked up without scanning all of them."""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from itertools import chain, count, islice
+from typing import Callable, Iterable, Iterator
+
+
+class CardCatalog:
+    """
+    Every card by id and by lowercase name, and the ids of every rank, type and
+    of the available cards.
+
+    A catalog never changes after it was built. When the card data is fetched
+    again a new one is built and replaces the old one in a single assignment,
+    so nobody ever sees a catalog that is only half up to date. Every catalog has a
+    `version` higher than the ones built before it, for caches of anything drawn
+    from the card data.
+    """
+
+    _versions = count(1)
+
+    def __init__(self, raw: list[dict]):
+        self.raw = raw
+        self.version = next(self._versions)
+        self.by_id: dict[int, dict] = {}
+        self.by_name: dict[str, int] = {}
+        self.by_rank: dict[str, set[int]] = {}
+        self.by_type: dict[str, set[int]] = {}
+        self.available: set[int] = set()
+        # id -> position in raw, so results keep the order of the card data
+        self._positions: dict[int, int] = {}
+
+        for position, card in enumerate(raw):
+            self.by_id[card["id"]] = card
+            self.by_name[card["name"].lower()] = card["id"]
+            self.by_rank.setdefault(card["rank"], set()).add(card["id"])
+            self.by_type.setdefault(card.get("type", "normal"), set()).add(card["id"])
+            if card.get("available", True):
+                self.available.add(card["id"])
+            self._positions[card["id"]] = position
+
+    def get(self, name_or_id: int | str) -> dict | None:
+        """A card by its id or its name, ignoring case"""
+        if isinstance(name_or_id, int):
+            return self.by_id.get(name_or_id)
+        if name_or_id.isdigit():
+            return self.by_id.get(int(name_or_id))
+        card_id = self.by_name.get(name_or_id.lower())
+        return None if card_id is None else self.by_id[card_id]
+
+    def select(
+        self,
+        *,
+        types: Iterable[str] | None = None,
+        ranks: Iterable[str] | None = None,
+        available: bool | None = None,
+    ) -> list[dict]:
+        """The cards of any of `types` and `ranks`, in the order of the card data"""
+        ids = set(self.by_id)
+        if types is not None:
+            ids &= set().union(*(self.by_type.get(t, ()) for t in types))
+        if ranks is not None:
+            ids &= set().union(*(self.by_rank.get(r, ()) for r in ranks))
+        if available is not None:
+            ids = ids & self.available if available else ids - self.available
+        return [self.by_id[i] for i in sorted(ids, key=self._positions.__getitem__)]
+
+    def __len__(self) -> int:
+        return len(self.by_id)
+
+
+class OwnedCardIndex:
+    """
+    The distinct cards someone owns as sorted (lowercase name, id) and (id as text, id)
+    lists, so completing what they type is a binary search for the prefix instead
+    of going through every card they own.
+    """
+
+    def __init__(self, card_ids: Iterable[int], catalog: CardCatalog):
+        self.catalog = catalog
+        owned = {card_id for card_id in card_ids if card_id in catalog.by_id}
+        self._names = sorted(
+            (catalog.by_id[card_id]["name"].lower(), card_id) for card_id in owned
+        )
+        self._ids = sorted((str(card_id), card_id) for card_id in owned)
+
+    @staticmethod
+    def _starting_with(entries: list[tuple[str, int]], prefix: str) -> Iterator[int]:
+        for position in range(bisect_left(entries, (prefix,)), len(entries)):
+            key, card_id = entries[position]
+            if not key.startswith(prefix):
+                return
+            yield card_id
+
+    def complete(
+        self,
+        current: str,
+        predicate: Callable[[int], bool] | None = None,
+        limit: int = 25,
+    ) -> list[tuple[str, int]]:
+        """
+        (name to show, card id) of the owned cards whose name starts with `current`,
+        followed by the ones whose id does if anything was typed yet
+        """
+        matches = (
+            (self.catalog.by_id[card_id]["name"], card_id)
+            for card_id in self._starting_with(self._names, current.lower())
+        )
+        if current:
+            matches = chain(
+                matches,
+                (
+                    (str(card_id), card_id)
+                    for card_id in self._starting_with(self._ids, current)
+                ),
+            )
+        return list(
+            islice(
+                (m for m in matches if predicate is None or predicate(m[1])), limit
+            )
+        )
+
+    def __len__(self) -> int:
+        return len(self._ids)
@@ -0,0 +1,168 @@
+"""A compact list of the cards a user has in one kind of slots."""
+
+from __future__ import annotations
+
+from array import array
+from typing import Any, Iterable, Iterator
+
+FAKE = 1
+CLONE = 2
+
+
+class CardCollection:
+    """
+    The cards in the restricted or free slots of a user, in the order they were added.
+
+    Instead of a list with a dict for every card, the ids are kept in an `array("H")`
+    next to a `bytearray` of flags (`FAKE | CLONE`). How many copies and how many real
+    copies there are of every card, and of all cards together, is counted as cards are
+    added and removed, so checking for or counting a card does not have to look at
+    every card. Iterating and indexing still give `[id, {"fake": bool, "clone": bool}]`
+    like the documents in the database, `to_list` turns it back into one.
+    """
+
+    __slots__ = ("_ids", "_flags", "_counts", "_real", "real_count", "version")
+
+    def __init__(self, cards: Iterable[list | tuple] = ()):
+        self._ids = array("H")
+        self._flags = bytearray()
+        # card id -> copies, and -> copies that are not fake
+        self._counts: dict[int, int] = {}
+        self._real: dict[int, int] = {}
+        self.real_count = 0
+        # Goes up with every change, for anything that needs to know if it is outdated
+        self.version = 0
+        for card in cards:
+            self.append(card)
+
+    @staticmethod
+    def _pack(data: dict[str, Any]) -> int:
+        return (FAKE if data["fake"] else 0) | (CLONE if data.get("clone") else 0)
+
+    @staticmethod
+    def _unpack(card_id: int, flags: int) -> list[int | dict[str, bool]]:
+        return [card_id, {"fake": bool(flags & FAKE), "clone": bool(flags & CLONE)}]
+
+    def _track(self, card_id: int, flags: int, change: int) -> None:
+        self.version += 1
+        self._counts[card_id] = self._counts.get(card_id, 0) + change
+        if not self._counts[card_id]:
+            del self._counts[card_id]
+        if not flags & FAKE:
+            self.real_count += change
+            self._real[card_id] = self._real.get(card_id, 0) + change
+            if not self._real[card_id]:
+                del self._real[card_id]
+
+    def append(self, card: list | tuple) -> None:
+        """Adds a card in the shape it has in the database"""
+        card_id, flags = card[0], self._pack(card[1])
+        self._ids.append(card_id)
+        self._flags.append(flags)
+        self._track(card_id, flags, 1)
+
+    def extend(self, cards: Iterable[list | tuple]) -> None:
+        for card in cards:
+            self.append(card)
+
+    def find(
+        self, card_id: int, fake: bool | None = None, clone: bool | None = None
+    ) -> int | None:
+        """The position of the first copy of a card with the given flags, None if there is none"""
+        if card_id not in self._counts:
+            return None
+        for position, (id, flags) in enumerate(zip(self._ids, self._flags)):
+            if (
+                id == card_id
+                and (fake is None or bool(flags & FAKE) == fake)
+                and (clone is None or bool(flags & CLONE) == clone)
+            ):
+                return position
+        return None
+
+    def index(self, card: list | tuple) -> int:
+        position = self.find(card[0], bool(card[1]["fake"]), bool(card[1].get("clone")))
+        if position is None:
+            raise ValueError(f"{card} is not in the collection")
+        return position
+
+    def positions(self, cards: Iterable[list | tuple]) -> list[int | None]:
+        """
+        The positions removing each of `cards` one after the other would remove them
+        from, None for the ones there is no copy of left
+        """
+        wanted = [(card[0], self._pack(card[1])) for card in cards]
+        found: dict[tuple[int, int], list[int]] = {key: [] for key in wanted}
+        for position, key in enumerate(zip(self._ids, self._flags)):
+            if key in found:
+                found[key].append(position)
+        for positions in found.values():
+            positions.reverse()
+        return [found[key].pop() if found[key] else None for key in wanted]
+
+    def remove(self, card: list | tuple) -> None:
+        """Removes the first copy of a card that is exactly like `card`"""
+        del self[self.index(card)]
+
+    def has(
+        self, card_id: int, fake_allowed: bool = True, only_allow_fakes: bool = False
+    ) -> bool:
+        """Whether there is a copy of the card, see `User.has_any_card`"""
+        real = self._real.get(card_id, 0)
+        fakes = self._counts.get(card_id, 0) - real
+        if only_allow_fakes:
+            return fakes > 0
+        return real > 0 or (fake_allowed and fakes > 0)
+
+    def count(self, card_id: int, including_fakes: bool = True) -> int:
+        """How many copies of a card there are"""
+        if including_fakes:
+            return self._counts.get(card_id, 0)
+        return self._real.get(card_id, 0)
+
+    @property
+    def ids(self) -> Iterable[int]:
+        """Every card there is at least one copy of"""
+        return self._counts.keys()
+
+    def to_list(self) -> list[list[int | dict[str, bool]]]:
+        """The cards in the shape they are saved in the database"""
+        return list(self)
+
+    def __getitem__(self, position: int) -> list[int | dict[str, bool]]:
+        return self._unpack(self._ids[position], self._flags[position])
+
+    def __setitem__(self, position: int, card: list | tuple) -> None:
+        self._track(self._ids[position], self._flags[position], -1)
+        self._ids[position], self._flags[position] = card[0], self._pack(card[1])
+        self._track(card[0], self._flags[position], 1)
+
+    def __delitem__(self, position: int) -> None:
+        card_id, flags = self._ids[position], self._flags[position]
+        del self._ids[position]
+        del self._flags[position]
+        self._track(card_id, flags, -1)
+
+    def __iter__(self) -> Iterator[list[int | dict[str, bool]]]:
+        for card_id, flags in zip(self._ids, self._flags):
+            yield self._unpack(card_id, flags)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, card: object) -> bool:
+        try:
+            self.index(card)  # type: ignore
+        except (ValueError, TypeError, IndexError, KeyError):
+            return False
+        return True
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, CardCollection):
+            return self._ids == other._ids and self._flags == other._flags
+        if isinstance(other, list):
+            return self.to_list() == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"CardCollection({self.to_list()!r})"
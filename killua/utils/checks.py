@@ -1,57 +1,143 @@
 import discord
 from discord.ext import commands
+import asyncio
+from collections import Counter
 from typing import Type
 from datetime import datetime, timedelta
+from time import monotonic
 from typing import cast
 
 from killua.bot import BaseBot
-from killua.static.constants import DB, PatreonBanner, daily_users
+from killua.static.constants import (
+    DB,
+    PatreonBanner,
+    daily_users,
+    BLACKLIST_REFRESH_INTERVAL,
+)
 from .classes import User, Guild
+from .cooldowns import CooldownStore
 
-cooldowndict = {}
+cooldowns = CooldownStore()
 
 
 class CommandUsageCache:
-    data: dict = None
+    """
+    Counts command usage in memory and writes it to the database in batches
+    instead of once per command. `counts` holds the total of every command
+    (what was loaded from the database plus everything counted since),
+    `pending` holds what has not been written to the database yet
+    """
+
+    counts: dict[str, int] | None = None
+    pending: Counter[str] = Counter()
+    _lock = asyncio.Lock()
+
+    @classmethod
+    async def load(cls) -> dict[str, int]:
+        """Returns the usage of every command, loading it from the database the first time"""
+        if cls.counts is None:
+            async with cls._lock:
+                if cls.counts is None:
+                    data = await DB.const.find_one({"_id": "usage"})
+                    counts = Counter(data["command_usage"] if data else {})
+                    # Anything counted while loading is not in the database yet
+                    counts.update(cls.pending)
+                    cls.counts = dict(counts)
+        return cls.counts
+
+    @classmethod
+    def add(cls, key: str, amount: int = 1) -> None:
+        cls.pending[key] += amount
+        if cls.counts is not None:
+            cls.counts[key] = cls.counts.get(key, 0) + amount
+
+    @classmethod
+    async def flush(cls) -> None:
+        """Writes all pending usage to the database as a single update"""
+        if not cls.pending:
+            return
+
+        pending, cls.pending = cls.pending, Counter()
+        try:
+            await DB.const.update_one(
+                {"_id": "usage"},
+                {"$inc": {f"command_usage.{k}": v for k, v in pending.items()}},
+            )
+        except Exception:
+            # Keep them around for the next try
+            cls.pending.update(pending)
+            raise
+
+    @classmethod
+    def get(cls, key: str, default: int = 0) -> int:
+        return (cls.counts or {}).get(key, default)
+
+    @classmethod
+    def reset(cls) -> None:
+        """Forgets all counts, including ones that have not been written yet"""
+        cls.counts = None
+        cls.pending = Counter()
 
+
+class BlacklistCache:
     """
-    A class to cache command usage
+    Keeps the ids of all blacklisted users in memory so checking a user
+    does not need a database request. The dev blacklist and whitelist commands
+    keep it up to date and it is reloaded every BLACKLIST_REFRESH_INTERVAL
+    seconds to pick up changes made from somewhere else
     """
 
-    def __init__(self): ...
+    ids: set[int] | None = None
+    loaded_at: float = 0.0
+    _lock = asyncio.Lock()
 
-    def get(self, key):
-        return self.data[key]
+    @classmethod
+    def _is_stale(cls) -> bool:
+        return (
+            cls.ids is None
+            or monotonic() - cls.loaded_at > BLACKLIST_REFRESH_INTERVAL
+        )
 
-    async def set(self, key, value):
-        self.data[key] = value
-        await DB.const.update_one(
-            {"_id": "usage"}, {"$set": {"command_usage": self.data}}
+    @classmethod
+    async def get(cls) -> set[int]:
+        if cls._is_stale():
+            async with cls._lock:
+                if cls._is_stale():  # Someone else may have refreshed it while we waited
+                    await cls.refresh()
+        return cls.ids
+
+    @classmethod
+    async def refresh(cls) -> None:
+        """Reloads the blacklisted ids from the database"""
+        data = await DB.const.find_one(
+            {"_id": "blacklist"}, projection={"blacklist.id": 1}
         )
+        cls.ids = {d["id"] for d in data["blacklist"]} if data else set()
+        cls.loaded_at = monotonic()
 
-    def __contains__(self, key):
-        return key in self.data
+    @classmethod
+    def add(cls, user_id: int) -> None:
+        if cls.ids is not None:
+            cls.ids.add(user_id)
 
-    def get(self, key, default):
-        return self.data.get(key, default)
+    @classmethod
+    def remove(cls, user_id: int) -> None:
+        if cls.ids is not None:
+            cls.ids.discard(user_id)
+
+    @classmethod
+    def reset(cls) -> None:
+        """Forgets the loaded ids so the next check reloads them"""
+        cls.ids = None
 
 
 async def blcheck(
     userid: int,
-):  # It is necessary to define it twice as I might have to use this function on its own
+) -> bool:  # It is necessary to define it twice as I might have to use this function on its own
     """
     Checks if a user is blacklisted
     """
-    result = [
-        d
-        for d in (await DB.const.find_one({"_id": "blacklist"}))["blacklist"]
-        if d["id"] == userid
-    ]
-
-    if not result:
-        return False
-    else:
-        return True
+    return userid in await BlacklistCache.get()
 
 
 def premium_guild_only():
@@ -120,10 +206,9 @@ def check(time: int = 0):
 
     def add_daily_user(userid: int):
         """
-        Adds a user who has run a command to the daily_users list if they are not already in it
+        Counts a user who has run a command as active today
         """
-        if userid not in daily_users.users:
-            daily_users.users.append(userid)
+        daily_users.add(userid)
 
     async def add_usage(
         command: commands.Command | Type[commands.Command],
@@ -134,34 +219,20 @@ def check(time: int = 0):
         ):
             return
 
-        data = CommandUsageCache()
-        if data.data is None:
-            data.data = dict(await DB.const.find_one({"_id": "usage"}))["command_usage"]
-
-        await data.set(
-            str(command.extras["id"]), data.get(str(command.extras["id"]), 0) + 1
-        )
+        CommandUsageCache.add(str(command.extras["id"]))
 
     async def custom_cooldown(
         ctx: commands.Context, time: int, user: User, guild: Guild
     ) -> bool:
-        global cooldowndict
-        now = datetime.now()
-        try:
-            cdwn = cooldowndict[ctx.author.id][ctx.command.name]
-        except (
-            KeyError
-        ) as e:  # if there is no entry in the cooldowndict yet for either the command or user
-            error = e.args[0]
-            if error == ctx.author.id:
-                cooldowndict = {ctx.author.id: {ctx.command.name: now}}
-                return True
-            if error == ctx.command.name:
-                cooldowndict[ctx.author.id][ctx.command.name] = now
-                return True
-
-        cd: timedelta = now - cdwn
-        diff = cd.seconds
+        if guild and guild.is_premium:
+            time /= 2
+
+        if user.is_premium:
+            time /= 2
+
+        remaining = cooldowns.use(ctx.author.id, ctx.command.name, time)
+        if not remaining:
+            return True
 
         view = discord.ui.View()
         view.add_item(
@@ -172,17 +243,7 @@ def check(time: int = 0):
             )
         )  # sadly I cannot color a link button :c
 
-        if guild and guild.is_premium:
-            time /= 2
-
-        if user.is_premium:
-            time /= 2
-
-        if diff > time:
-            cooldowndict[ctx.author.id][ctx.command.name] = now
-            return True
-
-        timestamp = f"<t:{int((now + timedelta(seconds=time)).timestamp())}:R>"
+        timestamp = f"<t:{int((datetime.now() + timedelta(seconds=remaining)).timestamp())}:R>"
 
         embed = discord.Embed(
             title="Cooldown",
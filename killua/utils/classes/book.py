@@ -10,7 +10,10 @@ from pathlib import Path
 
 from killua.utils.classes.user import User
 from killua.utils.classes.card import Card
+from killua.utils.atlas import CardAtlas
+from killua.utils.cache import BytesCache
 from killua.bot import BaseBot as Bot
+from killua.static.constants import CARD_ATLAS_PATH, BOOK_PAGE_CACHE_BYTES
 
 
 # pillow logic contributed by DerUSBstick (Thank you!)
@@ -18,6 +21,10 @@ class Book:
 
     background_cache = {}
     card_cache = {}
+    atlas = CardAtlas(CARD_ATLAS_PATH)
+    # (page, restricted slots, fingerprint) -> PNG of the page
+    page_cache: BytesCache[tuple] = BytesCache("book_page", BOOK_PAGE_CACHE_BYTES)
+    scalar = 2
 
     def __init__(
         self, client: Bot
@@ -26,7 +33,6 @@ class Book:
         self.base_url = client.api_url(to_fetch=True)
         self.client = client
         self._book_token_cache: tuple[str, str] | None = None
-        self.scalar = 2
 
     @property
     def book_token_cache(self) -> tuple[str, str]:
@@ -37,14 +43,36 @@ class Book:
 
     async def create_image(
         self, data: list[list[Any]], restricted_slots: bool, page: int
-    ) -> Image.Image:
-        """Creates the book image of the current page and returns it"""
-        background = await self._get_background(0 if len(data) == 10 else 1)
+    ) -> BytesIO:
+        """Creates the book image of the current page and returns it as a PNG"""
+        option = 0 if len(data) == 10 else 1
+        background = await self._get_background(option)
+        cards = await self._get_cards(data)
+        return BytesIO(
+            await self.client.renderer.run(
+                Book._render, background, cards, data, restricted_slots, page, option
+            )
+        )
+
+    @classmethod
+    def _render(
+        cls,
+        background: Image.Image,
+        cards: list[Image.Image | None],
+        data: list[list[Any]],
+        restricted_slots: bool,
+        page: int,
+        option: int,
+    ) -> bytes:
+        """Draws a page of the book. Runs in a render worker"""
         if restricted_slots:
-            background = self._numbers(background, data, page)
-        background = await self._cards(background, data, 0 if len(data) == 10 else 1)
-        background = self._set_page(background, page)
-        return background
+            background = cls._numbers(background, data, page)
+        background = cls._paste_cards(background, cards, option)
+        background = cls._set_page(background, page)
+
+        buffer = BytesIO()
+        background.save(buffer, "png")
+        return buffer.getvalue()
 
     def _get_from_cache(self, types: int) -> Image.Image | None:
         """Gets background from the cache if it exists, otherwise returns None"""
@@ -94,15 +122,17 @@ class Book:
         # await asyncio.sleep(0.4) # This is to hopefully prevent aiohttp's "Response payload is not completed" bug
         return image_card
 
-    def _set_page(self, image: Image.Image, page: int) -> Image.Image:
+    @classmethod
+    def _set_page(cls, image: Image.Image, page: int) -> Image.Image:
         """Gets the plain page background and sets the page number"""
-        font = self._get_font(20 * self.scalar)
+        font = cls._get_font(20 * cls.scalar)
         draw = ImageDraw.Draw(image)
-        draw.text((5 * self.scalar, 385 * self.scalar), f"{page*2-1}", (0, 0, 0), font=font)
-        draw.text((595 * self.scalar, 385 * self.scalar), f"{page*2}", (0, 0, 0), font=font)
+        draw.text((5 * cls.scalar, 385 * cls.scalar), f"{page*2-1}", (0, 0, 0), font=font)
+        draw.text((595 * cls.scalar, 385 * cls.scalar), f"{page*2}", (0, 0, 0), font=font)
         return image
 
-    def _get_font(self, size: int) -> ImageFont.FreeTypeFont:
+    @staticmethod
+    def _get_font(size: int) -> ImageFont.FreeTypeFont:
         font = ImageFont.truetype(
             str(Path(__file__).parent.parent.parent) + "/static/font.ttf",
             size,
@@ -110,7 +140,23 @@ class Book:
         )
         return font
 
-    async def _cards(self, image: Image.Image, data: list[list[Any]], option: int) -> Image.Image:
+    async def _get_cards(self, data: list[list[Any]]) -> list[Image.Image | None]:
+        """Gets the image of every card on the page, None for empty slots"""
+        cards = []
+        for i in data:
+            if i and i[1]:
+                card = self.atlas.get(i[0], self.scalar)
+                if card is None:  # Only download cards the atlas does not have (yet)
+                    if str(i[0]) not in self.card_cache:
+                        self.card_cache[str(i[0])] = await self._get_card(i[1])
+                    card = self.card_cache[str(i[0])]
+                cards.append(card)
+            else:
+                cards.append(None)
+        return cards
+
+    @classmethod
+    def _paste_cards(cls, image: Image.Image, cards: list[Image.Image | None], option: int) -> Image.Image:
         """Puts the cards on the background if there are any"""
         card_pos: list[list[tuple[int, int]]] = [
             [
@@ -147,17 +193,14 @@ class Book:
             ],
         ]
         # Multiply all by scalar
-        card_pos = [[(x * self.scalar, y * self.scalar) for x, y in i] for i in card_pos]
-        for n, i in enumerate(data):
-            if i and i[1]:
-                if str(i[0]) not in self.card_cache:
-                    self.card_cache[str(i[0])] = await self._get_card(i[1])
-
-                card = self.card_cache[str(i[0])]
+        card_pos = [[(x * cls.scalar, y * cls.scalar) for x, y in i] for i in card_pos]
+        for n, card in enumerate(cards):
+            if card:
                 image.paste(card, (card_pos[option][n]), card)
         return image
 
-    def _numbers(self, image: Image.Image, data: list[list[Any]], page: int) -> Image.Image:
+    @classmethod
+    def _numbers(cls, image: Image.Image, data: list[list[Any]], page: int) -> Image.Image:
         """Puts the numbers on the restricted slots in the book"""
         page -= 1
         numbers_pos: list[list[tuple[int, int]]] = [
@@ -294,15 +337,20 @@ class Book:
                 (535, 317),
             ],
         ]
-        numbers_pos = [[(x * self.scalar, y * self.scalar) for x, y in i] for i in numbers_pos]
+        numbers_pos = [[(x * cls.scalar, y * cls.scalar) for x, y in i] for i in numbers_pos]
 
-        font = self._get_font(35 * self.scalar)
+        font = cls._get_font(35 * cls.scalar)
         draw = ImageDraw.Draw(image)
         for n, i in enumerate(data):
             if i[1] is None:
-                draw.text(numbers_pos[page][n], f"0{i[0]}" if i[0] > 9 else f"00{i[0]}", (165 * self.scalar, 165 * self.scalar, 165 * self.scalar), font=font)
+                draw.text(numbers_pos[page][n], f"0{i[0]}" if i[0] > 9 else f"00{i[0]}", (165 * cls.scalar, 165 * cls.scalar, 165 * cls.scalar), font=font)
         return image
 
+    @staticmethod
+    def _fingerprint(data: list[list[Any] | None]) -> tuple:
+        """Which card is in every slot of a page, None for empty slots"""
+        return tuple(i[0] if i and i[1] else None for i in data)
+
     async def _get_book(
         self,
         user: discord.Member,
@@ -319,6 +367,7 @@ class Book:
 
         # Bringing the list in the right format for the image generator
         if page < 7:
+            owned = person.rs_cards.ids
             if page == 1:
                 i = 0
             else:
@@ -328,7 +377,7 @@ class Book:
                 # the right part out of the list. It also saves me lines!
             while len(rs_cards) % 18 != 0 or len(rs_cards) == 0:
                 # I killed my pc multiple times while testing, don't use while loops!
-                if i not in [x[0] for x in person.rs_cards]:
+                if i not in owned:
                     rs_cards.append([i, None])
                 else:
                     rs_cards.append(
@@ -356,17 +405,24 @@ class Book:
                     fs_cards.append(None)
                 i = i + 1
 
-        image = await self.create_image(
-            rs_cards if (page <= 6 and not just_fs_cards) else fs_cards,
-            (page <= 6 and not just_fs_cards),
+        restricted_slots = page <= 6 and not just_fs_cards
+        data = rs_cards if restricted_slots else fs_cards
+        # The page only looks different if other slots are filled or the card data or
+        # images changed, so that is all the key needs.
+        # The url can't be part of it because it contains a token that changes
+        key = (
             page,
+            restricted_slots,
+            self._fingerprint(data),
+            Card.catalog().version,
+            self.atlas.version,
         )
 
-        buffer = BytesIO()
-        image.save(buffer, "png")
-        buffer.seek(0)
+        if (image := self.page_cache.get(key)) is None:
+            image = (await self.create_image(data, restricted_slots, page)).getvalue()
+            self.page_cache.set(key, image)
 
-        f = discord.File(buffer, filename="image.png")
+        f = discord.File(BytesIO(image), filename="image.png")
         embed = discord.Embed.from_dict(
             {
                 "title": f"{user.display_name}'s book",
@@ -11,9 +11,11 @@ from killua.static.constants import (
     DEF_SPELLS,
     VIEW_DEF_SPELLS,
     FREE_SLOTS,
+    USER_LOCK_TIMEOUT,
     DB,
 )
 from killua.bot import BaseBot
+from killua.utils.card_catalog import CardCatalog
 
 
 from killua.utils.classes import User
@@ -56,7 +58,21 @@ class Card:
     _cls: list[str] | None = None
 
     cache: ClassVar[dict[int, Card]] = {}  # Cached objects
-    cached_raw: ClassVar[list[tuple[str, int]]] = []  # String to int ID mapping
+    _catalog: ClassVar[CardCatalog | None] = None  # Indexes of raw
+
+    @classmethod
+    def load(cls, raw: list[dict[str, str | int | bool]]) -> None:
+        """Replaces the card data, together with its indexes"""
+        catalog = CardCatalog(raw)
+        Card.raw, Card._catalog = raw, catalog
+
+    @classmethod
+    def catalog(cls) -> CardCatalog:
+        """The indexes of the current card data"""
+        # Built again if the card data was replaced without using `load`
+        if Card._catalog is None or Card._catalog.raw is not Card.raw:
+            Card._catalog = CardCatalog(Card.raw)
+        return Card._catalog
 
     @classmethod
     def is_book_completion_card(cls, card_id: int) -> bool:
@@ -86,23 +102,9 @@ class Card:
 
     @classmethod
     def _find_card(cls, name_or_id: int | str) -> int | None:
-
-        # This could be solved much easier but this allows the user to
-        # have case insensitivity when looking for a card
-        if not cls.cached_raw:
-            cls.cached_raw = [(c["name"], c["id"]) for c in cls.raw]
-
-        for c in cls.cached_raw:
-
-            if not isinstance(name_or_id, int) and not name_or_id.isdigit():
-                if c[0].lower() == name_or_id.lower():
-                    return c[1]
-            elif isinstance(name_or_id, int):
-                if c[1] == name_or_id:
-                    return c[1]
-            else:
-                if c[1] == int(name_or_id):
-                    return c[1]
+        # Names are looked up in lowercase so the user does not have to get the case right
+        card = cls.catalog().get(name_or_id)
+        return None if card is None else card["id"]
 
     def __init__(self, name_or_id: str | int, ctx: commands.Context | None = None):
         cards_id = self._find_card(name_or_id)
@@ -114,7 +116,7 @@ class Card:
         if cards_id is None:
             raise CardNotFound
 
-        raw = next(c for c in self.raw if c["id"] == cards_id)
+        raw = self.catalog().by_id[cards_id]
 
         self.id = cards_id
         self.name = raw["name"]
@@ -132,12 +134,43 @@ class Card:
         self.cache[cards_id] = self
 
     @classmethod
-    def find(cls, conditions: Callable[dict, bool]) -> list[Card]:  # type: ignore
+    def find(
+        cls,
+        conditions: Callable[dict, bool] | None = None,  # type: ignore
+        *,
+        types: list[str] | None = None,
+        ranks: list[str] | None = None,
+        available: bool | None = None,
+    ) -> list[Card]:
         """
         Finds all cards that match the given conditions, replacing mongo's find method.
+        `types`, `ranks` and `available` are looked up in the indexes, `conditions`
+        is only called for the cards that match them.
         Already parses the cards to Card classes in the return value
         """
-        return [cls(c["id"]) for c in cls.raw if conditions(c)]
+        return [
+            cls(c["id"])
+            for c in cls.catalog().select(types=types, ranks=ranks, available=available)
+            if conditions is None or conditions(c)
+        ]
+
+    @classmethod
+    async def owned_choices(
+        cls,
+        user_id: int,
+        current: str,
+        predicate: Callable[[int], bool] | None = None,
+    ) -> list[discord.app_commands.Choice[str]]:
+        """Autocomplete choices of the cards a user owns that match what they typed so far"""
+        index = (await User.new(user_id)).owned_card_index(cls.catalog())
+        return [
+            discord.app_commands.Choice(name=name, value=str(card_id))
+            for name, card_id in index.complete(
+                current,
+                lambda card_id: not cls.is_book_completion_card(card_id)
+                and (predicate is None or predicate(card_id)),
+            )
+        ]
 
     async def owners(self) -> list[int]:
         return [
@@ -209,7 +242,8 @@ class Card:
             return
 
         if isinstance(view.value, int):
-            await other.remove_card(view.value)
+            async with User.locks.hold(other.id, timeout=USER_LOCK_TIMEOUT):
+                await other.remove_card(view.value)
             raise SuccessfulDefense(
                 f"<@{other.id}> successfully defended against your attack"
             )
@@ -219,17 +253,34 @@ class Card:
                 reference=msg,
             )
 
-    async def _view_defense_check(self, ctx: commands.Context, other: "User") -> None:
+    def _hold(
+        self, *members: discord.abc.Snowflake, timeout: float = USER_LOCK_TIMEOUT
+    ):
+        """
+        Holds the locks of the author and `members` while checking and changing their
+        cards. Never wait for anyone to respond while holding them, since every other
+        command changing the cards of these users waits until they are released.
+        """
+        return User.locks.hold(
+            self.ctx.author.id, *[m.id for m in members], timeout=timeout
+        )
+
+    def _view_defenses(self, other: "User") -> list[int]:
+        """The spells `other` can defend themselves against being looked at with"""
         effects = []
         for c in other.fs_cards:
             if c[0] in VIEW_DEF_SPELLS and not c[0] in effects:
                 effects.append(c[0])
+        return effects
 
-        await self._wait_for_defense(ctx, other, effects)
+    async def _view_defense_check(self, ctx: commands.Context, other: "User") -> None:
+        await self._wait_for_defense(ctx, other, self._view_defenses(other))
 
-    async def _attack_defense_check(
-        self, ctx: commands.Context, other: "User", target_card: int
-    ) -> None:
+    async def _attack_defenses(self, other: "User", target_card: int) -> list[int]:
+        """
+        The spells `other` can defend themselves against this attack with. Raises
+        `SuccessfulDefense` if they are protected without having to choose one.
+        """
         if target_card in [
             x[0] for x in other.rs_cards
         ]:  # A list of cards that steal from restricted slots
@@ -262,8 +313,14 @@ class Card:
                 if c[0] == 1004 and self.ctx.author.id not in other.met_user:
                     continue
                 effects.append(c[0])
+        return effects
 
-        await self._wait_for_defense(ctx, other, effects)
+    async def _attack_defense_check(
+        self, ctx: commands.Context, other: "User", target_card: int
+    ) -> None:
+        await self._wait_for_defense(
+            ctx, other, await self._attack_defenses(other, target_card)
+        )
 
     def _permission_check(self, ctx: commands.Context, member: discord.Member) -> None:
         perms = ctx.channel.permissions_for(member)
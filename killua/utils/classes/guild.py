@@ -1,12 +1,16 @@
 from __future__ import annotations
 
+from contextlib import AbstractAsyncContextManager
 from typing import Any, ClassVar
+from bisect import bisect_left, insort
 from dataclasses import dataclass, field
 from inspect import signature
 from datetime import datetime
 
-from killua.static.constants import DB
+from killua.static.constants import DB, GUILD_CACHE_SIZE, GUILD_CACHE_TTL
+from killua.utils.cache import ObjectCache
 from killua.utils.classes.user import User
+from killua.utils.unit_of_work import UnitOfWork, current_unit_of_work, unit_of_work
 
 @dataclass
 class Guild:
@@ -22,7 +26,20 @@ class Guild:
     polls: dict = field(default_factory=dict)
     tags: list[dict] = field(default_factory=list)
     added_on: datetime | None = None
-    cache: ClassVar[dict[int, Guild]] = {}
+    # Lowercase tag name -> position in `tags`, and (-uses, lowercase name) of every
+    # tag, sorted. Built from `tags` when first needed and again if it is replaced
+    _tag_positions: dict[str, int] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    _tags_by_uses: list[tuple[int, str]] = field(
+        default_factory=list, init=False, repr=False, compare=False
+    )
+    _indexed_tags: list[dict] | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    cache: ClassVar[ObjectCache[int, Guild]] = ObjectCache(
+        "guild", GUILD_CACHE_SIZE, GUILD_CACHE_TTL
+    )
 
     @classmethod
     def from_dict(cls, raw: dict):
@@ -52,12 +69,17 @@ class Guild:
 
     @classmethod
     async def new(cls, guild_id: int, member_count: int | None = None) -> Guild:
-        if guild_id in cls.cache:
-            cls.cache[guild_id].approximate_member_count = await cls._member_count_helper(
-                guild_id, cls.cache[guild_id].approximate_member_count, member_count
+        if (cached := cls.cache.get(guild_id)) is not None:
+            cached.approximate_member_count = await cls._member_count_helper(
+                guild_id, cached.approximate_member_count, member_count
             )
-            return cls.cache[guild_id]
-    
+            return cached
+        # Concurrent calls for the same guild share one database request
+        return await cls.cache.load(guild_id, lambda: cls._from_db(guild_id, member_count))
+
+    @classmethod
+    async def _from_db(cls, guild_id: int, member_count: int | None) -> Guild:
+        """Loads a guild from the database, adding it first if it is not in it yet"""
         raw: dict | None = await DB.guilds.find_one({"id": guild_id}) # type: ignore
         if raw is None:
             await cls.add_default(guild_id, member_count)
@@ -67,10 +89,7 @@ class Guild:
         raw["approximate_member_count"] = await cls._member_count_helper(
             guild_id, raw.get("approximate_member_count", None), member_count
         )
-        guild = cls.from_dict(raw)
-        cls.cache[guild_id] = guild
-
-        return guild
+        return cls.from_dict(raw)
 
     @property
     def is_premium(self) -> bool:
@@ -108,13 +127,26 @@ class Guild:
         results = await cursor.to_list(length=None)
         return [guild["id"] for guild in results]
 
+    @classmethod
+    def batch(cls) -> AbstractAsyncContextManager[UnitOfWork]:
+        """Writes the changes made to users and guilds in the block together when it is left"""
+        return unit_of_work()
+
+    async def _update(self, update: dict[str, dict], where: dict | None = None) -> None:
+        """Writes an update of the guild, or adds it to the unit of work this runs in"""
+        where = {"id": self.id, **(where or {})}
+        if (unit := current_unit_of_work()) is not None:
+            unit.add("guilds", where, update)
+        else:
+            await DB.guilds.update_one(where, update)
+
     async def _update_val(self, key: str, value: Any, operator: str = "$set") -> None:
         """An easier way to update a value"""
-        await DB.guilds.update_one({"id": self.id}, {operator: {key: value}})
+        await self._update({operator: {key: value}})
 
     async def delete(self) -> None:
         """Deletes a guild from the database"""
-        del self.cache[self.id]
+        self.cache.pop(self.id, None)
         await DB.guilds.delete_one({"id": self.id})
 
     async def change_prefix(self, prefix: str) -> None:
@@ -146,3 +178,76 @@ class Guild:
         """Updates the votes of a poll"""
         self.polls[str(id)]["votes"] = updated
         await self._update_val(f"polls.{id}.votes", updated)
+
+    def _index_tags(self) -> None:
+        """Builds the tag index if `tags` changed since it was last built"""
+        if self._indexed_tags is self.tags:
+            return
+        self._tag_positions = {
+            tag["name"].lower(): position for position, tag in enumerate(self.tags)
+        }
+        self._tags_by_uses = sorted(
+            (-tag["uses"], tag["name"].lower()) for tag in self.tags
+        )
+        self._indexed_tags = self.tags
+
+    def get_tag(self, name: str) -> dict | None:
+        """Finds a tag by its name, ignoring case"""
+        self._index_tags()
+        position = self._tag_positions.get(name.lower())
+        return None if position is None else self.tags[position]
+
+    @property
+    def tags_by_uses(self) -> list[dict]:
+        """All tags, the most used first"""
+        self._index_tags()
+        return [self.tags[self._tag_positions[name]] for _, name in self._tags_by_uses]
+
+    def tag_rank(self, name: str) -> int:
+        """The position of a tag when sorted by uses, starting at 1"""
+        tag = self.get_tag(name)
+        return bisect_left(self._tags_by_uses, (-tag["uses"], name.lower())) + 1
+
+    async def add_tag(self, tag: dict) -> None:
+        """Adds a new tag"""
+        self._index_tags()
+        self.tags.append(tag)
+        self._tag_positions[tag["name"].lower()] = len(self.tags) - 1
+        insort(self._tags_by_uses, (-tag["uses"], tag["name"].lower()))
+        await self._update_val("tags", tag, "$push")
+
+    async def remove_tag(self, name: str) -> None:
+        """Deletes a tag"""
+        tag = self.get_tag(name)
+        position = self._tag_positions.pop(name.lower())
+        del self.tags[position]
+        del self._tags_by_uses[
+            bisect_left(self._tags_by_uses, (-tag["uses"], name.lower()))
+        ]
+        for later in self.tags[position:]:
+            self._tag_positions[later["name"].lower()] -= 1
+        await self._update_val("tags", {"name": tag["name"]}, "$pull")
+
+    async def update_tag(self, name: str, key: str, value: Any) -> None:
+        """Changes one field of a tag without rewriting the others"""
+        tag = self.get_tag(name)
+        old_name = tag["name"]
+        if key == "name":
+            entry = (-tag["uses"], old_name.lower())
+            del self._tags_by_uses[bisect_left(self._tags_by_uses, entry)]
+            insort(self._tags_by_uses, (-tag["uses"], value.lower()))
+            self._tag_positions[value.lower()] = self._tag_positions.pop(
+                old_name.lower()
+            )
+        tag[key] = value
+        await self._update({"$set": {f"tags.$.{key}": value}}, {"tags.name": old_name})
+
+    async def add_tag_use(self, name: str) -> None:
+        """Counts a use of a tag. Increments it in the database so no concurrent use is lost"""
+        tag = self.get_tag(name)
+        del self._tags_by_uses[
+            bisect_left(self._tags_by_uses, (-tag["uses"], name.lower()))
+        ]
+        tag["uses"] += 1
+        insort(self._tags_by_uses, (-tag["uses"], name.lower()))
+        await self._update({"$inc": {"tags.$.uses": 1}}, {"tags.name": tag["name"]})
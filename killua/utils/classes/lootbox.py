@@ -2,14 +2,16 @@ from __future__ import annotations
 
 import discord
 from discord.ext import commands
+from itertools import accumulate
 from random import sample, randint, choices, choice
-from typing import cast
+from typing import cast, ClassVar
 
 from killua.static.constants import DB
 from killua.static.enums import Booster
 from killua.static.constants import BOOSTERS, LOOTBOXES, PRICES
 from killua.utils.classes.user import User
 from killua.utils.interactions import View
+from killua.utils.card_catalog import CardCatalog
 from killua.utils.classes.card import Card
 
 
@@ -423,9 +425,55 @@ class _LootBoxButton(discord.ui.Button):
             await self._handle_correct(interaction)
 
 
+class _RewardSampler:
+    """What one lootbox can contain, prepared so opening it only has to draw from it"""
+
+    def __init__(self, data: dict, catalog: CardCatalog):
+        cards = data["rewards"].get("cards", {})
+        self.pool = [
+            c["id"]
+            for c in catalog.select(
+                types=cards.get("types", []),
+                ranks=cards.get("rarities", []),
+                available=True,
+            )
+            if c["id"] != 0
+        ]
+        # Every guaranteed card as often as it is guaranteed, these fill the first card slots
+        self.guaranteed = [
+            card
+            for card, amount in data["rewards"]["guaranteed"].items()
+            for _ in range(amount)
+        ]
+        boosters = data["rewards"]["boosters"]
+        self.boosters = [boosters] if isinstance(boosters, int) else boosters
+        # None if the box always contains the same booster
+        self.booster_weights = (
+            None
+            if isinstance(boosters, int)
+            else list(accumulate(BOOSTERS[int(x)]["probability"] for x in boosters))
+        )
+
+    def card(self) -> int:
+        return choice(self.pool)
+
+    def booster(self) -> int:
+        if self.booster_weights is None:
+            return self.boosters[0]
+        return choices(self.boosters, cum_weights=self.booster_weights)[0]
+
+
 class LootBox:
     """A class which contains infos about a lootbox and can open one"""
 
+    # Lootbox id -> sampler, built for one version of the card data
+    _samplers: ClassVar[dict[int, _RewardSampler]] = {}
+    _samplers_catalog: ClassVar[CardCatalog | None] = None
+    _box_ids: ClassVar[list[int]] = list(LOOTBOXES.keys())
+    _box_weights: ClassVar[list[int]] = list(
+        accumulate(x["probability"] for x in LOOTBOXES.values())
+    )
+
     def __init__(self, ctx: commands.Context, rewards: list[None | Card | int]):
         self.ctx = ctx
         self.rewards = rewards
@@ -470,55 +518,39 @@ class LootBox:
     @staticmethod
     def get_random_lootbox() -> int:
         """Gets a random lootbox from the LOOTBOXES constant"""
-        return choices(
-            list(LOOTBOXES.keys()), [x["probability"] for x in LOOTBOXES.values()]
-        )[0]
+        return choices(LootBox._box_ids, cum_weights=LootBox._box_weights)[0]
+
+    @classmethod
+    def samplers(cls) -> dict[int, _RewardSampler]:
+        """The reward samplers of every lootbox, built again when the card data changed"""
+        catalog = Card.catalog()
+        if cls._samplers_catalog is not catalog:
+            cls._samplers = {
+                box: _RewardSampler(data, catalog) for box, data in LOOTBOXES.items()
+            }
+            cls._samplers_catalog = catalog
+        return cls._samplers
 
     @classmethod
     async def generate_rewards(cls, box: int) -> list[Card | int]:
         """Generates a list of rewards that can be used to pass to this class"""
         data = LOOTBOXES[box]
-        rew = []
-
-        for _ in range((cards := randint(*data["cards_total"]))):
-            skip = False
-            if data["rewards"][
-                "guaranteed"
-            ]:  # if a card is guaranteed it is added here, it will count as one of the total_cards though
-                for card, amount in data["rewards"]["guaranteed"].items():
-                    if [r.id for r in rew].count(card) < amount:
-                        rew.append(Card(card))
-                        skip = True
-                        break
-
-            if skip:
-                continue
-            card_pool = Card.find(
-                lambda c: c["rank"] in data["rewards"]["cards"]["rarities"]
-                and c["type"] in data["rewards"]["cards"]["types"]
-                and c["available"]
-                and c["id"] != 0
-            )
-            rew.append(choice(card_pool))
+        sampler = cls.samplers()[box]
 
-        for _ in range(boosters := randint(*data["boosters_total"])):
-            if isinstance(data["rewards"]["boosters"], int):
-                rew.append(Booster(data["rewards"]["boosters"]))
-            else:
-                rew.append(
-                    Booster(
-                        choices(
-                            data["rewards"]["boosters"],
-                            [
-                                BOOSTERS[int(x)]["probability"]
-                                for x in data["rewards"]["boosters"]
-                            ],
-                        )[0]
-                    )
-                )
+        # Guaranteed cards count as one of the total cards
+        cards = randint(*data["cards_total"])
+        rew: list[Card | Booster | int] = [
+            Card(card) for card in sampler.guaranteed[:cards]
+        ]
+        rew.extend(Card(sampler.card()) for _ in range(cards - len(rew)))
+
+        boosters = randint(*data["boosters_total"])
+        rew.extend(Booster(sampler.booster()) for _ in range(boosters))
 
-        for _ in range(data["rewards_total"] - cards - boosters):
-            rew.append(randint(*data["rewards"]["jenny"]))
+        rew.extend(
+            randint(*data["rewards"]["jenny"])
+            for _ in range(data["rewards_total"] - cards - boosters)
+        )
 
         return rew
 
@@ -536,12 +568,13 @@ class LootBox:
             return
 
         user = await User.new(self.ctx.author.id)
-        for r in view.claimed:
-            if isinstance(r, Card):
-                await user.add_card(r.id)
-            elif isinstance(r, Booster):
-                await user.add_booster(r.value)
-            else:
-                if user.is_entitled_to_double_jenny:
-                    r *= 2
-                await user.add_jenny(r)
+        async with User.batch():
+            for r in view.claimed:
+                if isinstance(r, Card):
+                    await user.add_card(r.id)
+                elif isinstance(r, Booster):
+                    await user.add_booster(r.value)
+                else:
+                    if user.is_entitled_to_double_jenny:
+                        r *= 2
+                    await user.add_jenny(r)
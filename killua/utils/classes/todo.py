@@ -7,6 +7,7 @@ from datetime import datetime
 
 from killua.static.constants import DB
 from killua.utils.classes.exceptions import TodoListNotFound
+from killua.utils.reminders import TodoDueQueue
 
 @dataclass
 class TodoList:
@@ -29,6 +30,7 @@ class TodoList:
 
     cache: ClassVar[dict[int, TodoList]] = {}
     custom_id_cache: ClassVar[dict[str, int]] = {}
+    dues: ClassVar[TodoDueQueue] = TodoDueQueue()
 
     @classmethod
     def __get_cache(cls, list_id: int | str):
@@ -154,6 +156,7 @@ class TodoList:
         del self.cache[self.id]
         if self.custom_id:
             del self.custom_id_cache[self.custom_id]
+        self.dues.remove(self.id)
         await DB.todo.delete_one({"_id": self.id})
 
     def has_view_permission(self, user_id: int) -> bool:
@@ -181,6 +184,8 @@ class TodoList:
         """Sets any property and updates the db as well"""
         setattr(self, prop, value)
         await self._update_val(prop, value)
+        if prop == "todos":
+            self.dues.schedule(self.id, value)
 
     async def add_view(self, viewer: int) -> None:
         """Adds a view to a todo lists view count"""
@@ -240,6 +245,7 @@ class TodoList:
         """Removes all todos from a todo list"""
         self.todos = []
         await self._update_val("todos", [])
+        self.dues.remove(self.id)
 
     async def enable_addon(self, addon: str) -> None:
         """Adds an attribute to the bought list to be able to be used"""
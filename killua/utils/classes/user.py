@@ -1,16 +1,31 @@
 from __future__ import annotations
 
+from contextlib import AbstractAsyncContextManager
 from datetime import datetime, timedelta
-from typing import Any, ClassVar, cast, Literal
-from dataclasses import dataclass
+from typing import Any, Callable, ClassVar, cast, Literal
+from dataclasses import dataclass, field
+from functools import partial
 
+from pymongo import ReturnDocument
+
+from killua.metrics import CARD_UPDATE_CONFLICTS
 from killua.static.constants import (
     DB,
+    CARD_UPDATE_ATTEMPTS,
     FREE_SLOTS,
     DEF_SPELLS,
     PREMIUM_ALIASES,
     PATREON_TIERS,
+    USER_CACHE_SIZE,
+    USER_CACHE_TTL,
 )
+from killua.utils.cache import ObjectCache
+from killua.utils.card_catalog import CardCatalog, OwnedCardIndex
+from killua.utils.card_collection import CardCollection
+from killua.utils.leaderboard import leaderboards
+from killua.utils.locks import KeyedLocks
+from killua.utils.reminders import reminder_wheel
+from killua.utils.unit_of_work import UnitOfWork, current_unit_of_work, unit_of_work
 from killua.utils.classes.exceptions import NoMatches, NotInPossession, CardLimitReached
 
 @dataclass
@@ -22,8 +37,8 @@ class User:
     daily_cooldown: datetime
     met_user: list[int]
     effects: dict[str, Any]
-    rs_cards: list[list[int, dict[str, Any]]]
-    fs_cards: list[list[int, dict[str, Any]]]
+    rs_cards: CardCollection
+    fs_cards: CardCollection
     _badges: list[str]
     rps_stats: dict[str, dict[str, int]]
     counting_highscore: dict[str, int]
@@ -42,7 +57,31 @@ class User:
     has_user_installed: bool
     email: str | None
     email_notifications: dict[Literal["news", "updates", "posts"], bool]
-    cache: ClassVar[dict[int, User]] = {}
+    # Counted up in the database with every change to the cards, see `_change_cards`
+    cards_version: int = 0
+    # Built when the user first autocompletes a card, dropped whenever their cards change
+    _owned_index: OwnedCardIndex | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _owned_index_key: tuple | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    # The unit of work cards were last added in and how many times
+    _cards_unit: UnitOfWork | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _cards_pushed: int = field(default=0, init=False, repr=False, compare=False)
+    cache: ClassVar[ObjectCache[int, User]] = ObjectCache(
+        "user", USER_CACHE_SIZE, USER_CACHE_TTL
+    )
+    # Held by commands that check and then change the data of users across awaits
+    locks: ClassVar[KeyedLocks] = KeyedLocks("user")
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        # Cards are always kept in a CardCollection, also when set to a list from the database
+        if name in ("rs_cards", "fs_cards") and not isinstance(value, CardCollection):
+            value = CardCollection(value)
+        super().__setattr__(name, value)
 
     async def set_email(self, email: str) -> None:
         """Sets the user's email address"""
@@ -53,9 +92,14 @@ class User:
     async def new(cls, user_id: int):
         """Creates a new user object"""
         # return cached obj if it exists
-        if user_id in cls.cache:
-            return cls.cache[user_id]
+        if (cached := cls.cache.get(user_id)) is not None:
+            return cached
+        # Concurrent calls for the same user share one database request
+        return await cls.cache.load(user_id, lambda: cls._from_db(user_id))
 
+    @classmethod
+    async def _from_db(cls, user_id: int) -> User:
+        """Loads a user from the database, registering them first if they are not in it yet"""
         data = await DB.teams.find_one({"id": user_id})
         if data is None:
             await cls.add_empty(user_id, cards=False)
@@ -64,7 +108,7 @@ class User:
         data = dict(data)
         data["stats"] = data.get("stats", {})
 
-        instance = User(
+        return User(
             id=user_id,
             jenny=data["points"],
             daily_cooldown=data["cooldowndaily"],
@@ -108,11 +152,9 @@ class User:
                 "email_notifications",
                 {"news": False, "updates": False, "posts": False},
             ),
+            cards_version=data["cards"].get("version", 0),
         )
 
-        cls.cache[user_id] = instance
-        return instance
-
     @property
     def badges(self) -> list[str]:
         badges = (
@@ -125,7 +167,7 @@ class User:
         if self.action_stats.get("hug", {}).get("targeted", 0) >= 500:
             badges.append("pro_hugged")
 
-        if len([x for x in self.rs_cards if not x[1]["fake"]]) == 99:
+        if self.rs_cards.real_count == 99:
             badges.append("greed_island_badge")
 
         if "rps_master" in self.achievements:
@@ -137,6 +179,23 @@ class User:
     def all_cards(self) -> list[int, dict]:
         return [*self.rs_cards, *self.fs_cards]
 
+    def owned_card_index(self, catalog: CardCatalog) -> OwnedCardIndex:
+        """The cards the user owns, indexed to complete what they type"""
+        # Also catches the card lists being replaced or changed outside of this class
+        key = (
+            catalog,
+            id(self.rs_cards),
+            self.rs_cards.version,
+            id(self.fs_cards),
+            self.fs_cards.version,
+        )
+        if self._owned_index is None or self._owned_index_key != key:
+            self._owned_index = OwnedCardIndex(
+                [*self.rs_cards.ids, *self.fs_cards.ids], catalog
+            )
+            self._owned_index_key = key
+        return self._owned_index
+
     @property
     def is_premium(self) -> bool:
         if [x for x in self.badges if x in PREMIUM_ALIASES.keys()]:
@@ -166,6 +225,7 @@ class User:
             )  # setting this to something else by accident could be fatal
         self.fs_cards = []
         self.rs_cards = []
+        self._owned_index = None
 
     @classmethod
     async def remove_all(cls) -> str:
@@ -178,6 +238,7 @@ class User:
             if "id" in u and u["id"] in cls.cache:
                 cls.cache[u["id"]].all_cards = []
                 cls.cache[u["id"]].effects = {}
+                cls.cache[u["id"]].cards_version = 0
 
         await DB.teams.update_many(
             {"$or": [{"id": x} for x in user]},
@@ -327,9 +388,29 @@ class User:
         result = await cursor.to_list(length=1)
         return result[0]["total"] if result else 0
 
+    @classmethod
+    def batch(cls) -> AbstractAsyncContextManager[UnitOfWork]:
+        """Writes the changes made to users and guilds in the block together when it is left"""
+        return unit_of_work()
+
+    async def _update(self, update: dict[str, dict]) -> None:
+        """Writes an update of the user, or adds it to the unit of work this runs in"""
+        if (unit := current_unit_of_work()) is not None:
+            unit.add("teams", {"id": self.id}, update)
+        else:
+            await DB.teams.update_one({"id": self.id}, update)
+
     async def _update_val(self, key: str, value: Any, operator: str = "$set") -> None:
         """An easier way to update a value"""
-        await DB.teams.update_one({"id": self.id}, {operator: {key: value}})
+        await self._update({operator: {key: value}})
+
+    def _update_leaderboard(self, board: str, score: int) -> None:
+        """Records a new score of the user on a leaderboard once it was written"""
+        update = partial(leaderboards[board].update, self.id, score)
+        if (unit := current_unit_of_work()) is not None:
+            unit.after_commit(update)
+        else:
+            update()
 
     async def add_badge(self, badge: str) -> None:
         """Adds a badge to a user"""
@@ -375,8 +456,11 @@ class User:
                 self.voting_streak[site]["streak"] = 1
 
         self.voting_streak[site]["last_vote"] = datetime.now()
-        await self._update_val("voting_streak", self.voting_streak)
-        await self._update_val("votes", 1, "$inc")
+        async with self.batch():
+            await self._update_val("voting_streak", self.voting_streak)
+            await self._update_val("votes", 1, "$inc")
+        if self.voting_reminder:
+            reminder_wheel.set(self.id, self._last_votes)
 
     async def add_premium_guild(self, guild_id: int) -> None:
         """Adds a guild to a users premium guilds"""
@@ -455,27 +539,12 @@ class User:
 
     def _has_card(
         self,
-        cards: list[list],
+        cards: CardCollection,
         card_id: int,
         fake_allowed: bool,
         only_allow_fakes: bool,
     ) -> bool:
-        counter = 0
-        while counter != len(
-            cards
-        ):  # I use a while loop because it has c bindings and is thus faster than a for loop which is good for this
-            id, data = cards[counter]
-            if (id == card_id) and (
-                (only_allow_fakes and data["fake"])
-                or (
-                    (not data["fake"] and not only_allow_fakes)
-                    or (data["fake"] and fake_allowed)
-                )
-            ):
-                return True
-
-            counter += 1
-        return False
+        return cards.has(card_id, fake_allowed, only_allow_fakes)
 
     def has_rs_card(
         self, card_id: int, fake_allowed: bool = True, only_allow_fakes: bool = False
@@ -493,7 +562,9 @@ class User:
         self, card_id: int, fake_allowed: bool = True, only_allow_fakes: bool = False
     ) -> bool:
         """Checks if the user has the card"""
-        return self._has_card(self.all_cards, card_id, fake_allowed, only_allow_fakes)
+        return self._has_card(
+            self.rs_cards, card_id, fake_allowed, only_allow_fakes
+        ) or self._has_card(self.fs_cards, card_id, fake_allowed, only_allow_fakes)
 
     async def remove_jenny(self, amount: int) -> None:
         """Removes x Jenny from a user"""
@@ -501,40 +572,163 @@ class User:
             raise Exception("Trying to remove more Jenny than the user has")
         self.jenny -= amount
         await self._update_val("points", -amount, "$inc")
+        self._update_leaderboard("jenny", self.jenny)
 
     async def add_jenny(self, amount: int) -> None:
         """Adds x Jenny to a users balance"""
         self.jenny += amount
         await self._update_val("points", amount, "$inc")
+        self._update_leaderboard("jenny", self.jenny)
 
     async def set_jenny(self, amount: int) -> None:
         """Sets the users jenny to the specified value. Only used for testing"""
         self.jenny = amount
         await self._update_val("points", amount)
+        self._update_leaderboard("jenny", self.jenny)
 
-    async def _find_match(
-        self,
-        cards: list[list],
-        card_id: int,
-        fake: bool | None,
-        clone: bool | None,
-    ) -> tuple[list[list[int, dict]] | None, list[int, dict] | None]:
-        counter = 0
-        while counter != len(
-            cards
-        ):  # I use a while loop because it has c bindings and is thus faster than a for loop which is good for this
-            id, data = cards[counter]
-            if (
-                (id == card_id)
-                and ((data["clone"] == clone) if not clone is None else True)
-                and ((data["fake"] == fake) if not fake is None else True)
-            ):
-                del cards[
-                    counter
-                ]  # instead of returning the match I delete it because in theory there can be multiple matches and that would break stuff
-                return cards, [id, data]
-            counter += 1
-        return None, None
+    async def _reload_cards(self) -> None:
+        """Replaces the cards in memory with the ones in the database"""
+        data = await DB.teams.find_one({"id": self.id}, projection={"cards": 1})
+        if data is None:
+            return
+        self.rs_cards = data["cards"]["rs"]
+        self.fs_cards = data["cards"]["fs"]
+        self.cards_version = data["cards"].get("version", 0)
+        self._owned_index = None
+
+    async def _change_cards(
+        self, plan: Callable[[], tuple[dict | list, Callable[[], Any]]]
+    ) -> Any:
+        """
+        Writes a change to the cards of the user as a single update of the cards that
+        change, instead of writing all of them again.
+
+        `plan` works the update out from the cards in memory and returns it with a
+        function that makes the same change in memory, whose result is returned. If
+        the update is None nothing needs to be written and only the function runs. The
+        update only applies if the cards in the database still have the version the
+        ones in memory have, otherwise they are loaded again and `plan` is called
+        again. If they keep being changed elsewhere, both lists are overwritten in
+        the end like before the cards had versions.
+
+        In a unit of work, cards that are only added are added to it like other
+        updates. Everything else writes the unit of work first, since it relies on
+        the version of the cards in the database being up to date.
+        """
+        if (unit := current_unit_of_work()) is not None:
+            update, apply = plan()
+            if update is None:
+                return apply()
+            if isinstance(update, dict) and set(update) == {"$push"}:
+                unit.add("teams", {"id": self.id}, self._versioned(update))
+                self._owned_index = None
+                # The version in memory only counts them once they were written,
+                # so other writes until then still expect the one in the database
+                if self._cards_unit is not unit:
+                    self._cards_unit, self._cards_pushed = unit, 0
+                    unit.after_commit(
+                        partial(self._pushed_cards_written, self.cards_version)
+                    )
+                self._cards_pushed += 1
+                return apply()
+            await unit.commit()
+
+        for _ in range(CARD_UPDATE_ATTEMPTS):
+            update, apply = plan()
+            if update is None:
+                return apply()
+            data = await DB.teams.find_one_and_update(
+                # Cards that were never changed like this do not have a version yet
+                {
+                    "id": self.id,
+                    "cards.version": self.cards_version or {"$exists": False},
+                },
+                self._versioned(update),
+                projection={"cards.version": 1},
+                return_document=ReturnDocument.AFTER,
+            )
+            if data is not None:
+                self._owned_index = None
+                self.cards_version = data["cards"]["version"]
+                return apply()
+            CARD_UPDATE_CONFLICTS.inc()
+            await self._reload_cards()
+
+        _, apply = plan()
+        result = apply()
+        self._owned_index = None
+        data = await DB.teams.find_one_and_update(
+            {"id": self.id},
+            {
+                "$set": {
+                    "cards.rs": self.rs_cards.to_list(),
+                    "cards.fs": self.fs_cards.to_list(),
+                },
+                "$inc": {"cards.version": 1},
+            },
+            projection={"cards.version": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+        if data is not None:
+            self.cards_version = data["cards"]["version"]
+        return result
+
+    async def _pushed_cards_written(self, version: int) -> None:
+        """
+        Counts the cards a unit of work added once it wrote them. If the cards were
+        written elsewhere in the meantime the ones in memory may not be in the same
+        order anymore, so they are loaded again instead.
+        """
+        pushed, self._cards_unit = self._cards_pushed, None
+        if self.cards_version == version:
+            self.cards_version += pushed
+        else:
+            await self._reload_cards()
+
+    @staticmethod
+    def _versioned(update: dict | list) -> dict | list:
+        """Adds counting up the version of the cards to an update or update pipeline"""
+        if isinstance(update, list):
+            return [
+                *update,
+                {
+                    "$set": {
+                        "cards.version": {
+                            "$add": [{"$ifNull": ["$cards.version", 0]}, 1]
+                        }
+                    }
+                },
+            ]
+        return {**update, "$inc": {"cards.version": 1}}
+
+    def _removal(
+        self, card_type: str, positions: list[int]
+    ) -> tuple[list[dict] | None, Callable[[], None]]:
+        """
+        An update pipeline removing the cards at `positions` from the restricted or free
+        slots, and a function removing them in memory. Unlike `$pull`, this removes only
+        one of several identical copies of a card. Without positions there is no update.
+        """
+        cards: CardCollection = getattr(self, f"{card_type}_cards")
+        if not positions:
+            return None, lambda: None
+
+        array = f"$cards.{card_type}"
+        parts, start = [], 0
+        for position in sorted(positions):
+            if position > start:
+                parts.append({"$slice": [array, start, position - start]})
+            start = position + 1
+        # MongoDB rejects a $slice of 0 cards, so there is no tail if nothing is left after
+        if start < len(cards):
+            parts.append({"$slice": [array, start, {"$size": array}]})
+
+        def apply() -> None:
+            for position in sorted(positions, reverse=True):
+                del cards[position]
+
+        value = {"$concatArrays": parts} if parts else {"$literal": []}
+        return [{"$set": {f"cards.{card_type}": value}}], apply
 
     async def _remove_logic(
         self,
@@ -545,17 +739,31 @@ class User:
         no_exception: bool = False,
     ) -> list[int, dict]:
         """Handles the logic of the remove_card method"""
-        attr = getattr(self, f"{card_type}_cards")
-        cards, match = await self._find_match(attr, card_id, remove_fake, clone)
-        if not match:
+
+        def plan() -> tuple[list[dict], Callable[[], list[int, dict]]]:
+            cards: CardCollection = getattr(self, f"{card_type}_cards")
+            # Only the first match is removed, there can be more than one
+            position = cards.find(card_id, remove_fake, clone)
+            if position is None:
+                raise NoMatches
+            match = cards[position]
+            update, remove = self._removal(card_type, [position])
+
+            def apply() -> list[int, dict]:
+                remove()
+                return match
+
+            return update, apply
+
+        before = getattr(self, f"{card_type}_cards").real_count
+        try:
+            match = await self._change_cards(plan)
+        except NoMatches:
             if no_exception:
                 return await self._remove_logic("rs", card_id, remove_fake, clone)
-            else:
-                raise NoMatches
-        before = len([x for x in cards if not x[1]["fake"]])
-        await self._update_val(f"cards.{card_type}", cards)
-        after = len([x for x in cards if not x[1]["fake"]])
-        if before == 100 and after < 100:
+            raise
+        after = getattr(self, f"{card_type}_cards").real_count
+        if card_type == "rs" and match[0] != 0 and before == 100 and after < 100:
             # If the book was complete before and now
             # isn't anymore, remove card 0 with it
             await self.remove_card(0)
@@ -592,98 +800,100 @@ class User:
         raise_if_failed: bool = False,
     ) -> None:
         """Removes a list of cards from a user"""
-        if fs_slots:
-            for c in cards:
-                try:
-                    self.fs_cards.remove(c)
-                except Exception:
-                    if raise_if_failed:
-                        raise NotInPossession(
-                            "This card is not in possession of the specified user!"
-                        )
-            await self._update_val("cards.fs", self.fs_cards)
-        else:
-            for c in cards:
-                try:
-                    self.rs_cards.remove(c)
-                except Exception:
-                    if raise_if_failed:
-                        raise NotInPossession(
-                            "This card is not in possession of the specified user!"
-                        )
-            await self._update_val("cards.rs", self.rs_cards)
+        card_type = "fs" if fs_slots else "rs"
+
+        def plan() -> tuple[list[dict] | None, Callable[[], None]]:
+            positions = getattr(self, f"{card_type}_cards").positions(cards)
+            if raise_if_failed and None in positions:
+                raise NotInPossession(
+                    "This card is not in possession of the specified user!"
+                )
+            return self._removal(card_type, [p for p in positions if p is not None])
+
+        await self._change_cards(plan)
 
     async def add_card(self, card_id: int, fake: bool = False, clone: bool = False):
         """Adds a card to the the user"""
         data = [card_id, {"fake": fake, "clone": clone}]
 
-        if self.has_rs_card(card_id) is False:
-            if card_id < 100:
-                self.rs_cards.append(data)
-                await self._update_val("cards.rs", data, "$push")
-                if len([x for x in self.rs_cards if not x[1]["fake"]]) == 99:
-                    await self.add_card(0)
-                    await self.add_achievement("full_house")
-                return
+        def plan() -> tuple[dict, Callable[[], str]]:
+            if card_id < 100 and self.has_rs_card(card_id) is False:
+                card_type = "rs"
+            elif len(self.fs_cards) >= FREE_SLOTS:
+                raise CardLimitReached("User reached card limit for free slots")
+            else:
+                card_type = "fs"
+            cards: CardCollection = getattr(self, f"{card_type}_cards")
+
+            def apply() -> str:
+                cards.append(data)
+                return card_type
+
+            return {"$push": {f"cards.{card_type}": data}}, apply
 
-        if len(self.fs_cards) >= FREE_SLOTS:
-            raise CardLimitReached("User reached card limit for free slots")
-        self.fs_cards.append(data)
-        await self._update_val("cards.fs", data, "$push")
+        if await self._change_cards(plan) == "rs" and self.rs_cards.real_count == 99:
+            await self.add_card(0)
+            await self.add_achievement("full_house")
 
     def count_card(self, card_id: int, including_fakes: bool = True) -> int:
         "Counts how many copies of a card someone has"
-        return len(
-            [
-                x
-                for x in self.all_cards
-                if (including_fakes or not x[1]["fake"]) and x[0] == card_id
-            ]
+        return self.rs_cards.count(card_id, including_fakes) + self.fs_cards.count(
+            card_id, including_fakes
         )
 
     async def add_multi(self, *args) -> None:
         """The purpose of this function is to be a faster alternative when adding multiple cards than for loop with add_card"""
-        fs_cards = []
-        rs_cards = []
 
-        def fs_append(item: list[Any]) -> list[Any]:
-            if len([*self.fs_cards, *fs_cards]) >= 40:
+        def plan() -> tuple[dict, Callable[[], None]]:
+            fs_cards = []
+            rs_cards = []
+
+            def fs_append(item: list[Any]) -> list[Any]:
+                if len(self.fs_cards) + len(fs_cards) >= 40:
+                    return fs_cards
+                fs_cards.append(item)
                 return fs_cards
-            fs_cards.append(item)
-            return fs_cards
-
-        for item in args:
-            if item[0] < 100 and not self.has_rs_card(item[0]):
-                if item[0] not in [x[0] for x in rs_cards]:
-                    rs_cards.append(item)
-                    continue
-            fs_append(item)
-
-        self.rs_cards = [*self.rs_cards, *rs_cards]
-        self.fs_cards = [*self.fs_cards, *fs_cards]
-        await DB.teams.update_one(
-            {"id": self.id},
-            {"$set": {"cards.rs": self.rs_cards, "cards.fs": self.fs_cards}},
-        )
+
+            for item in args:
+                if item[0] < 100 and not self.has_rs_card(item[0]):
+                    if item[0] not in [x[0] for x in rs_cards]:
+                        rs_cards.append(item)
+                        continue
+                fs_append(item)
+
+            rs, fs = self.rs_cards, self.fs_cards
+
+            def apply() -> None:
+                rs.extend(rs_cards)
+                fs.extend(fs_cards)
+
+            return {
+                "$push": {
+                    "cards.rs": {"$each": rs_cards},
+                    "cards.fs": {"$each": fs_cards},
+                }
+            }, apply
+
+        await self._change_cards(plan)
 
     def has_defense(self) -> bool:
         """Checks if a user holds on to a defense spell card"""
         for x in DEF_SPELLS:
-            if x in [x[0] for x in self.fs_cards]:
+            if self.fs_cards.count(x):
                 if self.has_any_card(x, False):
                     return True
         return False
 
     def can_swap(self, card_id: int) -> bool:
         """Checks if `swap` would return `False` without performing the actual swap"""
-        if True in [
-            x[1]["fake"] for x in self.rs_cards if x[0] == card_id
-        ] and False in [x[1]["fake"] for x in self.fs_cards if x[0] == card_id]:
+        if self.rs_cards.has(card_id, only_allow_fakes=True) and self.fs_cards.has(
+            card_id, fake_allowed=False
+        ):
             return True
 
-        elif True in [
-            x[1]["fake"] for x in self.fs_cards if x[0] == card_id
-        ] and False in [x[1]["fake"] for x in self.rs_cards if x[0] == card_id]:
+        elif self.fs_cards.has(card_id, only_allow_fakes=True) and self.rs_cards.has(
+            card_id, fake_allowed=False
+        ):
             return True
 
         else:
@@ -695,29 +905,46 @@ class User:
         Usecase: swapping fake and real card
         """
 
-        if True in [
-            x[1]["fake"] for x in self.rs_cards if x[0] == card_id
-        ] and False in [x[1]["fake"] for x in self.fs_cards if x[0] == card_id]:
-            r = await self.remove_card(card_id, remove_fake=True, restricted_slot=True)
-            r2 = await self.remove_card(
-                card_id, remove_fake=False, restricted_slot=False
-            )
-            await self.add_card(card_id, False, r[1]["clone"])
-            await self.add_card(card_id, True, r2[1]["clone"])
-
-        elif True in [
-            x[1]["fake"] for x in self.fs_cards if x[0] == card_id
-        ] and False in [x[1]["fake"] for x in self.rs_cards if x[0] == card_id]:
-            r = await self.remove_card(card_id, remove_fake=True, restricted_slot=False)
-            r2 = await self.remove_card(
-                card_id, remove_fake=False, restricted_slot=True
-            )
-            await self.add_card(card_id, True, r[1]["clone"])
-            await self.add_card(card_id, False, r2[1]["clone"])
+        def plan() -> tuple[dict, Callable[[], None]]:
+            rs, fs = self.rs_cards, self.fs_cards
+            if rs.has(card_id, only_allow_fakes=True) and fs.has(
+                card_id, fake_allowed=False
+            ):
+                i, j = rs.find(card_id, fake=True), fs.find(card_id, fake=False)
+                rs_data = {"fake": False, "clone": rs[i][1]["clone"]}
+                fs_data = {"fake": True, "clone": fs[j][1]["clone"]}
 
-        else:
+            elif fs.has(card_id, only_allow_fakes=True) and rs.has(
+                card_id, fake_allowed=False
+            ):
+                i, j = rs.find(card_id, fake=False), fs.find(card_id, fake=True)
+                rs_data = {"fake": True, "clone": fs[j][1]["clone"]}
+                fs_data = {"fake": False, "clone": rs[i][1]["clone"]}
+
+            else:
+                raise NoMatches
+
+            def apply() -> None:
+                rs[i] = [card_id, rs_data]
+                fs[j] = [card_id, fs_data]
+
+            return {
+                "$set": {f"cards.rs.{i}.1": rs_data, f"cards.fs.{j}.1": fs_data}
+            }, apply
+
+        before = self.rs_cards.real_count
+        try:
+            await self._change_cards(plan)
+        except NoMatches:
             return False  # Returned if the requirements haven't been met
 
+        after = self.rs_cards.real_count
+        if before == 100 and after < 100:
+            await self.remove_card(0)
+        elif before == 98 and after == 99:
+            await self.add_card(0)
+            await self.add_achievement("full_house")
+
     async def add_effect(self, effect: str, value: Any):
         """Adds a card with specified value, easier than checking for appropriate value with effect name"""
         self.effects[effect] = value
@@ -756,16 +983,18 @@ class User:
         if t == "all":
             await self._remove("all_cards")
             self.effects = {}
+            self.cards_version = 0
             await DB.teams.update_one(
                 {"id": self.id},
                 {"$set": {"cards": {"rs": [], "fs": [], "effects": {}}}},
             )
-        if t == "fs":
-            await self._remove("fs_cards")
-            await DB.teams.update_one({"id": self.id}, {"$set": {"cards.fs": []}})
-        if t == "rs":
-            await self._remove("rs_cards")
-            await DB.teams.update_one({"id": self.id}, {"$set": {"cards.rs": []}})
+        if t in ("fs", "rs"):
+            await self._change_cards(
+                lambda: (
+                    {"$set": {f"cards.{t}": []}},
+                    lambda: setattr(self, f"{t}_cards", []),
+                )
+            )
         if t == "effects":
             self.effects = {}
             await DB.teams.update_one({"id": self.id}, {"$set": {"cards.effects": {}}})
@@ -781,6 +1010,9 @@ class User:
         else:
             self.rps_stats["pvp" if not against_bot else "pve"][stat] = val
         await self._update_val(f"stats.rps", self.rps_stats)
+        if stat == "won":
+            mode = "pve" if against_bot else "pvp"
+            self._update_leaderboard(f"rps_{mode}", self.rps_stats[mode]["won"])
 
     async def add_trivia_stat(
         self,
@@ -793,6 +1025,10 @@ class User:
         else:
             self.trivia_stats[difficulty][stat] = 1
         await self._update_val(f"stats.trivia", self.trivia_stats)
+        if stat == "right":
+            self._update_leaderboard(
+                f"trivia_{difficulty}", self.trivia_stats[difficulty]["right"]
+            )
 
     async def set_counting_highscore(
         self, difficulty: Literal["easy", "hard"], score: int
@@ -801,6 +1037,7 @@ class User:
         if score > self.counting_highscore[difficulty]:
             self.counting_highscore[difficulty] = score
             await self._update_val(f"stats.counting_highscore", self.counting_highscore)
+            self._update_leaderboard(f"counting_{difficulty}", score)
 
     async def add_achievement(self, achievement: str) -> None:
         """Adds an achievement to the user's achievements"""
@@ -811,7 +1048,13 @@ class User:
     async def toggle_votereminder(self) -> None:
         """Toggles the voting reminder"""
         self.voting_reminder = not self.voting_reminder
-        await self._update_val("voting_reminder", not self.voting_reminder)
+        await self._update_val("voting_reminder", self.voting_reminder)
+        reminder_wheel.set(self.id, self._last_votes if self.voting_reminder else {})
+
+    @property
+    def _last_votes(self) -> dict[str, datetime | None]:
+        """When the user last voted on each site"""
+        return {site: data.get("last_vote") for site, data in self.voting_streak.items()}
 
     async def log_locale(self, locale: str) -> str | None:
         """Logs the locale of the user. Returns the old locale if it was different from the new one, else None"""
@@ -0,0 +1,173 @@
+"""Finding and remembering the dominant color of images, used as the color of embeds."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+from collections import OrderedDict
+from io import BytesIO
+from typing import Awaitable, Callable
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import numpy as np
+from PIL import Image
+
+from killua.metrics import CACHE_HITS, CACHE_MISSES, CACHE_EVICTIONS, CACHE_SIZE
+
+# The color used when an image can't be downloaded or read
+DEFAULT_COLOR = 0x3E4A78
+
+# Query parameters that change between requests for the same image, like the
+# signature and expiry of discord attachment links or our own signed asset links
+VOLATILE_PARAMS = {"ex", "is", "hm", "token", "expiry", "expires", "signature"}
+
+# Every channel is cut to this many bits to count colors in 2^(3 * bits) bins
+_BITS = 4
+
+
+def normalize_url(url: str) -> str:
+    """A URL without the parts that change between requests for the same image"""
+    parts = urlsplit(url)
+    query = urlencode(
+        [
+            (key, value)
+            for key, value in parse_qsl(parts.query, keep_blank_values=True)
+            if key.lower() not in VOLATILE_PARAMS
+        ]
+    )
+    return urlunsplit(
+        (parts.scheme.lower(), parts.netloc.lower(), parts.path, query, "")
+    )
+
+
+def dominant_color(data: bytes, size: int = 150) -> int:
+    """
+    The most common color of an image as an integer. Runs in a render worker.
+
+    Instead of sorting every distinct color, the pixels are counted with `bincount`
+    in coarse bins first and the most common exact color is picked from the pixels
+    in the fullest bin, so slightly different shades of one color count together.
+    """
+    image = Image.open(BytesIO(data))
+    # Only the first frame of GIFs, and palette or greyscale images as RGB
+    image = image.convert("RGB").resize((size, size), resample=0)
+    pixels = np.asarray(image, dtype=np.uint32).reshape(-1, 3)
+    packed = pixels[:, 0] << 16 | pixels[:, 1] << 8 | pixels[:, 2]
+
+    shift = 8 - _BITS
+    quantized = pixels >> shift
+    bins = quantized[:, 0] << (2 * _BITS) | quantized[:, 1] << _BITS | quantized[:, 2]
+    fullest = np.bincount(bins, minlength=1 << (3 * _BITS)).argmax()
+
+    colors, counts = np.unique(packed[bins == fullest], return_counts=True)
+    return int(colors[counts.argmax()])
+
+
+class DominantColorCache:
+    """
+    The dominant colors of images by their normalized URL, so the same image is only
+    downloaded and looked at once even if its link is signed differently every time.
+
+    Holds at most `max_size` colors and drops the least recently used ones first. If
+    `path` is set, the colors are read from that JSON file by `load` and written to it
+    by `save`, so they are not lost when the bot restarts.
+    """
+
+    def __init__(self, max_size: int, path: str | None = None):
+        self.max_size = max_size
+        self.path = path
+        self._colors: OrderedDict[str, int] = OrderedDict()
+        self._loading: dict[str, asyncio.Future[int]] = {}
+        self._changed = False
+
+    def get(self, url: str) -> int | None:
+        key = normalize_url(url)
+        color = self._colors.get(key)
+        if color is None:
+            CACHE_MISSES.labels("dominant_color").inc()
+            return None
+        CACHE_HITS.labels("dominant_color").inc()
+        self._colors.move_to_end(key)
+        return color
+
+    def set(self, url: str, color: int) -> None:
+        key = normalize_url(url)
+        self._colors[key] = color
+        self._colors.move_to_end(key)
+        self._changed = True
+        while len(self._colors) > self.max_size:
+            self._colors.popitem(last=False)
+            CACHE_EVICTIONS.labels("dominant_color").inc()
+        CACHE_SIZE.labels("dominant_color").set(len(self._colors))
+
+    async def get_or_compute(
+        self, url: str, compute: Callable[[], Awaitable[int | None]]
+    ) -> int:
+        """
+        The cached color of an image, otherwise the result of `compute`. Concurrent
+        calls for the same image share one computation. If `compute` returns None
+        the image could not be read and the default color is returned but not cached.
+        """
+        if (color := self.get(url)) is not None:
+            return color
+
+        key = normalize_url(url)
+        if key in self._loading:
+            return await asyncio.shield(self._loading[key])
+
+        future = asyncio.get_running_loop().create_future()
+        self._loading[key] = future
+        try:
+            color = await compute()
+            if color is not None:
+                self.set(url, color)
+            future.set_result(DEFAULT_COLOR if color is None else color)
+        except BaseException as e:
+            future.set_exception(e)
+            # Nobody might be waiting for it
+            future.exception()
+            raise
+        finally:
+            del self._loading[key]
+        return future.result()
+
+    def load(self) -> None:
+        """Reads the colors saved by `save`, if there are any"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                saved: dict[str, int] = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Could not read the dominant color cache: {e}")
+            return
+        # Saved from least to most recently used
+        for key, color in list(saved.items())[-self.max_size :]:
+            self._colors[key] = color
+        CACHE_SIZE.labels("dominant_color").set(len(self._colors))
+
+    def save(self) -> None:
+        """
+        Writes the colors to `path` if they changed since they were last saved. If
+        that fails it is logged and they are written the next time instead.
+        """
+        if not self.path or not self._changed:
+            return
+        temporary = self.path + ".tmp"
+        try:
+            with open(temporary, "w") as f:
+                json.dump(self._colors, f)
+            # Replacing the file in one step means a crash never leaves half of it behind
+            os.replace(temporary, self.path)
+        except OSError as e:
+            logging.warning(f"Could not save the dominant color cache: {e}")
+            return
+        self._changed = False
+
+    def __contains__(self, url: str) -> bool:
+        return normalize_url(url) in self._colors
+
+    def __len__(self) -> int:
+        return len(self._colors)
@@ -0,0 +1,67 @@
+"""Per user command cooldowns."""
+
+from __future__ import annotations
+
+from time import monotonic
+
+from killua.metrics import COOLDOWN_ENTRIES, COOLDOWN_EVICTIONS
+
+
+class CooldownStore:
+    """
+    Remembers when a user last used a command and until when that keeps them
+    from using it again. Entries are dropped the first time they are looked
+    at after their cooldown ran out, and `sweep` drops the ones that are
+    never looked at again.
+    """
+
+    def __init__(self):
+        # (user id, command name) -> (last used, cooldown ends)
+        self._entries: dict[tuple[int, str], tuple[float, float]] = {}
+
+    def use(self, user_id: int, command: str, cooldown: float) -> float:
+        """
+        Uses a command if it is not on cooldown for the user.
+
+        Returns 0 if it was used, otherwise how many seconds are left. There is
+        no await in here so checking and recording happen in one step, which means
+        two invocations at the same time can never both get through.
+        """
+        now = monotonic()
+        key = (user_id, command)
+        entry = self._entries.get(key)
+
+        if entry is not None:
+            last_used, ends = entry
+            if now < ends:
+                # The cooldown can be shorter now than when it was started, e.g. after getting premium
+                remaining = last_used + cooldown - now
+                if remaining > 0:
+                    return remaining
+            COOLDOWN_EVICTIONS.inc()
+
+        self._entries[key] = (now, now + cooldown)
+        COOLDOWN_ENTRIES.set(len(self._entries))
+        return 0
+
+    def sweep(self) -> int:
+        """Drops all entries whose cooldown has run out and returns how many there were"""
+        now = monotonic()
+        expired = [key for key, (_, ends) in self._entries.items() if ends <= now]
+        for key in expired:
+            del self._entries[key]
+        COOLDOWN_EVICTIONS.inc(len(expired))
+        COOLDOWN_ENTRIES.set(len(self._entries))
+        return len(expired)
+
+    def reset(self, user_id: int, command: str) -> None:
+        """Takes a command off cooldown for a user"""
+        self._entries.pop((user_id, command), None)
+        COOLDOWN_ENTRIES.set(len(self._entries))
+
+    def clear(self) -> None:
+        self._entries.clear()
+        COOLDOWN_ENTRIES.set(0)
+
+    def __len__(self) -> int:
+        return len(self._entries)
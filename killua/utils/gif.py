@@ -9,6 +9,7 @@ from collections import defaultdict
 from random import randrange
 from itertools import chain
 
+import numpy as np
 from PIL.Image import Image
 
 
@@ -20,23 +21,19 @@ class TransparentAnimatedGifConverter(object):
         self._alpha_threshold = alpha_threshold
 
     def _process_pixels(self):
-        """Set the transparent pixels to the color 0."""
-        self._transparent_pixels = set(
-            idx
-            for idx, alpha in enumerate(
-                self._img_rgba.getchannel(channel="A").getdata()
-            )
-            if alpha <= self._alpha_threshold
+        """Find the transparent pixels, which are set to the color 0 later."""
+        alpha = np.frombuffer(
+            self._img_rgba.getchannel(channel="A").tobytes(), dtype=np.uint8
         )
+        self._transparent_pixels = alpha <= self._alpha_threshold
 
     def _set_parsed_palette(self):
         """Parse the RGB palette color `tuple`s from the palette."""
         palette = self._img_p.getpalette()
-        self._img_p_used_palette_idxs = set(
-            idx
-            for pal_idx, idx in enumerate(self._img_p_data)
-            if pal_idx not in self._transparent_pixels
+        usage = np.bincount(
+            self._img_p_data[~self._transparent_pixels], minlength=256
         )
+        self._img_p_used_palette_idxs = set(np.flatnonzero(usage).tolist())
         self._img_p_parsedpalette = dict(
             (idx, tuple(palette[idx * 3 : idx * 3 + 3]))
             for idx in self._img_p_used_palette_idxs
@@ -88,15 +85,11 @@ class TransparentAnimatedGifConverter(object):
 
     def _adjust_pixels(self):
         """Convert the pixels into their new values."""
-        if self._palette_replaces["idx_from"]:
-            trans_table = bytearray.maketrans(
-                bytes(self._palette_replaces["idx_from"]),
-                bytes(self._palette_replaces["idx_to"]),
-            )
-            self._img_p_data = self._img_p_data.translate(trans_table)
-        for idx_pixel in self._transparent_pixels:
-            self._img_p_data[idx_pixel] = 0
-        self._img_p.frombytes(data=bytes(self._img_p_data))
+        lookup = np.arange(256, dtype=np.uint8)
+        lookup[self._palette_replaces["idx_from"]] = self._palette_replaces["idx_to"]
+        data = lookup[self._img_p_data]
+        data[self._transparent_pixels] = 0
+        self._img_p.frombytes(data=data.tobytes())
 
     def _adjust_palette(self):
         """Modify the palette in the new `Image`."""
@@ -114,7 +107,7 @@ class TransparentAnimatedGifConverter(object):
     def process(self) -> Image:
         """Return the processed mode `P` `Image`."""
         self._img_p = self._img_rgba.convert(mode="P")
-        self._img_p_data = bytearray(self._img_p.tobytes())
+        self._img_p_data = np.frombuffer(self._img_p.tobytes(), dtype=np.uint8)
         self._palette_replaces = dict(idx_from=list(), idx_to=list())
         self._process_pixels()
         self._process_palette()
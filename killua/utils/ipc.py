@@ -0,0 +1,140 @@
+"""Concurrent request handling for the ZMQ ROUTER socket the API talks to."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from json import loads, dumps
+from time import perf_counter
+from typing import Any, Awaitable, Callable, TYPE_CHECKING
+
+from killua.metrics import (
+    IPC_REQUESTS_IN_FLIGHT,
+    IPC_ROUTE_LATENCY,
+    IPC_TIMEOUT_COUNTER,
+)
+
+if TYPE_CHECKING:
+    from zmq.asyncio import Socket
+
+logger = logging.getLogger(__name__)
+
+RouteHandler = Callable[[str, Any], Awaitable[Any]]
+
+NOT_IN_DOCKER_ERROR = "For this endpoint to work, the bot must be run in Docker"
+
+
+class IPCDispatcher:
+    """
+    Reads requests from a ROUTER socket and handles each one in its own task.
+
+    A reply is sent as soon as its route is done, so replies can go out in a
+    different order than the requests came in. ROUTER prepends the identity
+    of the client to every message it receives, and sending those frames back
+    with the reply makes sure it still reaches the right client.
+
+    Metrics are labelled with the route if `is_route` says it exists, otherwise
+    with "unknown", so made up routes don't each add a time series.
+    """
+
+    def __init__(
+        self,
+        socket: Socket,
+        handler: RouteHandler,
+        *,
+        max_concurrency: int,
+        default_timeout: float | None,
+        route_timeouts: dict[str, float | None] | None = None,
+        is_route: Callable[[str], bool] | None = None,
+    ):
+        self.socket = socket
+        self.handler = handler
+        self.default_timeout = default_timeout
+        self.route_timeouts = route_timeouts or {}
+        self.is_route = is_route
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def in_flight(self) -> int:
+        """The amount of requests currently being handled"""
+        return len(self._tasks)
+
+    def timeout_for(self, route: str) -> float | None:
+        """The amount of seconds a route may take before it is cancelled"""
+        return self.route_timeouts.get(
+            route.replace("/", "_"), self.default_timeout
+        )
+
+    async def serve(self) -> None:
+        """Receives requests forever. Stops reading new ones while the concurrency limit is reached"""
+        try:
+            while True:
+                message = await self.socket.recv_multipart()
+                await self._semaphore.acquire()
+                self.spawn(message)
+        finally:
+            await self.close()
+
+    def spawn(self, message: list[bytes]) -> asyncio.Task:
+        """Handles a message in the background. The caller needs to hold the semaphore"""
+        task = asyncio.create_task(self._handle(message))
+        self._tasks.add(task)
+        IPC_REQUESTS_IN_FLIGHT.inc()
+        task.add_done_callback(self._on_done)
+        return task
+
+    def _on_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        self._semaphore.release()
+        IPC_REQUESTS_IN_FLIGHT.dec()
+
+    async def close(self) -> None:
+        """Cancels all requests that are still being handled"""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _handle(self, message: list[bytes]) -> None:
+        reply = await self.process(message)
+        await self.socket.send_multipart(reply)
+
+    async def process(self, message: list[bytes]) -> list[bytes]:
+        """Turns a received multipart message into the multipart reply for it"""
+        # The first parts are metadata (the identity and delimiter frames),
+        # the last part is the actual data
+        metadata, raw = message[:-1], message[-1].decode()
+
+        # Strip the first byte (first_bit) before parsing JSON
+        if raw and raw[0] == "\x00":
+            raw = raw[1:]
+        if raw and raw[0] == "\x01":
+            # Must be run in Docker for this, notify the server about this.
+            return self._reply(metadata, {"error": NOT_IN_DOCKER_ERROR})
+
+        route = label = "unknown"
+        start = perf_counter()
+        try:
+            decoded = loads(raw)
+            route = decoded["route"]
+            if self.is_route is None or self.is_route(route):
+                label = route
+            res = await asyncio.wait_for(
+                self.handler(route, decoded["data"]), self.timeout_for(route)
+            )
+        except asyncio.TimeoutError:
+            IPC_TIMEOUT_COUNTER.labels(label).inc()
+            logger.error(f"IPC route {route} timed out")
+            return self._reply(metadata, {"error": f"Route {route} timed out"})
+        except Exception as e:
+            logger.error(f"Error in IPC route {route}: {e}")
+            return self._reply(metadata, {"error": str(e)})
+        finally:
+            IPC_ROUTE_LATENCY.labels(label).observe(perf_counter() - start)
+
+        if res is None:
+            return [*metadata, b'{"status":"ok"}']
+        return self._reply(metadata, res)
+
+    def _reply(self, metadata: list[bytes], data: Any) -> list[bytes]:
+        return [*metadata, dumps(data).encode()]
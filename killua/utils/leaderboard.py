@@ -0,0 +1,191 @@
+"""Leaderboards for jenny and game stats that are kept up to date in memory."""
+
+from __future__ import annotations
+
+import asyncio
+from bisect import bisect_left, insort
+from time import monotonic
+from typing import Iterable
+
+from killua.metrics import LEADERBOARD_LOADS, LEADERBOARD_FALLBACKS
+from killua.static.constants import DB, LEADERBOARD_SIZE, LEADERBOARD_TTL
+
+# Leaderboard name -> field of the user document it is sorted by
+BOARDS = {
+    "jenny": "points",
+    "rps_pve": "stats.rps.pve.won",
+    "rps_pvp": "stats.rps.pvp.won",
+    "trivia_easy": "stats.trivia.easy.right",
+    "trivia_medium": "stats.trivia.medium.right",
+    "trivia_hard": "stats.trivia.hard.right",
+    "counting_easy": "stats.counting_highscore.easy",
+    "counting_hard": "stats.counting_highscore.hard",
+}
+
+
+def _score(doc: dict, field: str) -> int:
+    """The value of a dotted field of a user document, 0 if it is not set"""
+    for part in field.split("."):
+        if not isinstance(doc, dict):
+            return 0
+        doc = doc.get(part, 0)
+    return doc if isinstance(doc, int) else 0
+
+
+class TopK:
+    """
+    The users with the highest score in one field, best first.
+
+    Loaded with a query that only returns the id and score of the best `size`
+    users, sorted by the database. After that every score change passed to
+    `update` keeps it correct without asking the database again: everyone on it
+    has a score of at least `floor` and everyone who is not has at most `floor`.
+    `floor` only goes up when the board is full and someone has to make room, so
+    the board can shrink when users on it lose score. It is only loaded again if
+    it has become too short for what is asked, or after `ttl` seconds to pick up
+    changes that did not go through `update`.
+    """
+
+    def __init__(self, name: str, field: str, size: int, ttl: float):
+        self.name = name
+        self.field = field
+        self.size = size
+        self.ttl = ttl
+        self.floor = 0
+        # (-score, user id) so the best come first and ties are ordered by id
+        self._entries: list[tuple[int, int]] = []
+        self._scores: dict[int, int] = {}
+        self._loaded_at: float | None = None
+        self._loading: asyncio.Future[None] | None = None
+        self._changed_while_loading: dict[int, int] | None = None
+
+    def _complete(self, amount: int) -> bool:
+        """Whether the board knows the best `amount` users"""
+        return (
+            self._loaded_at is not None
+            and monotonic() - self._loaded_at < self.ttl
+            and (len(self._entries) >= amount or self.floor == 0)
+        )
+
+    async def _ensure(self, amount: int) -> None:
+        if self._complete(amount):
+            return
+        if self._loading is None:
+            self._loading = asyncio.ensure_future(self._load())
+        # Shielded so one caller being cancelled does not cancel the load for everyone else
+        await asyncio.shield(self._loading)
+
+    async def _load(self) -> None:
+        self._changed_while_loading = {}
+        try:
+            docs = (
+                await DB.teams.find(
+                    {self.field: {"$gt": 0}}, {"_id": 0, "id": 1, self.field: 1}
+                )
+                .sort(self.field, -1)
+                .limit(self.size)
+                .to_list(self.size)
+            )
+            changed = self._changed_while_loading
+        finally:
+            self._changed_while_loading = None
+            self._loading = None
+
+        self._entries = sorted((-_score(d, self.field), d["id"]) for d in docs)
+        self._scores = {user_id: -neg for neg, user_id in self._entries}
+        self.floor = -self._entries[-1][0] if len(self._entries) >= self.size else 0
+        self._loaded_at = monotonic()
+        # The query may have been answered before these were written
+        for user_id, score in changed.items():
+            self._set(user_id, score)
+        LEADERBOARD_LOADS.labels(self.name).inc()
+
+    def update(self, user_id: int, score: int) -> None:
+        """Records the new score of a user after it was written to the database"""
+        if self._changed_while_loading is not None:
+            self._changed_while_loading[user_id] = score
+        if self._loaded_at is not None:
+            self._set(user_id, score)
+
+    def _set(self, user_id: int, score: int) -> None:
+        old = self._scores.pop(user_id, None)
+        if old is not None:
+            del self._entries[bisect_left(self._entries, (-old, user_id))]
+            if score <= 0 or score < self.floor:
+                return  # Someone who is not on the board might be ahead of them now
+        elif score <= self.floor:
+            return
+
+        insort(self._entries, (-score, user_id))
+        self._scores[user_id] = score
+        if len(self._entries) > self.size:
+            neg, last = self._entries.pop()
+            del self._scores[last]
+            self.floor = max(self.floor, -neg)
+
+    async def top(self, amount: int) -> list[tuple[int, int]]:
+        """The best `amount` users as (user id, score)"""
+        amount = min(amount, self.size)
+        await self._ensure(amount)
+        return [(user_id, -neg) for neg, user_id in self._entries[:amount]]
+
+    async def among(self, user_ids: Iterable[int], amount: int) -> list[tuple[int, int]]:
+        """The best `amount` of the given users, for example the members of a server"""
+        user_ids = set(user_ids)
+        if amount <= self.size:
+            await self._ensure(amount)
+            found = [
+                (user_id, -neg)
+                for neg, user_id in self._entries
+                if user_id in user_ids
+            ][:amount]
+            # Anyone not on the board is behind everyone on it
+            if len(found) == amount or self.floor == 0:
+                return found
+
+        LEADERBOARD_FALLBACKS.labels(self.name).inc()
+        docs = (
+            await DB.teams.find(
+                {"id": {"$in": list(user_ids)}, self.field: {"$gt": 0}},
+                {"_id": 0, "id": 1, self.field: 1},
+            )
+            .sort(self.field, -1)
+            .limit(amount)
+            .to_list(amount)
+        )
+        return [(d["id"], _score(d, self.field)) for d in docs]
+
+    async def rank(self, user_id: int, score: int) -> int:
+        """The position of a user with `score` on the leaderboard, starting at 1"""
+        await self._ensure(1)
+        if score > 0 and (user_id in self._scores or score > self.floor):
+            # Everyone with a higher score than this is on the board
+            return bisect_left(self._entries, (-score,)) + 1
+
+        LEADERBOARD_FALLBACKS.labels(self.name).inc()
+        return await DB.teams.count_documents({self.field: {"$gt": score}}) + 1
+
+    def clear(self) -> None:
+        self.floor = 0
+        self._entries.clear()
+        self._scores.clear()
+        self._loaded_at = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+async def create_indexes() -> None:
+    """
+    Creates the indexes the leaderboards are loaded from, so loading one reads its
+    best users from an index instead of sorting every user. The id is part of them
+    so the queries are answered from the index alone. Does nothing if they exist.
+    """
+    for field in BOARDS.values():
+        await DB.teams.create_index([(field, -1), ("id", 1)])
+
+
+leaderboards: dict[str, TopK] = {
+    name: TopK(name, field, LEADERBOARD_SIZE, LEADERBOARD_TTL)
+    for name, field in BOARDS.items()
+}
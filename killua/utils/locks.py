@@ -0,0 +1,107 @@
+"""Locks for commands that read and change the data of several users across awaits."""
+
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+from time import perf_counter
+from typing import AsyncIterator, Hashable
+
+from killua.metrics import LOCK_WAIT, LOCKS_HELD
+
+
+class LockTimeout(asyncio.TimeoutError):
+    """Raised by `KeyedLocks.hold` if the locks could not be acquired in time"""
+
+
+class _Entry:
+    __slots__ = ("lock", "owner", "users")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.owner: asyncio.Task | None = None
+        # How many `hold` calls are holding or waiting for the lock
+        self.users = 0
+
+
+class KeyedLocks:
+    """
+    One lock per key, for example a user id, that only exists while someone holds
+    or waits for it. Once the last one releases it the key is dropped, so the
+    table is never bigger than the number of keys in use at that moment.
+
+    `hold` takes several keys at once and always acquires them sorted, so two
+    commands locking the same users can never each hold one and wait for the other.
+    A task that already holds a key can lock it again, for example when a command
+    that locked its author calls something that locks the author and a target.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._entries: dict[Hashable, _Entry] = {}
+
+    async def _acquire(self, key: Hashable, deadline: float | None) -> _Entry:
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = _Entry()
+            LOCKS_HELD.labels(self.name).set(len(self._entries))
+        entry.users += 1
+
+        start = perf_counter()
+        try:
+            if deadline is None or not entry.lock.locked():
+                await entry.lock.acquire()
+            else:
+                try:
+                    await asyncio.wait_for(
+                        entry.lock.acquire(), max(deadline - start, 0)
+                    )
+                except asyncio.TimeoutError:
+                    raise LockTimeout(f"{self.name} {key} is locked") from None
+        except BaseException:
+            self._leave(key, entry)
+            raise
+        LOCK_WAIT.labels(self.name).observe(perf_counter() - start)
+        entry.owner = asyncio.current_task()
+        return entry
+
+    def _release(self, key: Hashable, entry: _Entry) -> None:
+        entry.owner = None
+        entry.lock.release()
+        self._leave(key, entry)
+
+    def _leave(self, key: Hashable, entry: _Entry) -> None:
+        entry.users -= 1
+        if entry.users == 0:
+            del self._entries[key]
+            LOCKS_HELD.labels(self.name).set(len(self._entries))
+
+    @asynccontextmanager
+    async def hold(
+        self, *keys: Hashable, timeout: float | None = None
+    ) -> AsyncIterator[None]:
+        """
+        Holds the locks of all `keys` while the block runs. Raises `LockTimeout` if they
+        could not all be acquired within `timeout` seconds, without holding any.
+        """
+        current = asyncio.current_task()
+        deadline = None if timeout is None else perf_counter() + timeout
+        acquired: list[tuple[Hashable, _Entry]] = []
+        try:
+            for key in sorted(set(keys)):
+                entry = self._entries.get(key)
+                if entry is not None and entry.owner is current:
+                    continue  # Already held further up
+                acquired.append((key, await self._acquire(key, deadline)))
+            yield
+        finally:
+            for key, entry in reversed(acquired):
+                self._release(key, entry)
+
+    def locked(self, key: Hashable) -> bool:
+        """Whether anyone holds the lock of `key`"""
+        entry = self._entries.get(key)
+        return entry is not None and entry.lock.locked()
+
+    def __len__(self) -> int:
+        return len(self._entries)
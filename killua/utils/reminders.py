@@ -0,0 +1,268 @@
+"""Schedulers that know which vote reminders and todos are due, without looking at every user or list."""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+from datetime import datetime, timedelta
+
+from killua.static.constants import DB
+
+# Reminders are sent every 12 hours, at the same minute the user last voted
+SLOTS = 12 * 60
+# How many minutes of missed ticks are caught up on if the loop was late
+MAX_CATCH_UP = 5
+
+
+def _slot(time: datetime) -> int:
+    """The minute of a 12 hour cycle a point in time falls into"""
+    return (time.hour % 12) * 60 + time.minute
+
+
+class VoteReminderWheel:
+    """
+    A timing wheel with one bucket for every minute of 12 hours.
+
+    Every site a user who has reminders enabled voted on is put into the bucket of
+    the minute they last voted at, so every tick only has to look at the one bucket
+    that is due. It is built once from a query that only returns the id and voting
+    streaks of users with reminders enabled, after that `set` keeps it up to date
+    when someone votes or toggles their reminders.
+    """
+
+    def __init__(self):
+        # slot -> (user id, site) -> last vote
+        self._slots: list[dict[tuple[int, str], datetime]] = [
+            {} for _ in range(SLOTS)
+        ]
+        # user id -> site -> slot
+        self._users: dict[int, dict[str, int]] = {}
+        self._last_tick: int | None = None  # minutes since the epoch
+        self._changed_while_building: dict[int, dict[str, datetime | None]] | None = None
+        self.built = False
+
+    async def build(self) -> None:
+        """Loads everyone who has reminders enabled"""
+        self._changed_while_building = {}
+        try:
+            docs = await DB.teams.find(
+                {"voting_reminder": True}, {"_id": 0, "id": 1, "voting_streak": 1}
+            ).to_list(None)
+            changed = self._changed_while_building
+        finally:
+            self._changed_while_building = None
+
+        self._slots = [{} for _ in range(SLOTS)]
+        self._users = {}
+        for doc in docs:
+            self._set(
+                doc["id"],
+                {
+                    site: data.get("last_vote")
+                    for site, data in doc.get("voting_streak", {}).items()
+                },
+            )
+        # The query may have been answered before these were written
+        for user_id, votes in changed.items():
+            self._set(user_id, votes)
+        self.built = True
+
+    def set(self, user_id: int, votes: dict[str, datetime | None]) -> None:
+        """
+        Replaces the reminders of a user with one for every site in `votes`,
+        which maps the site to when they last voted on it. Pass an empty dict
+        to stop reminding them.
+        """
+        if self._changed_while_building is not None:
+            self._changed_while_building[user_id] = votes
+        self._set(user_id, votes)
+
+    def _set(self, user_id: int, votes: dict[str, datetime | None]) -> None:
+        for site, slot in self._users.pop(user_id, {}).items():
+            del self._slots[slot][(user_id, site)]
+
+        sites = {}
+        for site, last_vote in votes.items():
+            if last_vote is None:
+                continue
+            sites[site] = _slot(last_vote)
+            self._slots[sites[site]][(user_id, site)] = last_vote
+        if sites:
+            self._users[user_id] = sites
+
+    def due(self, now: datetime) -> list[tuple[int, str, datetime]]:
+        """
+        The reminders due since the last tick as (user id, site, last vote).
+        Votes from less than a minute ago are left out, those users just voted.
+        """
+        minute = int(now.timestamp() // 60)
+        missed = 1
+        if self._last_tick is not None:
+            # 0 if this minute was already handled
+            missed = max(0, min(minute - self._last_tick, MAX_CATCH_UP))
+        self._last_tick = minute
+
+        current = _slot(now)
+        return [
+            (user_id, site, last_vote)
+            for offset in reversed(range(missed))
+            for (user_id, site), last_vote in self._slots[
+                (current - offset) % SLOTS
+            ].items()
+            if now - last_vote >= timedelta(minutes=1)
+        ]
+
+    def __len__(self) -> int:
+        return sum(len(sites) for sites in self._users.values())
+
+
+class TodoDueQueue:
+    """
+    A min-heap of (due at, list id, position) of every todo that has a due date and
+    was not notified about yet.
+
+    It is built once from a query for lists with a todo that has a due date, after
+    that `schedule` is called whenever the todos of a list are saved. Heap entries
+    are not removed when a todo is changed, moved or deleted, instead every list
+    remembers which of its positions are still due and when, and entries that do
+    not match that anymore are skipped once they reach the top.
+
+    Todos that could not be notified about are put back with `retry` and are due
+    again after a delay, in a heap of their own.
+    """
+
+    def __init__(self):
+        self._heap: list[tuple[datetime, int, int]] = []
+        # list id -> position -> due at
+        self._lists: dict[int, dict[int, datetime]] = {}
+        # (retry at, (due at, list id, position))
+        self._retries: list[tuple[datetime, tuple[datetime, int, int]]] = []
+        # The lists changed while `build` is loading, None if it is not
+        self._changed_while_building: set[int] | None = None
+        self._changed = asyncio.Event()
+        self.built = False
+
+    async def build(self) -> None:
+        """Loads the due dates of every todo that was not notified about yet"""
+        self._changed_while_building = set()
+        try:
+            docs = await DB.todo.find(
+                {"todos.due_at": {"$gt": datetime.min}},
+                {"_id": 1, "todos.due_at": 1, "todos.notified": 1},
+            ).to_list(None)
+        finally:
+            changed, self._changed_while_building = self._changed_while_building, None
+
+        # What was scheduled while loading is newer than what was loaded
+        kept = {
+            list_id: self._lists[list_id] for list_id in changed if list_id in self._lists
+        }
+        self._heap, self._lists = [], {}
+        for doc in docs:
+            if doc["_id"] not in changed:
+                self.schedule(doc["_id"], doc["todos"])
+        for list_id, positions in kept.items():
+            self._lists[list_id] = positions
+            for position, due_at in positions.items():
+                heapq.heappush(self._heap, (due_at, list_id, position))
+        self._changed.set()
+        self.built = True
+
+    def schedule(self, list_id: int, todos: list[dict]) -> None:
+        """Updates the due dates of a list after its todos were changed"""
+        if self._changed_while_building is not None:
+            self._changed_while_building.add(list_id)
+        old = self._lists.pop(list_id, {})
+        due = {
+            position: todo["due_at"]
+            for position, todo in enumerate(todos)
+            if todo.get("due_at") and not todo.get("notified")
+        }
+        if not due:
+            return
+        self._lists[list_id] = due
+        for position, due_at in due.items():
+            if old.get(position) != due_at:
+                heapq.heappush(self._heap, (due_at, list_id, position))
+        self._changed.set()
+
+        # Every change can leave entries behind that will be skipped, so start
+        # over before they make up most of the heap
+        if len(self._heap) > 2 * len(self) + 64:
+            self._heap = [
+                (due_at, list_id, position)
+                for list_id, positions in self._lists.items()
+                for position, due_at in positions.items()
+            ]
+            heapq.heapify(self._heap)
+
+    def remove(self, list_id: int) -> None:
+        """Forgets all due dates of a list, for example after it was deleted"""
+        if self._changed_while_building is not None:
+            self._changed_while_building.add(list_id)
+        self._lists.pop(list_id, None)
+
+    def _is_current(self, entry: tuple[datetime, int, int]) -> bool:
+        due_at, list_id, position = entry
+        return self._lists.get(list_id, {}).get(position) == due_at
+
+    def _next(self) -> tuple[datetime, int, int] | None:
+        """The next entry of the heap that is still current, None if there is none"""
+        while self._heap and not self._is_current(self._heap[0]):
+            heapq.heappop(self._heap)
+        return self._heap[0] if self._heap else None
+
+    def next_due(self) -> datetime | None:
+        """When the next todo is due or should be retried, None if there is none"""
+        times = [entry[0] for entry in (self._next(), *self._retries[:1]) if entry]
+        return min(times, default=None)
+
+    def pop_due(self, now: datetime) -> list[tuple[datetime, int, int]]:
+        """Takes every todo that is due by `now` off the queue as (due at, list id, position)"""
+        due = []
+        while (entry := self._next()) is not None and entry[0] <= now:
+            heapq.heappop(self._heap)
+            del self._lists[entry[1]][entry[2]]
+            if not self._lists[entry[1]]:
+                del self._lists[entry[1]]
+            due.append(entry)
+        while self._retries and self._retries[0][0] <= now:
+            due.append(heapq.heappop(self._retries)[1])
+        return due
+
+    def retry(self, entry: tuple[datetime, int, int], at: datetime) -> None:
+        """
+        Puts a todo taken off by `pop_due` back to be due again at `at`, for example
+        because notifying about it failed. If the todo changes in the meantime the
+        entry is returned anyway, so check that it is still due before using it.
+        """
+        heapq.heappush(self._retries, (at, entry))
+        self._changed.set()
+
+    async def wait(self) -> None:
+        """Sleeps until the next todo is due or the due dates changed"""
+        self._changed.clear()
+        next_due = self.next_due()
+        timeout = (
+            None
+            if next_due is None
+            else max(0.0, (next_due - datetime.now()).total_seconds())
+        )
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def __len__(self) -> int:
+        return sum(len(positions) for positions in self._lists.values())
+
+
+async def create_indexes() -> None:
+    """
+    Creates the index `TodoDueQueue.build` finds lists with due todos from, so it
+    does not have to look at every list. Does nothing if it exists.
+    """
+    await DB.todo.create_index([("todos.due_at", 1)])
+
+
+reminder_wheel = VoteReminderWheel()
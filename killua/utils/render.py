@@ -0,0 +1,87 @@
+"""A shared process pool for CPU heavy image work, so it does not block the event loop."""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from time import perf_counter
+from typing import Any, Callable, TypeVar
+
+from killua.metrics import RENDER_QUEUE_DEPTH, RENDER_LATENCY, RENDER_REJECTED
+
+T = TypeVar("T")
+
+
+class RenderQueueFull(Exception):
+    pass
+
+
+def _warm_up() -> int:
+    """Run once in every worker so it is started before the first real image comes in"""
+    return os.getpid()
+
+
+class RenderExecutor:
+    """
+    Runs functions in a pool of worker processes.
+
+    Everything passed to `run` is pickled, so the function has to be defined
+    at module or class level and its arguments and return value need to be
+    picklable (PIL images, bytes and builtins are). Workers are not forked from
+    the bot, since a fork of a process running threads (like those of the database
+    client or aiohttp) can hang on a lock one of them held. They are started by a
+    forkserver where there is one and spawned otherwise, and import the module of
+    the function they run themselves.
+
+    At most `max_pending` renders can be queued or running at once, any more
+    raise RenderQueueFull straight away instead of piling up.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._pool: ProcessPoolExecutor | None = None
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context(
+                "forkserver" if "forkserver" in methods else "spawn"
+            )
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=context)
+        return self._pool
+
+    async def start(self) -> None:
+        """Starts all workers"""
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            *(loop.run_in_executor(self.pool, _warm_up) for _ in range(self.workers))
+        )
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Runs a function in a worker and returns its result"""
+        if self.pending >= self.max_pending:
+            RENDER_REJECTED.inc()
+            raise RenderQueueFull()
+
+        self.pending += 1
+        RENDER_QUEUE_DEPTH.set(self.pending)
+        start = perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self.pool, partial(func, *args, **kwargs)
+            )
+        finally:
+            self.pending -= 1
+            RENDER_QUEUE_DEPTH.set(self.pending)
+            RENDER_LATENCY.labels(func.__qualname__).observe(perf_counter() - start)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
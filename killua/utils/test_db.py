@@ -2,6 +2,8 @@ from typing import Any
 from copy import deepcopy
 from random import randint
 
+from pymongo.errors import OperationFailure
+
 
 class AsyncCursor:
     """An async-iterable wrapper around a list, mimicking motor's AsyncIOMotorCursor."""
@@ -21,6 +23,17 @@ class AsyncCursor:
         self._index += 1
         return item
 
+    def sort(self, key: str, direction: int = 1) -> "AsyncCursor":
+        self._items.sort(
+            key=lambda d: TestingDatabase._get_path(d, key, 0), reverse=direction < 0
+        )
+        return self
+
+    def limit(self, length: int) -> "AsyncCursor":
+        if length:
+            self._items = self._items[:length]
+        return self
+
     async def to_list(self, length: int | None = None) -> list[dict]:
         if length is not None:
             return self._items[:length]
@@ -36,6 +49,8 @@ class TestingDatabase:
     """A database class imitating pymongos collection classes"""
 
     db: dict[str, list[dict]] = {}
+    # collection -> index name -> keys, only recorded
+    indexes: dict[str, dict[str, list[tuple[str, int]]]] = {}
 
     @classmethod
     def reset_all(cls) -> None:
@@ -56,19 +71,56 @@ class TestingDatabase:
         """Traverses *obj* along a dotted key and returns (parent, final_key)."""
         parts = dotted_key.split(".")
         for part in parts[:-1]:
-            obj = obj[part]
+            obj = obj[int(part)] if isinstance(obj, list) else obj[part]
         return obj, parts[-1]
 
+    _MISSING = object()
+
+    @classmethod
+    def _get_path(cls, obj: dict, dotted_key: str, default: Any = _MISSING) -> Any:
+        """Returns the value at a dotted key, or *default* if it does not exist."""
+        for part in dotted_key.split("."):
+            if not isinstance(obj, dict) or part not in obj:
+                return default
+            obj = obj[part]
+        return obj
+
+    @classmethod
+    def _values(cls, obj: Any, parts: list[str]) -> list[Any]:
+        """All values at a dotted key, going into every element of arrays on the way like mongo does."""
+        if not parts:
+            return [obj]
+        if isinstance(obj, list):
+            return [v for item in obj for v in cls._values(item, parts)]
+        if not isinstance(obj, dict) or parts[0] not in obj:
+            return []
+        return cls._values(obj[parts[0]], parts[1:])
+
+    @staticmethod
+    def _condition_matches(value: Any, condition: Any) -> bool:
+        if isinstance(condition, dict) and any(k.startswith("$") for k in condition):
+            if "$in" in condition and value not in condition["$in"]:
+                return False
+            try:
+                if "$gt" in condition and not value > condition["$gt"]:
+                    return False
+                if "$gte" in condition and not value >= condition["$gte"]:
+                    return False
+            except TypeError:  # mongo does not compare values of different types
+                return False
+            return True
+        return value == condition
+
     def _matches(self, doc: dict, where: dict) -> bool:
         """Check if a document matches all conditions in *where*."""
         for wk, wv in where.items():
-            if wk not in doc:
-                return False
-            if isinstance(wv, dict) and any(k.startswith("$") for k in wv):
-                if "$in" in wv and doc[wk] not in wv["$in"]:
+            values = self._values(doc, wk.split("."))
+            if isinstance(wv, dict) and "$exists" in wv:
+                if bool(values) != bool(wv["$exists"]):
                     return False
-                continue
-            if doc[wk] != wv:
+            elif wv is None and not values:
+                continue  # mongo treats a missing key like null
+            elif not any(self._condition_matches(value, wv) for value in values):
                 return False
         return True
 
@@ -84,6 +136,21 @@ class TestingDatabase:
         results = [deepcopy(d) for d in coll if self._matches(d, where)]
         return AsyncCursor(results)
 
+    async def find_one_and_update(
+        self,
+        where: dict,
+        update: dict[str, dict] | list[dict],
+        projection: dict | None = None,
+        return_document: bool = False,
+        **kwargs,
+    ) -> dict | None:
+        for item in self.db[self.collection]:
+            if self._matches(item, where):
+                before = deepcopy(item)
+                self._apply_update(item, where, update)
+                return deepcopy(item) if return_document else before
+        return None
+
     async def insert_one(self, document: dict) -> None:
         if "_id" not in document:
             document["_id"] = randint(0, 2**63)
@@ -94,26 +161,147 @@ class TestingDatabase:
             await self.insert_one(obj)
 
     async def update_one(self, where: dict, update: dict[str, dict]) -> dict:
-        operator = list(update.keys())[0]
-
-        for p, item in enumerate(self.db[self.collection]):
+        for item in self.db[self.collection]:
             if self._matches(item, where):
-                record = self.db[self.collection][p]
-                for k, val in update[operator].items():
-                    parent, final = self._resolve_path(record, k)
-
-                    if operator == "$set":
-                        parent[final] = val
-                    elif operator == "$push":
-                        parent[final].append(val)
-                    elif operator == "$pull":
-                        parent[final].remove(val)
-                    elif operator == "$inc":
-                        parent[final] += val
+                self._apply_update(item, where, update)
                 break
 
         return update
 
+    async def bulk_write(self, requests: list, ordered: bool = True) -> None:
+        """Only supports the `UpdateOne` requests units of work send"""
+        for request in requests:
+            await self.update_one(request._filter, request._doc)
+
+    def _positional(self, record: dict, where: dict, dotted_key: str) -> str:
+        """Replaces the positional `$` in a key with the index of the first array element matched by *where*."""
+        array_key, rest = dotted_key.split(".$", 1)
+        array = self._get_path(record, array_key, [])
+        conditions = {
+            wk[len(array_key) + 1 :]: wv
+            for wk, wv in where.items()
+            if wk.startswith(array_key + ".")
+        }
+        index = next(
+            i for i, element in enumerate(array) if self._matches(element, conditions)
+        )
+        return f"{array_key}.{index}{rest}"
+
+    def _apply_update(
+        self, record: dict, where: dict, update: dict[str, dict] | list[dict]
+    ) -> None:
+        if isinstance(update, list):  # An aggregation pipeline of $set stages
+            for stage in update:
+                values = {k: self._evaluate(record, v) for k, v in stage["$set"].items()}
+                for k, val in values.items():
+                    parent, final = self._resolve_path(record, k)
+                    parent[final] = val
+            return
+
+        for operator, fields in update.items():
+            for k, val in fields.items():
+                if ".$" in k:
+                    k = self._positional(record, where, k)
+                parent, final = self._resolve_path(record, k)
+                if isinstance(parent, list):
+                    final = int(final)
+
+                if operator == "$set":
+                    parent[final] = val
+                elif operator == "$push":
+                    items = val["$each"] if isinstance(val, dict) and "$each" in val else [val]
+                    parent.setdefault(final, []).extend(items)
+                elif operator == "$pull":
+                    parent[final] = [
+                        v for v in parent.get(final, []) if not self._pulled(v, val)
+                    ]
+                elif operator == "$inc":
+                    parent[final] = (
+                        parent[final] if isinstance(parent, list) else parent.get(final, 0)
+                    ) + val
+
+    def _pulled(self, value: Any, condition: Any) -> bool:
+        """Whether `$pull` with *condition* removes *value* from an array."""
+        if isinstance(condition, dict) and "$in" in condition:
+            return value in condition["$in"]
+        if isinstance(condition, dict) and isinstance(value, dict):
+            return self._matches(value, condition)
+        return value == condition
+
+    @classmethod
+    def _evaluate(cls, doc: dict, expr: Any) -> Any:
+        """Evaluates the few aggregation expressions the bot uses."""
+        if isinstance(expr, str) and expr.startswith("$"):
+            return cls._get_path(doc, expr[1:], None)
+        if isinstance(expr, list):
+            return [cls._evaluate(doc, e) for e in expr]
+        if isinstance(expr, dict):
+            if not any(k.startswith("$") for k in expr):
+                return {k: cls._evaluate(doc, v) for k, v in expr.items()}
+            op, arg = next(iter(expr.items()))
+            if op == "$size":
+                return len(cls._evaluate(doc, arg))
+            if op == "$ifNull":
+                value = cls._evaluate(doc, arg[0])
+                return cls._evaluate(doc, arg[1]) if value is None else value
+            if op == "$add":
+                return sum(cls._evaluate(doc, a) for a in arg)
+            if op == "$literal":
+                return deepcopy(arg)
+            if op == "$slice":
+                array, start, n = (cls._evaluate(doc, a) for a in arg)
+                if n <= 0:
+                    # Like MongoDB, so updates that would fail there fail in tests too
+                    raise OperationFailure("Third argument to $slice must be positive")
+                return array[start : start + n]
+            if op == "$concatArrays":
+                return [v for a in arg for v in cls._evaluate(doc, a)]
+            raise NotImplementedError(f"Aggregation expression {op} is not supported")
+        return expr
+
+    async def aggregate(self, pipeline: list[dict]) -> AsyncCursor:
+        docs = [deepcopy(d) for d in self.db[self.collection]]
+        for stage in pipeline:
+            op, spec = next(iter(stage.items()))
+            if op == "$match":
+                docs = [d for d in docs if self._matches(d, spec)]
+            elif op == "$project":
+                docs = [
+                    {
+                        "_id": d.get("_id"),
+                        **{
+                            k: d.get(k) if v is True or v == 1 else self._evaluate(d, v)
+                            for k, v in spec.items()
+                        },
+                    }
+                    for d in docs
+                ]
+            elif op == "$group":
+                groups: dict[Any, dict] = {}
+                for d in docs:
+                    key = self._evaluate(d, spec["_id"])
+                    group = groups.setdefault(
+                        key, {"_id": key, **{f: 0 for f in spec if f != "_id"}}
+                    )
+                    for field, accumulator in spec.items():
+                        if field == "_id":
+                            continue
+                        acc_op, acc_expr = next(iter(accumulator.items()))
+                        if acc_op != "$sum":
+                            raise NotImplementedError(
+                                f"Accumulator {acc_op} is not supported"
+                            )
+                        group[field] += self._evaluate(d, acc_expr) or 0
+                docs = list(groups.values())
+            else:
+                raise NotImplementedError(f"Aggregation stage {op} is not supported")
+        return AsyncCursor(docs)
+
+    async def create_index(self, keys: list[tuple[str, int]], **kwargs) -> str:
+        name = "_".join(f"{field}_{direction}" for field, direction in keys)
+        self.indexes.setdefault(self._collection, {})[name] = list(keys)
+        return name
+
     async def count_documents(self, where: dict | None = None) -> int:
         where = where or {}
         return len([x async for x in self.find(where)])
@@ -130,17 +318,6 @@ class TestingDatabase:
         self.db[self.collection] = [d for d in coll if not self._matches(d, where)]
 
     async def update_many(self, where: dict, update: dict) -> None:
-        operator = list(update.keys())[0]
-        for p, item in enumerate(self.db[self.collection]):
+        for item in self.db[self.collection]:
             if self._matches(item, where):
-                record = self.db[self.collection][p]
-                for k, val in update[operator].items():
-                    parent, final = self._resolve_path(record, k)
-                    if operator == "$set":
-                        parent[final] = val
-                    elif operator == "$push":
-                        parent[final].append(val)
-                    elif operator == "$pull":
-                        parent[final].remove(val)
-                    elif operator == "$inc":
-                        parent[final] += val
+                self._apply_update(item, where, update)
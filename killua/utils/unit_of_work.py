@@ -0,0 +1,142 @@
+"""Collects the database writes of a command so they can be sent in as few requests as possible."""
+
+from __future__ import annotations
+
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from copy import deepcopy
+from inspect import isawaitable
+from typing import Any, AsyncIterator, Callable
+
+from pymongo import UpdateOne
+
+from killua.static.constants import DB
+
+# Operators that can be combined when two updates change the same field
+_MERGEABLE = ("$set", "$inc", "$push")
+
+_current: ContextVar[UnitOfWork | None] = ContextVar("unit_of_work", default=None)
+
+
+def _overlaps(key: str, other: str) -> bool:
+    return key == other or key.startswith(other + ".") or other.startswith(key + ".")
+
+
+def _each(value: Any) -> list[Any]:
+    return value["$each"] if isinstance(value, dict) and "$each" in value else [value]
+
+
+class UnitOfWork:
+    """
+    The updates made to documents while a `unit_of_work` block runs.
+
+    An update is merged into the last one with the same filter, unless an update of
+    the same document was added after that one or both change the same field in a way
+    that can't be combined into one update. That way every document ends up with
+    one update most of the time. `commit` sends the updates of every collection with
+    one `update_one`, or an ordered `bulk_write` if there is more than one.
+    """
+
+    def __init__(self):
+        # (collection, filter, update) in the order they were added
+        self._pending: list[tuple[str, dict, dict[str, dict]]] = []
+        # Called once the updates added before them were written
+        self._after_commit: list[Callable[[], Any]] = []
+
+    def add(self, collection: str, where: dict, update: dict[str, dict]) -> None:
+        """Adds an update of the documents matching `where`"""
+        for pending_collection, pending_where, pending_update in reversed(
+            self._pending
+        ):
+            if (
+                pending_collection != collection
+                or pending_where.get("id") != where.get("id")
+            ):
+                continue
+            if pending_where == where and self._merge(pending_update, update):
+                return
+            break  # It has to stay after the last update of the same document
+        self._pending.append((collection, dict(where), deepcopy(update)))
+
+    def after_commit(self, callback: Callable[[], Any]) -> None:
+        """
+        Calls `callback` once the updates added so far were written, and awaits it if
+        it is a coroutine function. It is not called if writing them fails.
+        """
+        self._after_commit.append(callback)
+
+    @staticmethod
+    def _merge(pending: dict[str, dict], update: dict[str, dict]) -> bool:
+        """Merges `update` into `pending`, returns False without changing it if it can't"""
+        for operator, fields in update.items():
+            for key in fields:
+                for pending_operator, pending_fields in pending.items():
+                    for pending_key in pending_fields:
+                        if _overlaps(key, pending_key) and not (
+                            key == pending_key
+                            and operator == pending_operator
+                            and operator in _MERGEABLE
+                        ):
+                            return False
+
+        for operator, fields in update.items():
+            merged = pending.setdefault(operator, {})
+            for key, value in fields.items():
+                if key not in merged or operator == "$set":
+                    merged[key] = deepcopy(value)
+                elif operator == "$inc":
+                    merged[key] += value
+                else:
+                    merged[key] = {"$each": [*_each(merged[key]), *deepcopy(_each(value))]}
+        return True
+
+    async def commit(self) -> None:
+        """Writes every update added so far"""
+        pending, self._pending = self._pending, []
+        callbacks, self._after_commit = self._after_commit, []
+        by_collection: dict[str, list[tuple[dict, dict[str, dict]]]] = {}
+        for collection, where, update in pending:
+            by_collection.setdefault(collection, []).append((where, update))
+
+        for collection, updates in by_collection.items():
+            if len(updates) == 1:
+                await getattr(DB, collection).update_one(*updates[0])
+            else:
+                await getattr(DB, collection).bulk_write(
+                    [UpdateOne(where, update) for where, update in updates],
+                    ordered=True,
+                )
+        for callback in callbacks:
+            if isawaitable(result := callback()):
+                await result
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+
+def current_unit_of_work() -> UnitOfWork | None:
+    """The unit of work of the `unit_of_work` block this runs in, if any"""
+    return _current.get()
+
+
+@asynccontextmanager
+async def unit_of_work() -> AsyncIterator[UnitOfWork]:
+    """
+    Collects the updates of every User and Guild written in the block and writes them
+    when it is left, also if it is left because of an exception. A block inside
+    another one adds to the outer one.
+
+    This only applies to the task running the block, so commands using the same
+    cached objects at the same time still write their changes right away.
+    """
+    if (outer := _current.get()) is not None:
+        yield outer
+        return
+
+    unit = UnitOfWork()
+    token = _current.set(unit)
+    try:
+        yield unit
+    finally:
+        _current.reset(token)
+        await unit.commit()
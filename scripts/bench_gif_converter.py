@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Compare TransparentAnimatedGifConverter against the old pure Python version.
+
+Builds the frames of a spin GIF (the same rotations the spin command uses) from
+a generated avatar, converts them with both implementations and prints the
+frames per second of each. The output of both is compared byte for byte with
+the same random seed and the script exits 1 if they differ.
+
+Usage:
+  python scripts/bench_gif_converter.py
+  python scripts/bench_gif_converter.py --size 512 --rounds 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+from io import BytesIO
+from pathlib import Path
+from time import perf_counter
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from PIL import Image, ImageDraw
+
+from killua.cogs.image_manipulation import ImageManipulation
+from killua.utils.gif import TransparentAnimatedGifConverter
+
+
+class LegacyConverter(TransparentAnimatedGifConverter):
+    """The per pixel implementation the converter used before it used NumPy"""
+
+    def _process_pixels(self):
+        self._transparent_pixels = set(
+            idx
+            for idx, alpha in enumerate(
+                self._img_rgba.getchannel(channel="A").getdata()
+            )
+            if alpha <= self._alpha_threshold
+        )
+
+    def _set_parsed_palette(self):
+        palette = self._img_p.getpalette()
+        self._img_p_used_palette_idxs = set(
+            idx
+            for pal_idx, idx in enumerate(self._img_p_data)
+            if pal_idx not in self._transparent_pixels
+        )
+        self._img_p_parsedpalette = dict(
+            (idx, tuple(palette[idx * 3 : idx * 3 + 3]))
+            for idx in self._img_p_used_palette_idxs
+        )
+
+    def _adjust_pixels(self):
+        if self._palette_replaces["idx_from"]:
+            trans_table = bytearray.maketrans(
+                bytes(self._palette_replaces["idx_from"]),
+                bytes(self._palette_replaces["idx_to"]),
+            )
+            self._img_p_data = self._img_p_data.translate(trans_table)
+        for idx_pixel in self._transparent_pixels:
+            self._img_p_data[idx_pixel] = 0
+        self._img_p.frombytes(data=bytes(self._img_p_data))
+
+    def process(self):
+        self._img_p = self._img_rgba.convert(mode="P")
+        self._img_p_data = bytearray(self._img_p.tobytes())
+        self._palette_replaces = dict(idx_from=list(), idx_to=list())
+        self._process_pixels()
+        self._process_palette()
+        self._adjust_pixels()
+        self._adjust_palette()
+        self._img_p.info["transparency"] = 0
+        self._img_p.info["background"] = 0
+        return self._img_p
+
+
+def make_frames(size: int) -> list[Image.Image]:
+    """A colourful avatar cropped to a circle and rotated like the spin command does"""
+    rng = random.Random(0)
+    image = Image.new("RGB", (size, size))
+    draw = ImageDraw.Draw(image)
+    for _ in range(60):
+        x, y = rng.randrange(size), rng.randrange(size)
+        r = rng.randrange(size // 16, size // 3)
+        colour = tuple(rng.randrange(256) for _ in range(3))
+        draw.ellipse((x - r, y - r, x + r, y + r), fill=colour)
+    circle = ImageManipulation._crop_to_circle(image.convert("RGBA"))
+    return [f.convert("RGBA") for f in ImageManipulation._create_frames(circle)]
+
+
+def convert(
+    converter: type[TransparentAnimatedGifConverter], frames: list[Image.Image]
+) -> tuple[float, bytes]:
+    """Converts all frames and returns how long it took and the resulting GIF"""
+    random.seed(0)  # The unused palette colours are random
+    start = perf_counter()
+    converted = [converter(frame).process() for frame in frames]
+    elapsed = perf_counter() - start
+
+    buffer = BytesIO()
+    converted[0].save(
+        buffer,
+        format="GIF",
+        save_all=True,
+        optimize=False,
+        append_images=converted[1:],
+        duration=1,
+        disposal=2,
+        loop=0,
+    )
+    return elapsed, buffer.getvalue()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size", type=int, default=256, help="avatar width and height")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    frames = make_frames(args.size)
+    print(f"{len(frames)} frames of {args.size}x{args.size}, best of {args.rounds}")
+    print(f"{'implementation':>15} {'frames/s':>10} {'ms/frame':>10}")
+
+    outputs = {}
+    for name, converter in (
+        ("legacy", LegacyConverter),
+        ("numpy", TransparentAnimatedGifConverter),
+    ):
+        timings = []
+        for _ in range(args.rounds):
+            elapsed, outputs[name] = convert(converter, frames)
+            timings.append(elapsed)
+        best = min(timings)
+        print(
+            f"{name:>15} {len(frames) / best:>10.1f} {best / len(frames) * 1000:>10.2f}"
+        )
+
+    if outputs["legacy"] != outputs["numpy"]:
+        print("Output differs between implementations!")
+        return 1
+    print("Output is byte identical")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
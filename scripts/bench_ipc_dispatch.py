@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Measure IPC latency with a mix of fast and slow routes.
+
+Starts an IPCDispatcher on a local ROUTER socket and fires requests at it from
+a DEALER client, the same way the API does. Every run is done twice: once with
+a concurrency limit of 1, which is how requests were handled before (one after
+the other), and once with the limit the bot uses.
+
+Usage:
+  python scripts/bench_ipc_dispatch.py
+  python scripts/bench_ipc_dispatch.py --requests 500 --slow-ratio 0.1 --slow-ms 250
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import sys
+from json import dumps, loads
+from pathlib import Path
+from time import perf_counter
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import zmq
+from zmq.asyncio import Context
+
+from killua.static.constants import IPC_MAX_CONCURRENT_REQUESTS
+from killua.utils.ipc import IPCDispatcher
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+async def run(
+    concurrency: int, requests: int, slow_ratio: float, slow_ms: float, rate: float
+) -> dict[str, list[float]]:
+    async def handler(route: str, data: dict):
+        if route == "slow":
+            await asyncio.sleep(slow_ms / 1000)
+        return {"n": data["n"]}
+
+    ctx = Context()
+    router = ctx.socket(zmq.ROUTER)
+    port = router.bind_to_random_port("tcp://127.0.0.1")
+    dealer = ctx.socket(zmq.DEALER)
+    dealer.connect(f"tcp://127.0.0.1:{port}")
+
+    dispatcher = IPCDispatcher(
+        router, handler, max_concurrency=concurrency, default_timeout=None
+    )
+    serving = asyncio.create_task(dispatcher.serve())
+
+    rng = random.Random(0)
+    routes = ["slow" if rng.random() < slow_ratio else "fast" for _ in range(requests)]
+    sent_at: dict[int, float] = {}
+    latencies: dict[str, list[float]] = {"fast": [], "slow": []}
+
+    async def send_all() -> None:
+        for n, route in enumerate(routes):
+            sent_at[n] = perf_counter()
+            body = b"\x00" + dumps({"route": route, "data": {"n": n}}).encode()
+            await dealer.send_multipart([b"", body])
+            await asyncio.sleep(1 / rate)
+
+    async def receive_all() -> None:
+        for _ in range(requests):
+            _, body = await dealer.recv_multipart()
+            n = loads(body)["n"]
+            latencies[routes[n]].append((perf_counter() - sent_at[n]) * 1000)
+
+    await asyncio.gather(send_all(), receive_all())
+
+    serving.cancel()
+    await asyncio.gather(serving, return_exceptions=True)
+    dealer.close(linger=0)
+    router.close(linger=0)
+    ctx.term()
+    return latencies
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--slow-ratio", type=float, default=0.1)
+    parser.add_argument("--slow-ms", type=float, default=200)
+    parser.add_argument(
+        "--rate", type=float, default=200, help="requests sent per second"
+    )
+    args = parser.parse_args()
+
+    print(
+        f"{args.requests} requests, {args.slow_ratio:.0%} slow ({args.slow_ms:.0f}ms), "
+        f"{args.rate:.0f} req/s"
+    )
+    print(f"{'concurrency':>12} {'route':>6} {'p50 ms':>10} {'p99 ms':>10}")
+    for concurrency in (1, IPC_MAX_CONCURRENT_REQUESTS):
+        latencies = await run(
+            concurrency, args.requests, args.slow_ratio, args.slow_ms, args.rate
+        )
+        for route, values in latencies.items():
+            print(
+                f"{concurrency:>12} {route:>6} {percentile(values, 50):>10.2f} "
+                f"{percentile(values, 99):>10.2f}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
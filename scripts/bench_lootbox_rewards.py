@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Measure how many lootboxes per second LootBox.generate_rewards can fill.
+
+Generates the rewards of every lootbox in LOOTBOXES over and over, once with
+the old implementation that searched the whole card list for every card slot
+and once with the precomputed samplers. Both are run with the same random seed
+and the script exits 1 if they did not produce the same rewards.
+
+Uses cards.json in the repository root if it exists (python -m killua
+--download public), otherwise a generated set of cards.
+
+Usage:
+  python scripts/bench_lootbox_rewards.py
+  python scripts/bench_lootbox_rewards.py --boxes 20000 --cards 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+from pathlib import Path
+from random import choice, choices, randint
+from time import perf_counter
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from killua.static.constants import BOOSTERS, LOOTBOXES
+from killua.static.enums import Booster
+from killua.utils.classes.card import Card
+from killua.utils.classes.lootbox import LootBox
+
+RANKS = ["SS", "S", "A", "B", "C", "D", "E", "F", "G", "H"]
+TYPES = ["normal", "spell", "monster"]
+
+
+def load_cards(amount: int) -> list[dict]:
+    path = ROOT / "cards.json"
+    if path.exists():
+        with path.open() as f:
+            return json.load(f)
+
+    rng = random.Random(0)
+    return [
+        {
+            "id": card_id,
+            "name": f"Card {card_id}",
+            "description": "",
+            "image": "",
+            "emoji": "",
+            "rank": rng.choice(RANKS),
+            "limit": 10,
+            "type": "normal" if card_id < 100 else rng.choice(TYPES),
+            "available": rng.random() > 0.1,
+        }
+        for card_id in range(amount)
+    ]
+
+
+async def legacy_generate_rewards(box: int) -> list[Card | Booster | int]:
+    """How rewards were generated before the samplers"""
+    data = LOOTBOXES[box]
+    rew = []
+
+    for _ in range((cards := randint(*data["cards_total"]))):
+        skip = False
+        if data["rewards"]["guaranteed"]:
+            for card, amount in data["rewards"]["guaranteed"].items():
+                if [r.id for r in rew].count(card) < amount:
+                    rew.append(Card(card))
+                    skip = True
+                    break
+
+        if skip:
+            continue
+        card_pool = [
+            Card(c["id"])
+            for c in Card.raw
+            if c["rank"] in data["rewards"]["cards"]["rarities"]
+            and c["type"] in data["rewards"]["cards"]["types"]
+            and c["available"]
+            and c["id"] != 0
+        ]
+        rew.append(choice(card_pool))
+
+    for _ in range(boosters := randint(*data["boosters_total"])):
+        if isinstance(data["rewards"]["boosters"], int):
+            rew.append(Booster(data["rewards"]["boosters"]))
+        else:
+            rew.append(
+                Booster(
+                    choices(
+                        data["rewards"]["boosters"],
+                        [
+                            BOOSTERS[int(x)]["probability"]
+                            for x in data["rewards"]["boosters"]
+                        ],
+                    )[0]
+                )
+            )
+
+    for _ in range(data["rewards_total"] - cards - boosters):
+        rew.append(randint(*data["rewards"]["jenny"]))
+
+    return rew
+
+
+async def run(generate, boxes: int) -> tuple[float, list]:
+    """Fills `boxes` lootboxes, going through every kind of box in turn"""
+    random.seed(0)
+    kinds = list(LOOTBOXES.keys())
+    start = perf_counter()
+    results = [await generate(kinds[i % len(kinds)]) for i in range(boxes)]
+    elapsed = perf_counter() - start
+    return elapsed, [
+        [r.id if isinstance(r, Card) else r for r in rewards] for rewards in results
+    ]
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--boxes", type=int, default=5000)
+    parser.add_argument(
+        "--cards", type=int, default=1000, help="cards to generate without cards.json"
+    )
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    Card.load(load_cards(args.cards))
+    start = perf_counter()
+    LootBox.samplers()
+    print(
+        f"{len(Card.raw)} cards, samplers built in {(perf_counter() - start) * 1000:.2f}ms"
+    )
+    print(f"{args.boxes} boxes, best of {args.rounds}")
+    print(f"{'implementation':>15} {'boxes/s':>12} {'us/box':>10}")
+
+    outputs = {}
+    for name, generate in (
+        ("legacy", legacy_generate_rewards),
+        ("samplers", LootBox.generate_rewards),
+    ):
+        timings = []
+        for _ in range(args.rounds):
+            elapsed, outputs[name] = await run(generate, args.boxes)
+            timings.append(elapsed)
+        best = min(timings)
+        print(
+            f"{name:>15} {args.boxes / best:>12.0f} {best / args.boxes * 1e6:>10.1f}"
+        )
+
+    if outputs["legacy"] != outputs["samplers"]:
+        print("Rewards differ between implementations!")
+        return 1
+    print("Rewards are identical")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))